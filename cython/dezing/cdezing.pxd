@@ -21,5 +21,8 @@ cdef extern from "./timestamp.h":
    void timestamp(const char * const stampmsg,const int loglevel)
 
 cdef extern from "./dezing_functions.h":
+   int DEZING_UINT16
+   int DEZING_FLOAT32
+   int dezingBatch(const Options * ctrlp, unsigned int thisbatch, int dtype, const void * inbuf, void * outbuf) nogil
    void runDezing(Options * ctrlp, unsigned int  thisbatch,unsigned char * inbuf, unsigned char * outbuf )
 
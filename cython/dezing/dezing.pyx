@@ -3,16 +3,11 @@ import numpy as np
 import logging
 cimport numpy as np
 cimport cdezing
+from libc.string cimport memset
 
 # $Id: dezing.pyx 465 2016-02-16 11:02:36Z kny48981 $
 
 
-
-cdef cdezing.Options ctrl
-ctrl.nthreadsreq=0
-
-cdef unsigned int batchsize
-
 cdef public void pydebug(char * message):
    logging.debug(message)
 cdef public void pyinfo(char * message):
@@ -25,87 +20,114 @@ cdef public void pyuser(char * message):
    logging.log(100,message)
 
 def getversion():
-   global ctrl
+   cdef cdezing.Options ctrl
+   memset(&ctrl,0,sizeof(ctrl))
    ctrl.versionflag=1
    cdezing.runDezing(&ctrl,0,NULL,NULL)
 
 
 
-def setup_size(array_size,outlier_mu,npad,logfile="dezing.log",versionflag=0): #,bytes summary):
-   global ctrl
-   global batchsize
+cdef class Dezing:
+   """
+   A dezing context for frames of a fixed size.  All the state is held by
+   the instance, so several contexts (e.g. for the dark and flat fields and
+   for the data) can exist at once, and run releases the GIL, so contexts
+   can be run concurrently from several python threads.
+
+   :param array_size: the shape of the data (only the frame shape, the last
+       two dimensions, is used).
+   :param outlier_mu: threshold for detecting outliers.
+   :param npad: the number of padding frames at each end of a batch.
+   :keyword nthreads: the number of threads used for each batch, 0 uses the
+       processors assigned by the queue (NSLOTS) or all the processors.
+   """
+   cdef cdezing.Options ctrl
+
+   def __cinit__(self,array_size,outlier_mu,npad,nthreads=0,versionflag=0):
+      self.ctrl.versionflag=versionflag
+      self.ctrl.outlier_mu=outlier_mu
+      self.ctrl.cropwd=array_size[-1]
+      self.ctrl.nlines=array_size[-2]
+      self.ctrl.npad=npad
+      self.ctrl.nthreadsreq=nthreads
+      self.ctrl.returnflag=0
+      self.ctrl.warnflag=0
+      self.ctrl.errflag=0
+
+   def run(self,np.ndarray inarray,np.ndarray outarray):
+      """ Dezing a batch of uint16 or float32 frames, including npad
+      padding frames at each end, into an output array of the same shape and
+      type (the padding frames of the output are not set).
+
+      :returns: (returnflag, warnflag, errflag)
+      """
+      cdef int dtype
+      cdef int retval
+      cdef unsigned int batch
+      cdef const void * inbuf
+      cdef void * outbuf
+
+      if inarray.dtype == np.uint16:
+         dtype=cdezing.DEZING_UINT16
+      elif inarray.dtype == np.float32:
+         dtype=cdezing.DEZING_FLOAT32
+      else:
+         raise TypeError("dezing requires uint16 or float32 data, not %s" %
+                         inarray.dtype)
+      if outarray.dtype != inarray.dtype or \
+            (<object>outarray).shape != (<object>inarray).shape:
+         raise ValueError("the dezing output must match the input")
+      if inarray.ndim != 3 or inarray.shape[1] != self.ctrl.nlines or \
+            inarray.shape[2] != self.ctrl.cropwd:
+         raise ValueError("the dezing frames must have the shape (%i, %i)" %
+                          (self.ctrl.nlines, self.ctrl.cropwd))
+      if not inarray.flags['C_CONTIGUOUS'] or \
+            not outarray.flags['C_CONTIGUOUS']:
+         raise ValueError("the dezing arrays must be C contiguous")
+
+      batch=inarray.shape[0]
+      inbuf=np.PyArray_DATA(inarray)
+      outbuf=np.PyArray_DATA(outarray)
+      with nogil:
+         retval=cdezing.dezingBatch(&self.ctrl,batch,dtype,inbuf,outbuf)
+      if retval != 0:
+         logging.error("dezing failed with error code %i", retval)
+         self.ctrl.returnflag=5
+         self.ctrl.errflag=1
+      else:
+         self.ctrl.returnflag=0
+      return(self.ctrl.returnflag,self.ctrl.warnflag,self.ctrl.errflag)
+
+
+# the context used by the module functions setup_size, run and cleanup
+cdef Dezing context=None
+
+
+def setup_size(array_size,outlier_mu,npad,logfile="dezing.log",versionflag=0,nthreads=0): #,bytes summary):
+   global context
    logging.debug("setup_size: opening log file")
    cdezing.timestamp_open(logfile)
    cdezing.timestamp_init()
+   context=Dezing(array_size,outlier_mu,npad,nthreads=nthreads,
+                  versionflag=versionflag)
+   return(0,0,0)
 
-   logging.debug( "setup_size: setting control flags")
-   ctrl.versionflag=versionflag
-   ctrl.outlier_mu=outlier_mu
-   ctrl.cropwd=array_size[2]
-   ctrl.nlines=array_size[1]
-   ctrl.npad=npad
-   ctrl.nthreadsreq=0
-
-   batchsize = array_size[0] + (2 * npad)
-
-   ctrl.f_call_num=0
-
-   cdezing.timestamp( "setup_size: calling c function for setup",1 )
-   #cdezing.runDezing(&ctrl,batchsize,<unsigned char *> inarray.data,<unsigned char *> outarray.data)
-   cdezing.runDezing(&ctrl,batchsize, NULL, NULL)
-   return(ctrl.returnflag,ctrl.warnflag,ctrl.errflag)
-
-def setup(np.ndarray[np.uint16_t,ndim=3,mode="c"] inarray,np.ndarray[np.uint16_t,ndim=3,mode="c"] outarray,outlier_mu,npad,logfile="dezing.log",versionflag=0): #,bytes summary):
-   global ctrl
-   global batchsize
-   print "setup: opening log file"
-   cdezing.timestamp_open(logfile)
-   cdezing.timestamp_init()
-   print "setup: coercing array"
-   inbuf=<unsigned char *>np.PyArray_DATA(inarray)
-   outbuf=<unsigned char *>np.PyArray_DATA(outarray)
-
-   print "setup:setting control flags"
-   ctrl.versionflag=versionflag
-   ctrl.outlier_mu=outlier_mu
-   ctrl.cropwd=inarray.shape[2]
-   ctrl.nlines=inarray.shape[1]
-   ctrl.npad=npad
-   batchsize=inarray.shape[0]
-
-   ctrl.f_call_num=0
-
-   cdezing.timestamp( "calling c function setup",1 )
-   #cdezing.runDezing(&ctrl,batchsize,<unsigned char *> inarray.data,<unsigned char *> outarray.data)
-   cdezing.runDezing(&ctrl,batchsize, inbuf, outbuf)
-   pass
+def setup(np.ndarray inarray,np.ndarray outarray,outlier_mu,npad,logfile="dezing.log",versionflag=0): #,bytes summary):
+   """ Set up the module context for frames of the same shape as inarray
+   (see setup_size). """
+   return(setup_size((<object>inarray).shape,outlier_mu,npad,logfile=logfile,
+                     versionflag=versionflag))
 
-def run(np.ndarray[np.uint16_t,ndim=3,mode="c"] inarray,np.ndarray[np.uint16_t,ndim=3,mode="c"] outarray): #,bytes summary):
-   global ctrl
-   global batchsize
-
-   logging.debug("coercing arrays ")
-   inbuf=<unsigned char *>np.PyArray_DATA(inarray)
-   outbuf=<unsigned char *>np.PyArray_DATA(outarray)
-   logging.debug( "in dezing.run: ctrl.cropwd is: %i batchsize is %s"% (ctrl.cropwd, (batchsize,)))
-
-   batchsize=inarray.shape[0]
-
-   cdezing.timestamp( "calling c function with run flag",1 )
-   ctrl.f_call_num=1
-   cdezing.runDezing(&ctrl,batchsize, <unsigned char *>np.PyArray_DATA(inarray), <unsigned char *> np.PyArray_DATA(outarray))
-   return(ctrl.returnflag,ctrl.warnflag,ctrl.errflag)
+def run(np.ndarray inarray,np.ndarray outarray): #,bytes summary):
+   return(context.run(inarray,outarray))
 
 
 
 def cleanup(): #,bytes summary):
-   global ctrl
-   global batchsize
-   ctrl.f_call_num=2
-   cdezing.timestamp( "calling c function with cleanup flag",1 )
-   cdezing.runDezing(&ctrl,batchsize, NULL,NULL)
+   global context
+   context=None
    cdezing.timestamp_close()
-   return(ctrl.returnflag,ctrl.warnflag,ctrl.errflag)
+   return(0,0,0)
 
 
 
@@ -114,15 +136,12 @@ def cleanup(): #,bytes summary):
 
 
 def test_run(width=2550,length=2500,batchsize=100):
-   #cdef np.ndarray[np.uint16_t,ndim=3] inarray =np.ones((width,length,batchsize),dtype=np.uint16)
-   #cdef np.ndarray[np.uint16_t,ndim=3] outarray =np.empty((width,length,batchsize),dtype=np.uint16)
-   inarray =np.ones((width,length,batchsize),dtype=np.uint16)
-   outarray =np.empty((width,length,batchsize),dtype=np.uint16)
-   print "setting control flags"
-   ctrl.versionflag=0
-   ctrl.outlier_mu=1.5
-   ctrl.cropwd=width
-   ctrl.nlines=length
+   """ Dezing a batch of uint16 frames with random zingers.
+
+   :returns: frame 50 of the input and of the output
+   """
+   inarray =np.ones((batchsize,length,width),dtype=np.uint16)
+   outarray =np.empty((batchsize,length,width),dtype=np.uint16)
    print "setting a test value at element 0"
    inarray[0,0,0]=143
    print "creating random zingers"
@@ -131,58 +150,18 @@ def test_run(width=2550,length=2500,batchsize=100):
    print "applying random zingers"
    for i in range(0,batchsize):
       for d in range(0,len(xarray)):
-         xidx=xarray[d]
-         yidx=yarray[d]
-         inarray[xidx,yidx,i]=100*np.random.rand()
-   
+         inarray[i,yarray[d],xarray[d]]=100*np.random.rand()
+
    print "getting slice of input"
-   in50=inarray[:,:,50]
+   in50=inarray[50]
    print "setting inarray element 0 to %i"%inarray[0,0,0]
    cdezing.timestamp_open("test_run.log")
 
-
-   inbuf=<unsigned char *>np.PyArray_DATA(inarray)
-   outbuf=<unsigned char *>np.PyArray_DATA(outarray)
-
-   ctrl.f_call_num=0
-   print "calling c function setup"
-   #cdezing.runDezing(&ctrl,batchsize,<unsigned char *> inarray.data,<unsigned char *> outarray.data)
-   cdezing.runDezing(&ctrl,batchsize, inbuf, outbuf)
-
-   ctrl.f_call_num=1
-   print "calling c function"
-   #cdezing.runDezing(&ctrl,batchsize,<unsigned char *> inarray.data,<unsigned char *> outarray.data)
-   cdezing.runDezing(&ctrl,batchsize, <unsigned char *>np.PyArray_DATA(inarray), <unsigned char *> np.PyArray_DATA(outarray))
-
-   ctrl.f_call_num=2
-   print "calling c function cleanup"
-   #cdezing.runDezing(&ctrl,batchsize,<unsigned char *> inarray.data,<unsigned char *> outarray.data)
-   cdezing.runDezing(&ctrl,batchsize, <unsigned char *>np.PyArray_DATA(inarray), <unsigned char *> np.PyArray_DATA(outarray))
-
+   print "calling dezing"
+   Dezing(inarray.shape,1.5,2).run(inarray,outarray)
 
    cdezing.timestamp_close()
-   print "finished c function"
+   print "finished dezing"
    print "outarray element 0 is %i"%outarray[0,0,0]
-   out50=outarray[:,:,50]
+   out50=outarray[50]
    return(in50,out50)
-
-
-
-
-def test_data():
-   cdef np.ndarray[np.uint16_t,ndim=3] inarray =np.ones((50,100,15),dtype=np.uint16)
-   cdef np.ndarray[np.uint16_t,ndim=3] outarray =np.empty((50,100,15),dtype=np.uint16)
-   ctrl.versionflag=2
-   ctrl.outlier_mu=0.7
-   ctrl.cropwd=50
-   ctrl.nlines=100
-   inarray[0,0,0]=143
-   print "setting inarray element 0 to %i"%inarray[0,0,0]
-   print "calling c function"
-   cdezing.timestamp("calling c function",1)
-   cdezing.runDezing(&ctrl,15,<unsigned char *> inarray.data,<unsigned char *> outarray.data)
-   print "finished c function"
-   print "outarray element 0 is %i"%outarray[0,0,0]
-
-
-
@@ -1,2 +1,6 @@
 
+#define DEZING_UINT16 (0)
+#define DEZING_FLOAT32 (1)
+
+extern int dezingBatch(const Options * const ctrlp, u_int32_t thisbatch, int dtype, const void * inbuf, void * outbuf);
 extern void runDezing(Options * ctrlp, u_int32_t  thisbatch,u_int8_t * inbuf, u_int8_t * outbuf );
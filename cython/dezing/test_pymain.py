@@ -44,7 +44,7 @@ def dezing_brickframe(pnum):
 
    dezing.setup(instack,outim,mu,2)
    dezing.run(instack,outim)
-   dezing.cleanup(instack,outim)
+   dezing.cleanup()
 
    tifffile.imsave("/dls/science/users/kny48981/outstack.tif",outim)
 
@@ -21,10 +21,14 @@
 
 """
 
+import os
+import copy
 import logging
 
 import savu.core.utils as cu
 import savu.plugins.utils as pu
+import savu.data.shared_memory as shm
+import savu.plugins.plugin_catalogue as pc
 from savu.data.experiment_collection import Experiment
 
 
@@ -43,9 +47,18 @@ class PluginRunner(object):
         pu.get_plugins_paths()
 
     def _run_plugin_list(self):
+        """ Create an experiment and run the plugin list.  If a quick look is
+        requested, the plugin list is first run on a subset of the data.
+        """
+        if self.options.get('quick_look') and \
+                self.options.get('run_mode', 'full') == 'full':
+            self.__run_quick_look()
+        return self.__run(self.options)
+
+    def __run(self, options):
         """ Create an experiment and run the plugin list.
         """
-        self.exp = Experiment(self.options)
+        self.exp = Experiment(options)
         plugin_list = self.exp.meta_data.plugin_list.plugin_list
 
         logging.info("run_plugin_list: 1")
@@ -65,6 +78,7 @@ class PluginRunner(object):
 
         logging.info("run_plugin_list: 4")
         self.exp._barrier()
+        shm.free_shared()
 
         cu.user_message("***********************")
         cu.user_message("* Processing Complete *")
@@ -73,6 +87,97 @@ class PluginRunner(object):
         self.exp.nxs_file.close()
         return self.exp
 
+    def __run_quick_look(self):
+        """ Run the plugin list on a few frames of the slice dimension of the
+        sinogram pattern (e.g. a central sinogram and some spread slices), and
+        write the results to a separate quick look folder, before the full
+        data is processed.
+        """
+        options = copy.copy(self.options)
+        options['out_path'] = os.path.join(options['out_path'], 'quicklook')
+        options['inter_path'] = options['out_path']
+        if options['process'] is 0 and not os.path.exists(options['out_path']):
+            os.makedirs(options['out_path'])
+
+        self.exp = Experiment(options)
+        self.exp._barrier()
+        plugin_list = copy.deepcopy(self.exp.meta_data.plugin_list.plugin_list)
+        preview = self.__get_quick_look_preview(plugin_list[0])
+        self.exp._clear_data_objects()
+        if preview is None:
+            cu.user_message("*The quick look is only available for data with "
+                            "a sinogram pattern*")
+            return
+
+        plugin_list[0]['data']['preview'] = preview
+        options['run_type'] = 'test'
+        options['plugin_list'] = plugin_list
+        cu.user_message("*Running a quick look with preview %s*" % preview)
+        self.__run(options)
+
+    def __get_quick_look_preview(self, loader_dict):
+        """ Get the preview of the first loader for the quick look.
+
+        The ``quick_look`` option is either the number of frames to process,
+        spread evenly around the centre of the sinogram slice dimension (and
+        within any existing preview), or a preview entry ``start:stop:step``
+        for that dimension.
+
+        :returns: the preview list, or None if the data has no sinogram
+            pattern
+        :rtype: list(str)
+        """
+        pu.plugin_loader(self.exp, loader_dict)
+        datasets = [d for d in self.exp.index['in_data'].values() if
+                    'SINOGRAM' in d.get_data_patterns()]
+        if not datasets:
+            return None
+        data = datasets[0]
+        dim = data.get_data_patterns()['SINOGRAM']['slice_dir'][0]
+        starts, stops, steps, chunks = \
+            data.get_preview().get_starts_stops_steps()
+        preview = ['%i:%i:%i:%i' % p for p in
+                   zip(starts, stops, steps, chunks)]
+
+        quick_look = str(self.options['quick_look'])
+        if not quick_look.isdigit():
+            length = data.data_info.get_dictionary().get(
+                'orig_shape', data.get_shape())[dim]
+            preview[dim] = self.__get_quick_look_entry(quick_look, length)
+            return preview
+
+        n_frames = max(int(quick_look), 1)
+        frames = range(starts[dim], stops[dim], steps[dim])
+        if n_frames < len(frames):
+            spacing = len(frames)/n_frames
+            first = len(frames)/2 - spacing*(n_frames/2)
+            frames = frames[first:first + spacing*(n_frames-1) + 1:spacing]
+            preview[dim] = '%i:%i:%i:1' % \
+                (frames[0], frames[-1] + 1, spacing*steps[dim])
+        return preview
+
+    def __get_quick_look_entry(self, quick_look, length):
+        """ Convert a quick look preview entry ``start:stop[:step]`` to the
+        ``start:stop:step:chunk`` form expected by the loader.
+
+        :param str quick_look: the quick look option
+        :param int length: the length of the dimension it applies to
+        :returns: the preview entry
+        :rtype: str
+        """
+        try:
+            vals = [int(v) for v in quick_look.split(':')]
+        except ValueError:
+            vals = []
+        if len(vals) == 2:
+            vals.append(1)
+        if len(vals) != 3 or not 0 <= vals[0] < vals[1] <= length or \
+                vals[2] < 1:
+            raise Exception("The quick look preview %s is not a valid "
+                            "'start:stop:step' entry for a dimension of "
+                            "length %i" % (quick_look, length))
+        return '%i:%i:%i:1' % tuple(vals)
+
     def _run_plugin_list_check(self, plugin_list):
         """ Run the plugin list through the framework without executing the
         main processing.
@@ -83,6 +188,8 @@ class PluginRunner(object):
 
         self.exp._barrier()
         pu.run_plugins(self.exp, plugin_list, check=True)
+        if self.exp.meta_data.get_meta_data('process') is 0:
+            pc.save()
 
         self.exp._barrier()
         self.exp._clear_data_objects()
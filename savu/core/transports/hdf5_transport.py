@@ -23,6 +23,7 @@
 
 import logging
 import socket
+import time
 import os
 import copy
 import numpy as np
@@ -32,6 +33,8 @@ from itertools import chain
 from savu.core.transport_control import TransportControl
 import savu.plugins.utils as pu
 import savu.core.utils as cu
+import savu.data.fft_plans as fftp
+from savu.data.output_cache import OutputCache
 
 
 class Hdf5Transport(TransportControl):
@@ -162,28 +165,46 @@ class Hdf5Transport(TransportControl):
         plugin_obj = exp.meta_data.plugin_list
         n_loaders = plugin_obj._get_n_loaders()
         plugin_list = exp.meta_data.plugin_list.plugin_list
+        fftp.setup(exp)
 
-        for i in range(n_loaders):
-            pu.plugin_loader(exp, plugin_list[i])
+        if self.__get_run_mode(exp.meta_data) != 'full':
+            cu.user_message("*Running in %s diagnostic mode*" %
+                            self.__get_run_mode(exp.meta_data))
 
-        start = n_loaders
-        stop = 0
+        # the Data objects created by the loaders in the plugin list check
+        # are reused
+        if not exp._restore_loaded_data():
+            for i in range(n_loaders):
+                pu.plugin_loader(exp, plugin_list[i])
+
+        self.output_cache = OutputCache(exp)
+        start = self.output_cache._restore(n_loaders)
+        stop = start
         n_plugins = len(plugin_list) - 1  # minus 1 for saver
 
         while n_plugins != stop:
-            start_in_data = copy.deepcopy(self.exp.index['in_data'])
+            # the output files are set up with copies of the input Data
+            # objects, and the originals are kept for the run
+            start_in_data = exp.index['in_data']
+            exp.index['in_data'] = {}
+            for key, data in start_in_data.iteritems():
+                exp.index['in_data'][key] = data._shared_copy()
             in_data = exp.index["in_data"][exp.index["in_data"].keys()[0]]
 
             out_data_objs, stop = in_data._load_data(start)
             exp._clear_data_objects()
 
-            self.exp.index['in_data'] = copy.deepcopy(start_in_data)
+            self.exp.index['in_data'] = start_in_data
             self.__real_plugin_run(plugin_list, out_data_objs, start, stop)
             start = stop
 
         for key in exp.index["in_data"].keys():
             exp.index["in_data"][key]._close_file()
 
+        self.output_cache._save()
+        fftp.save_wisdom(exp)
+        fftp.clear_plans()
+        exp._barrier()
         return
 
     def __real_plugin_run(self, plugin_list, out_data_objs, start, stop):
@@ -204,9 +225,15 @@ class Hdf5Transport(TransportControl):
 
             exp._barrier()
             cu.user_message("*Running the %s plugin*" % (plugin_list[i]['id']))
+            if plugin.auto_frames:
+                cu.user_message("%s - processing %i frames at a time" %
+                                (plugin.name, plugin.auto_frames))
+            start_time = time.time()
             plugin._run_plugin(exp, self)
 
             exp._barrier()
+            cu.user_message("%s - wall time %.3f s" %
+                            (plugin.name, time.time() - start_time))
             if self.mpi:
                 cu.user_messages_from_all(plugin.name,
                                           plugin.executive_summary())
@@ -217,6 +244,7 @@ class Hdf5Transport(TransportControl):
             exp._barrier()
             out_datasets = plugin.parameters["out_datasets"]
             exp._reorganise_datasets(out_datasets, link_type)
+            self.output_cache._add(i, out_datasets)
 
     def _process(self, plugin):
         """ Organise required data and execute the main plugin processing.
@@ -233,12 +261,28 @@ class Hdf5Transport(TransportControl):
         squeeze_dict = self.__set_functions(in_data, 'squeeze')
         expand_dict = self.__set_functions(out_data, 'expand')
 
+        run_mode = self.__get_run_mode(expInfo)
+        cached = None
+
         number_of_slices_to_process = len(in_slice_list[0])
         for count in range(number_of_slices_to_process):
             percent_complete = count/(number_of_slices_to_process * 0.01)
             cu.user_message("%s - %3i%% complete" %
                             (plugin.name, percent_complete))
 
+            if run_mode == 'compute':
+                if cached is None:
+                    cached = self.__get_all_padded_data(
+                        in_data, in_slice_list, 0, squeeze_dict)
+                section = [frames.copy() for frames in cached[0]]
+                plugin.process_frames(section, cached[1])
+                continue
+
+            if run_mode == 'io':
+                self.__copy_in_to_out_data(in_data, in_slice_list, out_data,
+                                           out_slice_list, count)
+                continue
+
             section, slice_list = \
                 self.__get_all_padded_data(in_data, in_slice_list, count,
                                            squeeze_dict)
@@ -249,6 +293,16 @@ class Hdf5Transport(TransportControl):
         cu.user_message("%s - 100%% complete" % (plugin.name))
         plugin._revert_preview(in_data)
 
+    def __get_run_mode(self, expInfo):
+        """ Get the diagnostic run mode: 'full' (default), 'compute' (frames
+        are read once and cached, and results are discarded) or 'io' (all
+        reads and writes are performed but process_frames is not called).
+        """
+        try:
+            return expInfo.get_meta_data('run_mode')
+        except KeyError:
+            return 'full'
+
     def process_checks(self):
         pass
         # if plugin inherits from base_recon and the data inherits from tomoraw
@@ -358,6 +412,34 @@ class Hdf5Transport(TransportControl):
                 data_list[idx]._get_unpadded_slice_data(
                     slice_list[idx][count], expand_dict[idx](result[idx]))
 
+    def __copy_in_to_out_data(self, in_data, in_slice_list, out_data,
+                              out_slice_list, count):
+        """ Replay the reads and writes for the current frame without
+        processing. Each output dataset is filled with the matching input
+        frames if the shapes agree, and with zeros otherwise.
+
+        :param list(Data) in_data: input datasets
+        :param list(list(slice)) in_slice_list: slice lists for in_data
+        :param list(Data) out_data: output datasets
+        :param list(list(slice)) out_slice_list: slice lists for out_data
+        :param int count: frame number
+        """
+        frames = []
+        for idx in range(len(in_data)):
+            sl = in_slice_list[idx][count]
+            frames.append(in_data[idx]._get_unpadded_slice_data(
+                sl, in_data[idx]._get_padded_slice_data(sl)))
+
+        for idx in range(len(out_data)):
+            data = out_data[idx].data
+            sl = out_slice_list[idx][count]
+            shape = tuple(len(range(*s.indices(n))) for s, n in
+                          zip(sl, data.shape) if isinstance(s, slice))
+            if idx < len(frames) and frames[idx].shape == shape:
+                data[sl] = frames[idx].astype(data.dtype)
+            else:
+                data[sl] = np.zeros(shape, dtype=data.dtype)
+
 #    def _transfer_to_meta_data(self, return_dict):
 #        """
 #        """
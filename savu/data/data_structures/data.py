@@ -100,6 +100,15 @@ class Data(DataCreate):
         name = self.data_info.get_meta_data('name')
         return dsu._deepcopy_data_object(self, Data(name, self.exp))
 
+    def _shared_copy(self):
+        """ Copy the data object, sharing the values held by its data
+        information.  Use this where the original is handed over rather
+        than changed further.
+        """
+        name = self.data_info.get_meta_data('name')
+        return dsu._deepcopy_data_object(self, Data(name, self.exp),
+                                         share=True)
+
     def get_data_patterns(self):
         """ Get data patterns associated with this data object.
 
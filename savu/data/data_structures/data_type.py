@@ -26,6 +26,9 @@ import os
 import numpy as np
 import fabio
 
+import savu.data.loader_cache as lc
+import savu.data.shared_memory as shm
+
 
 class DataTypes(object):
 
@@ -163,14 +166,37 @@ class ImageKey(DataTypes):
         new_shape[proj_dim] = len(data_idx)
         self.shape = tuple(new_shape)
         self.nDims = len(self.shape)
-        data_obj.meta_data.set_meta_data('dark', self.dark_mean())
-        data_obj.meta_data.set_meta_data('flat', self.flat_mean())
+        for name, func in [('dark', self.dark_mean),
+                           ('flat', self.flat_mean)]:
+            data_obj.meta_data.set_meta_data(name, shm.share_array(
+                data_obj.exp, lambda name=name, func=func:
+                self.__load_or_compute(data_obj.exp, name, func),
+                key=self.__get_key(name)))
 
     def __getitem__(self, idx):
         index = list(idx)
         index[self.proj_dim] = self.get_index(0)[idx[self.proj_dim]].tolist()
         return self.data[tuple(index)]
 
+    def __load_or_compute(self, exp, name, func):
+        """ Get the averaged dark or flat data from the loader cache. """
+        try:
+            fname = self.data.file.filename
+        except AttributeError:
+            return func()
+        return lc.load_or_compute(exp, fname, name, func,
+                                  params=(self.data.name, self.proj_dim))
+
+    def __get_key(self, name):
+        """ A key identifying the averaged dark or flat data of a hdf5
+        dataset, to share it between the processes on a node. """
+        try:
+            fname = self.data.file.filename
+            return ('image_key', name, fname, self.data.name,
+                    os.path.getmtime(fname))
+        except (AttributeError, OSError):
+            return None
+
     def get_shape(self):
         return self.shape
 
@@ -26,6 +26,7 @@ import sys
 from fractions import gcd
 
 from savu.data.meta_data import MetaData
+from savu.data.data_structures.data_add_ons import Padding
 
 
 class PluginData(object):
@@ -245,6 +246,46 @@ class PluginData(object):
             self._set_frame_chunk(gcd(frame_chunk, chunk))
         return self.meta_data.get_meta_data("nFrames")
 
+    def _reset_frame_chunk(self, nFrames):
+        """ Change the number of frames to process at a time after
+        :meth:`plugin_data_setup` has been called.
+
+        :param int nFrames: Number of frames to process at a time
+        """
+        chunks = \
+            self.data_obj.get_preview().get_starts_stops_steps(key='chunks')
+        if self._plugin and (chunks[self.get_slice_directions()[0]] % nFrames):
+            self._plugin.chunk = True
+        self._set_frame_chunk(nFrames)
+        self.__set_shape()
+
+    def _get_group_size(self, nFrames):
+        """ Get the number of elements in a group of frames, including any
+        padding.
+
+        :param int nFrames: Number of frames in the group
+        :returns: Number of elements
+        :rtype: int
+        """
+        pad_dirs = {}
+        if self.padding:
+            padding = self.padding
+            if not isinstance(padding, Padding):
+                padding = Padding(self.get_pattern())
+                for key in self.padding.keys():
+                    getattr(padding, key)(self.padding[key])
+            pad_dirs = padding._get_padding_directions()
+
+        shape = self.data_obj.get_shape()
+        slice_dir = self.get_slice_directions()[0]
+        size = 1
+        for dim in set(list(self.get_core_directions()) + [slice_dir]):
+            length = nFrames if dim == slice_dir else shape[dim]
+            if dim in pad_dirs:
+                length += pad_dirs[dim]['before'] + pad_dirs[dim]['after']
+            size *= length
+        return size
+
     def plugin_data_setup(self, pattern_name, chunk, fixed=False):
         """ Setup the PluginData object.
 
@@ -40,13 +40,17 @@ pattern_list = ["SINOGRAM",
                 "TIMESERIES"]
 
 
-def _deepcopy_data_object(dObj, new_obj):
+def _deepcopy_data_object(dObj, new_obj, share=False):
     """ Deepcopy data object, associating hdf5 objects that can not be copied.
+    The meta data is shared.  If ``share`` is True the data information is
+    copied without duplicating the values it holds (see
+    :meth:`MetaData._shared_copy`).
     """
     cu.add_base_classes(new_obj, dObj._get_transport_data())
     new_obj.meta_data = dObj.meta_data
-    new_obj.pattern_list = copy.deepcopy(dObj.pattern_list)
-    new_obj.data_info = copy.deepcopy(dObj.data_info)
+    new_obj.pattern_list = list(dObj.pattern_list)
+    new_obj.data_info = dObj.data_info._shared_copy() if share else \
+        copy.deepcopy(dObj.data_info)
     new_obj.exp = dObj.exp
     new_obj._plugin_data_obj = dObj._plugin_data_obj
     new_obj.dtype = copy.deepcopy(dObj.dtype)
@@ -23,7 +23,6 @@
 """
 import os
 import logging
-import copy
 import h5py
 from mpi4py import MPI
 
@@ -45,6 +44,7 @@ class Experiment(object):
         self.__meta_data_setup(options["process_file"])
         self.index = {"in_data": {}, "out_data": {}, "mapping": {}}
         self.nxs_file = None
+        self.loaded_data = None
 
     def get_meta_data(self, entry):
         """ Get the meta data dictionary. """
@@ -100,6 +100,33 @@ class Experiment(object):
         self.index["out_data"] = {}
         self.index["in_data"] = {}
 
+    def _save_loaded_data(self):
+        """ Keep the Data objects created by the loaders, and continue with
+        copies of them, so the loaders are only set up, and the input files
+        opened, once per run.
+        """
+        self.loaded_data = self.index['in_data']
+        self.index['in_data'] = {}
+        for key, data in self.loaded_data.iteritems():
+            # the meta data is copied too, as it is otherwise shared by
+            # copies of a Data object
+            self.index['in_data'][key] = data._shared_copy()
+            self.index['in_data'][key].meta_data = \
+                data.meta_data._shared_copy()
+
+    def _restore_loaded_data(self):
+        """ Replace the input Data objects with those created by the
+        loaders, which can only be done once.
+
+        :returns: False if the loaders have not been run
+        :rtype: bool
+        """
+        if self.loaded_data is None:
+            return False
+        self.index['in_data'] = self.loaded_data
+        self.loaded_data = None
+        return True
+
     def _merge_out_data_to_in(self):
         for key, data in self.index["out_data"].iteritems():
             if data.remove is False:
@@ -134,7 +161,7 @@ class Experiment(object):
         for key in self.index["out_data"]:
             output = self.index["out_data"][key]
             output._save_data(link_type)
-            self.index["in_data"][key] = copy.deepcopy(output)
+            self.index["in_data"][key] = output._shared_copy()
 
     def _set_all_datasets(self, name):
         data_names = []
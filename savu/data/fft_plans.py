@@ -0,0 +1,264 @@
+# Copyright 2016 Diamond Light Source Ltd.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+.. module:: fft_plans
+   :platform: Unix
+   :synopsis: FFT plans shared by the plugins in a process, with FFTW \
+       wisdom kept in the cache directory between runs and a per-node \
+       thread budget.
+
+.. moduleauthor:: Nicola Wadeson <scientificsoftware@diamond.ac.uk>
+
+"""
+
+import os
+import platform
+import logging
+import multiprocessing
+import cPickle as pickle
+import numpy as np
+from collections import OrderedDict
+from mpi4py import MPI
+
+import savu.data.loader_cache as lc
+import savu.data.shared_memory as shm
+
+# transforms smaller than this are not worth splitting between threads
+MIN_THREADED_SIZE = 1 << 16
+
+__plans = OrderedDict()
+__state = {'threads': 1}
+
+
+def _get_pyfftw():
+    """ Import pyfftw, if it is available. """
+    if 'pyfftw' not in __state:
+        try:
+            import pyfftw
+        except ImportError:
+            logging.warn("pyfftw is not available: using numpy.fft")
+            pyfftw = None
+        __state['pyfftw'] = pyfftw
+    return __state['pyfftw']
+
+
+def _get_wisdom_file(exp):
+    """ The FFTW wisdom file in the cache directory (see
+    :func:`savu.data.loader_cache.get_cache_dir`), or None if caching is
+    disabled. """
+    cache_dir = lc.get_cache_dir(exp)
+    if not cache_dir:
+        return None
+    return os.path.join(cache_dir, 'fftw_wisdom_%s.pkl' % platform.machine())
+
+
+def _get_thread_budget(exp):
+    """ The number of FFT threads available to each process: the node
+    budget, set by the ``fft_threads`` experiment meta data (tomo_recon
+    --fft_threads), the SAVU_FFT_THREADS environment variable or the number
+    of cores, divided between the processes on the node. """
+    try:
+        budget = exp.meta_data.get_meta_data('fft_threads')
+    except KeyError:
+        budget = None
+    budget = budget if budget else os.getenv('SAVU_FFT_THREADS')
+    budget = int(budget) if budget else multiprocessing.cpu_count()
+    n_procs = 1
+    if shm._using_mpi(exp):
+        comm = shm._get_node_comm(exp)
+        n_procs = comm.size if comm else MPI.COMM_WORLD.size
+    return max(budget//n_procs, 1)
+
+
+def setup(exp):
+    """ Set the thread budget and load the FFTW wisdom at the start of a
+    run.
+
+    This is a collective operation: every process must call it.
+    """
+    __state['threads'] = _get_thread_budget(exp)
+    pyfftw = _get_pyfftw()
+    fname = _get_wisdom_file(exp)
+    if pyfftw is None or not fname or not os.path.exists(fname):
+        return
+    try:
+        with open(fname, 'rb') as wfile:
+            pyfftw.import_wisdom(pickle.load(wfile))
+    except (IOError, EOFError, ValueError, pickle.UnpicklingError) as e:
+        logging.warn("Unable to load the FFTW wisdom %s: %s", fname, e)
+
+
+def save_wisdom(exp):
+    """ Merge the FFTW wisdom of every process and save it in the cache
+    directory at the end of a run.
+
+    This is a collective operation: every process must call it.
+    """
+    pyfftw = _get_pyfftw()
+    fname = _get_wisdom_file(exp)
+    if pyfftw is None or not fname:
+        return
+    wisdom = [pyfftw.export_wisdom()]
+    if shm._using_mpi(exp):
+        wisdom = MPI.COMM_WORLD.gather(wisdom[0], root=0)
+        if MPI.COMM_WORLD.rank != 0:
+            return
+    for w in wisdom:
+        pyfftw.import_wisdom(w)
+
+    tmp_path = '%s.%i' % (fname, os.getpid())
+    try:
+        if not os.path.exists(os.path.dirname(fname)):
+            os.makedirs(os.path.dirname(fname))
+        with open(tmp_path, 'wb') as wfile:
+            pickle.dump(pyfftw.export_wisdom(), wfile,
+                        pickle.HIGHEST_PROTOCOL)
+        os.rename(tmp_path, fname)
+    except (IOError, OSError) as e:
+        logging.warn("Unable to save the FFTW wisdom %s: %s", fname, e)
+
+
+def get_memory_limit():
+    """ Get the total size of the plan buffers kept in memory in bytes, set
+    by the SAVU_FFT_MEMORY environment variable (in MB, default 512). """
+    return float(os.getenv('SAVU_FFT_MEMORY', 512))*1e6
+
+
+def clear_plans():
+    """ Discard the plans at the end of a run. """
+    __plans.clear()
+
+
+def _get_nbytes(plan):
+    return plan.input_array.nbytes + plan.output_array.nbytes
+
+
+def get_threads():
+    """ The number of FFT threads available to this process. """
+    return __state['threads']
+
+
+def get_plan(shape, dtype, axes, direction='FFTW_FORWARD', threads=None,
+             effort='FFTW_MEASURE'):
+    """ Get an FFT plan, which is created the first time it is requested
+    and then shared by every plugin in the process.  The least recently used
+    plans are discarded when their buffers exceed the memory limit (see
+    :func:`get_memory_limit`), and all of them at the end of a run (see
+    :func:`clear_plans`).
+
+    Real data types give a real to complex forward transform, or a complex
+    to real inverse transform, over the last of ``axes`` (the half
+    spectrum).  Complex data types give a complex to complex transform.
+
+    The plan is a ``pyfftw.FFTW`` object (or an equivalent that uses
+    numpy.fft if pyfftw is unavailable) with aligned ``input_array`` and
+    ``output_array`` buffers.  Calling it copies the data into the input
+    buffer, executes the plan and returns the output buffer (the inverse
+    transform is normalised), while ``execute()`` transforms the input
+    buffer in place (without normalisation).  The buffers are shared, so the
+    results must be used or copied before the plan is executed again.
+
+    :param tuple shape: The shape of the data (real space).
+    :param dtype: The data type of the data (real space).
+    :param tuple axes: The axes to transform.
+    :keyword str direction: 'FFTW_FORWARD' or 'FFTW_BACKWARD'.
+    :keyword int threads: The number of threads, which defaults to the
+        thread budget of the process (see :func:`setup`).
+    :keyword str effort: The FFTW planner effort, e.g. 'FFTW_ESTIMATE' for a
+        transform that is only used a few times.
+    :returns: the plan
+    """
+    shape = tuple(int(s) for s in shape)
+    dtype = np.dtype(dtype)
+    axes = tuple(a % len(shape) for a in axes)
+    if not threads:
+        threads = get_threads()
+    if np.prod(shape) < MIN_THREADED_SIZE:
+        threads = 1
+    key = (shape, dtype.str, axes, direction, threads, effort)
+    plan = __plans.pop(key, None)
+    if plan is None:
+        plan = _create_plan(shape, dtype, axes, direction, threads, effort)
+    __plans[key] = plan
+    limit = get_memory_limit()
+    while len(__plans) > 1 and \
+            sum(_get_nbytes(p) for p in __plans.values()) > limit:
+        __plans.popitem(last=False)
+    return plan
+
+
+def _get_spectrum(shape, dtype, axes):
+    """ The shape and data type of the spectrum of some data. """
+    if dtype.kind == 'c':
+        return shape, dtype
+    shape = list(shape)
+    shape[axes[-1]] = shape[axes[-1]]//2 + 1
+    return tuple(shape), np.result_type(dtype, np.complex64)
+
+
+def _create_plan(shape, dtype, axes, direction, threads, effort):
+    spec_shape, spec_dtype = _get_spectrum(shape, dtype, axes)
+    forward = direction == 'FFTW_FORWARD'
+    in_shape, in_dtype = (shape, dtype) if forward else \
+        (spec_shape, spec_dtype)
+    out_shape, out_dtype = (spec_shape, spec_dtype) if forward else \
+        (shape, dtype)
+
+    pyfftw = _get_pyfftw()
+    if pyfftw is None:
+        return _NumpyPlan(np.empty(in_shape, in_dtype),
+                          np.empty(out_shape, out_dtype), axes, direction)
+    logging.debug("Creating an FFT plan for %s %s data, axes %s, %s",
+                  shape, dtype, axes, direction)
+    in_array = pyfftw.n_byte_align_empty(in_shape, 16, in_dtype)
+    out_array = pyfftw.n_byte_align_empty(out_shape, 16, out_dtype)
+    return pyfftw.FFTW(in_array, out_array, axes=axes, direction=direction,
+                       threads=threads, flags=(effort,))
+
+
+class _NumpyPlan(object):
+    """ A stand-in for a ``pyfftw.FFTW`` plan that uses numpy.fft. """
+
+    def __init__(self, input_array, output_array, axes, direction):
+        self.input_array = input_array
+        self.output_array = output_array
+        self.axes = axes
+        self.direction = direction
+        self.N = int(np.prod([output_array.shape[a] if direction ==
+                              'FFTW_BACKWARD' else input_array.shape[a] for
+                              a in axes]))
+
+    def __call__(self, input_array=None, normalise_idft=True):
+        if input_array is not None:
+            self.input_array[...] = input_array
+        self.execute()
+        if self.direction == 'FFTW_BACKWARD' and normalise_idft:
+            self.output_array /= self.N
+        return self.output_array
+
+    def execute(self):
+        axes = self.axes
+        real = self.output_array.dtype.kind != 'c' or \
+            self.input_array.dtype.kind != 'c'
+        if self.direction == 'FFTW_FORWARD':
+            result = np.fft.rfftn(self.input_array, axes=axes) if real else \
+                np.fft.fftn(self.input_array, axes=axes)
+        else:
+            shape = [self.output_array.shape[a] for a in axes]
+            result = np.fft.irfftn(self.input_array, shape, axes) if real \
+                else np.fft.ifftn(self.input_array, axes=axes)
+            # numpy normalises the inverse transform, FFTW does not
+            result *= self.N
+        self.output_array[...] = result
@@ -0,0 +1,124 @@
+# Copyright 2016 Diamond Light Source Ltd.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+.. module:: loader_cache
+   :platform: Unix
+   :synopsis: A persistent cache of arrays derived from input files (e.g. \
+       averaged dark and flat fields), so they are not recalculated when the \
+       same data is processed again.
+
+.. moduleauthor:: Nicola Wadeson <scientificsoftware@diamond.ac.uk>
+
+"""
+
+import os
+import hashlib
+import logging
+import numpy as np
+from collections import OrderedDict
+
+__memory = OrderedDict()
+
+
+def get_cache_dir(exp):
+    """ Get the cache directory, set by the ``cache_dir`` experiment meta
+    data (tomo_recon --cache) or the SAVU_CACHE_DIR environment variable.
+
+    :returns: the directory, or None if caching is disabled
+    :rtype: str
+    """
+    try:
+        cache_dir = exp.meta_data.get_meta_data('cache_dir')
+    except KeyError:
+        cache_dir = None
+    return cache_dir if cache_dir else os.getenv('SAVU_CACHE_DIR')
+
+
+def get_memory_limit():
+    """ Get the size of the in-memory cache in bytes, set by the
+    SAVU_CACHE_MEMORY environment variable (in MB, default 1024). """
+    return float(os.getenv('SAVU_CACHE_MEMORY', 1024))*1e6
+
+
+def _remember(key, value):
+    """ Keep a value in memory, discarding the least recently used values
+    if the total size of the arrays held exceeds the limit. """
+    __memory.pop(key, None)
+    limit = get_memory_limit()
+    if getattr(value, 'nbytes', 0) > limit:
+        return
+    __memory[key] = value
+    while sum(getattr(v, 'nbytes', 0) for v in __memory.values()) > limit:
+        __memory.popitem(last=False)
+
+
+def _get_key(fname, name, params):
+    """ A key identifying a value derived from a file, which changes if the
+    file is modified. """
+    if fname is None:
+        return hashlib.sha1(repr((name, params))).hexdigest()
+    fstat = os.stat(fname)
+    key = repr((os.path.abspath(fname), fstat.st_mtime, fstat.st_size, name,
+                params))
+    return hashlib.sha1(key).hexdigest()
+
+
+def load_or_compute(exp, fname, name, func, params=None):
+    """ Load an array derived from a file from the cache, or calculate and
+    cache it.  The most recently used arrays are also kept in memory, up to
+    :func:`get_memory_limit`, for processes that run several process lists
+    (see :mod:`savu.savu_daemon`).
+
+    :param Experiment exp: The current experiment.
+    :param str fname: The file the array is derived from, or None if the
+        array only depends on ``params``.
+    :param str name: A name for the array, e.g. 'dark'.
+    :param func: A function that calculates the array.
+    :keyword params: Any other values the array depends on, e.g. loader
+        parameters (must have a repeatable repr).
+    :returns: the array
+    """
+    cache_dir = get_cache_dir(exp)
+    if not cache_dir:
+        return func()
+
+    key = _get_key(fname, name, params)
+    if key in __memory:
+        value = __memory[key]
+        _remember(key, value)
+        return value
+
+    path = os.path.join(cache_dir, key + '.npy')
+    if os.path.exists(path):
+        try:
+            value = np.load(path)
+            logging.info("Loaded %s from the cache", name)
+            _remember(key, value)
+            return value
+        except (IOError, ValueError) as e:
+            logging.warn("Unable to load %s from the cache: %s", path, e)
+
+    value = func()
+    _remember(key, value)
+    if isinstance(value, np.ndarray) and value.dtype != object:
+        tmp_path = '%s.%i.npy' % (path[:-4], os.getpid())
+        try:
+            if not os.path.exists(cache_dir):
+                os.makedirs(cache_dir)
+            np.save(tmp_path, value)
+            os.rename(tmp_path, path)
+        except (IOError, OSError) as e:
+            logging.warn("Unable to cache %s in %s: %s", name, cache_dir, e)
+    return value
@@ -23,7 +23,9 @@
 
 """
 
+import copy
 import logging
+import numpy as np
 
 
 class MetaData(object):
@@ -111,3 +113,41 @@ class MetaData(object):
     def _set_dictionary(self, ddict):
         """ Set the meta data dictionary """
         self.dict = ddict
+
+    def _copy_dictionary(self):
+        """ Copy the structure of the meta data dictionary.
+
+        Nested dictionaries and lists are copied but the values they hold,
+        e.g. numpy arrays, are shared with the original.  The copy holds
+        read-only views of numpy arrays, so a value can only be changed in
+        the copy by replacing it (using :meth:`set_meta_data`).  The
+        original is unchanged.
+
+        :returns: A dictionary.
+        :rtype: dict
+        """
+        return _copy_structure(self.dict)
+
+    def _shared_copy(self):
+        """ Copy the meta data, sharing the values it holds (see
+        :meth:`_copy_dictionary`).  Use this where the original is handed
+        over rather than changed further.
+        """
+        return MetaData(self._copy_dictionary())
+
+
+def _copy_structure(value):
+    """ Copy nested dictionaries and lists, but not the values they hold.
+    Numpy arrays are replaced by read-only views.
+    """
+    if isinstance(value, dict):
+        new = copy.copy(value)
+        for key in new.keys():
+            new[key] = _copy_structure(new[key])
+        return new
+    if isinstance(value, list):
+        return [_copy_structure(v) for v in value]
+    if isinstance(value, np.ndarray):
+        value = value.view()
+        value.setflags(write=False)
+    return value
@@ -0,0 +1,261 @@
+# Copyright 2016 Diamond Light Source Ltd.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+.. module:: output_cache
+   :platform: Unix
+   :synopsis: An opt-in cache of plugin output files, so a run can start \
+       from the last plugin whose output was produced by an earlier run.
+
+.. moduleauthor:: Nicola Wadeson <scientificsoftware@diamond.ac.uk>
+
+"""
+
+import os
+import json
+import h5py
+import shutil
+import hashlib
+import logging
+import cPickle as pickle
+
+import savu.core.utils as cu
+import savu.plugins.utils as pu
+import savu.data.shared_memory as shm
+from savu.plugins import plugin_catalogue as pc
+
+MANIFEST = 'manifest.json'
+META_DATA = 'meta_data.pkl'
+
+
+def get_savu_version():
+    try:
+        import pkg_resources
+        return pkg_resources.get_distribution('savu').version
+    except Exception:
+        return None
+
+
+def prune(cache_dir, max_size):
+    """ Remove the least recently used entries from a cache directory until
+    the files it holds take up no more than ``max_size`` bytes.
+
+    :param str cache_dir: the cache directory
+    :param float max_size: the maximum size in bytes
+    """
+    if not cache_dir or not os.path.exists(cache_dir):
+        return
+    entries = []
+    for name in os.listdir(cache_dir):
+        entry_dir = os.path.join(cache_dir, name)
+        if not os.path.exists(os.path.join(entry_dir, MANIFEST)):
+            continue
+        size = sum(os.path.getsize(os.path.join(entry_dir, f)) for f in
+                   os.listdir(entry_dir))
+        entries.append((os.path.getmtime(entry_dir), size, entry_dir))
+    total = sum(e[1] for e in entries)
+    for mtime, size, entry_dir in sorted(entries):
+        if total <= max_size:
+            break
+        shutil.rmtree(entry_dir, ignore_errors=True)
+        total -= size
+
+
+class OutputCache(object):
+    """
+    The OutputCache class stores the output files of each plugin in a cache
+    directory, keyed by a hash of the input file, the preceding plugin list
+    entries (ids and parameters, including the loader preview), the plugin
+    source files and the Savu version.  A later run of the same input and
+    plugin list prefix links the cached files into its output folder instead
+    of running those plugins again.
+    """
+
+    def __init__(self, exp):
+        self.exp = exp
+        self.cache_dir = self.__get_cache_dir()
+        self.entries = []
+        self.keys = None
+
+    def __get_cache_dir(self):
+        """ The cache directory, set by the ``output_cache`` experiment meta
+        data (tomo_recon --output_cache) or the SAVU_OUTPUT_CACHE environment
+        variable.  The cache is only used for full runs. """
+        expInfo = self.exp.meta_data.get_dictionary()
+        if expInfo.get('run_mode', 'full') != 'full':
+            return None
+        cache_dir = expInfo.get('output_cache', None)
+        return cache_dir if cache_dir else os.getenv('SAVU_OUTPUT_CACHE')
+
+    def _get_key(self, pos):
+        """ Get the cache key of the output of a plugin.
+
+        :param int pos: position of the plugin in the plugin list
+        """
+        if self.keys is None:
+            self.keys = self.__get_keys()
+        return self.keys[pos]
+
+    def __get_keys(self):
+        """ Get the cache keys of all plugin list prefixes, hashing the
+        plugin list entries one at a time. """
+        plugin_obj = self.exp.meta_data.plugin_list
+        fname = self.exp.meta_data.get_meta_data('data_file')
+        fstat = os.stat(fname)
+        sha = hashlib.sha1(repr((get_savu_version(), os.path.abspath(fname),
+                                 fstat.st_mtime, fstat.st_size)))
+        keys = []
+        for plugin_dict in plugin_obj.plugin_list:
+            source = pc._get_module_file(pu.load_class(
+                os.path.split(plugin_dict['id'])[1]))
+            sha.update(repr((plugin_dict['id'],
+                             sorted(plugin_dict['data'].items()),
+                             source, pc._get_mtime(source))))
+            keys.append(sha.hexdigest())
+        return keys
+
+    def __get_entry_dir(self, pos):
+        return os.path.join(self.cache_dir, self._get_key(pos))
+
+    def _restore(self, start):
+        """ Set up the plugins, from position ``start``, whose output is
+        cached, using the cached files as their output datasets.
+
+        :returns: the position of the first plugin that needs to be run
+        :rtype: int
+        """
+        if not self.cache_dir:
+            return start
+        plugin_list = self.exp.meta_data.plugin_list.plugin_list
+        n_plugins = len(plugin_list) - 1
+
+        def get_stop():
+            stop = start
+            while stop < n_plugins and os.path.exists(os.path.join(
+                    self.__get_entry_dir(stop), MANIFEST)):
+                stop += 1
+            return stop
+
+        stop = shm.compute_once(self.exp, get_stop)
+        for pos in range(start, stop):
+            self.__restore_plugin(pos)
+        return stop
+
+    def __restore_plugin(self, pos):
+        exp = self.exp
+        expInfo = exp.meta_data
+        plugin_list = expInfo.plugin_list.plugin_list
+        entry_dir = self.__get_entry_dir(pos)
+        with open(os.path.join(entry_dir, MANIFEST), 'r') as mfile:
+            manifest = json.load(mfile)
+        with open(os.path.join(entry_dir, META_DATA), 'rb') as mfile:
+            meta_data = pickle.load(mfile)
+        if expInfo.get_meta_data('process') == 0:
+            # mark the entry as recently used (see :func:`prune`)
+            os.utime(entry_dir, None)
+
+        plugin = pu.plugin_loader(exp, plugin_list[pos])
+        cu.user_message("*Using the cached output of the %s plugin*" %
+                        plugin_list[pos]['id'])
+        final = pos == len(plugin_list) - 2
+        link_type = "final_result" if final else "intermediate"
+        out_path = expInfo.get_meta_data('out_path' if final else
+                                         'inter_path')
+
+        out_data = exp.index['out_data']
+        for key in out_data.keys():
+            if out_data[key].remove:
+                del out_data[key]
+                continue
+            fname = os.path.join(out_path, str(manifest[key]['file']))
+            if expInfo.get_meta_data('process') == 0:
+                self.__link(os.path.join(entry_dir, manifest[key]['file']),
+                            fname)
+            exp._barrier()
+
+            data = out_data[key]
+            group_name = str(manifest[key]['group'])
+            data.backing_file = h5py.File(fname, 'r')
+            data.group_name = group_name
+            data.data_info.set_meta_data('group_name', group_name)
+            data.group = data.backing_file[group_name]
+            data.data = data.group['data']
+            data._add_nxs_link(link_type)
+            if key in exp.index['in_data']:
+                exp.index['in_data'][key]._close_file()
+
+        for data in plugin.get_in_datasets() + plugin.get_out_datasets():
+            data._clear_plugin_data()
+        exp._merge_out_data_to_in()
+        for key in manifest.keys():
+            exp.index['in_data'][str(key)].meta_data.get_dictionary().update(
+                meta_data[key])
+
+    def _add(self, pos, out_datasets):
+        """ Record the output datasets of a plugin, to be cached when the
+        run is complete (see :meth:`_save`).
+
+        :param int pos: position of the plugin in the plugin list
+        :param list(Data) out_datasets: the plugin output datasets
+        """
+        if not self.cache_dir:
+            return
+        files = {}
+        meta_data = {}
+        for data in out_datasets:
+            if data.remove or data.backing_file is None:
+                continue
+            key = data.get_name()
+            files[key] = {'path': data.backing_file.filename,
+                          'file': os.path.basename(data.backing_file.filename),
+                          'group': data.group_name}
+            meta_data[key] = data.meta_data._copy_dictionary()
+        self.entries.append((self.__get_entry_dir(pos), files, meta_data))
+
+    def _save(self):
+        """ Copy the recorded output files, which must be closed, into the
+        cache. """
+        if not self.cache_dir or \
+                self.exp.meta_data.get_meta_data('process') != 0:
+            return
+        for entry_dir, files, meta_data in self.entries:
+            if os.path.exists(entry_dir):
+                continue
+            tmp_dir = '%s.%i' % (entry_dir, os.getpid())
+            try:
+                os.makedirs(tmp_dir)
+                for info in files.values():
+                    self.__link(info['path'],
+                                os.path.join(tmp_dir, info['file']))
+                with open(os.path.join(tmp_dir, META_DATA), 'wb') as mfile:
+                    pickle.dump(meta_data, mfile, pickle.HIGHEST_PROTOCOL)
+                with open(os.path.join(tmp_dir, MANIFEST), 'w') as mfile:
+                    json.dump(dict((k, {'file': v['file'], 'group':
+                                        v['group']}) for k, v in
+                                   files.iteritems()), mfile)
+                os.rename(tmp_dir, entry_dir)
+            except (IOError, OSError, pickle.PicklingError, TypeError) as e:
+                logging.warn("Unable to cache the plugin output in %s: %s",
+                             entry_dir, e)
+                shutil.rmtree(tmp_dir, ignore_errors=True)
+        self.entries = []
+
+    def __link(self, src, dst):
+        """ Hard link a file, or copy it if a link is not possible. """
+        if os.path.exists(dst):
+            os.remove(dst)
+        try:
+            os.link(src, dst)
+        except OSError:
+            shutil.copy2(src, dst)
@@ -48,12 +48,14 @@ class PluginList(object):
         self.n_plugins = None
         self.n_loaders = 0
         self.datasets_list = []
+        self.plugin_instances = []
         self.exp = None
 
     def _populate_plugin_list(self, filename, activePass=False):
         plugin_file = h5py.File(filename, 'r')
         plugin_group = plugin_file['entry/plugin']
         self.plugin_list = []
+        self.plugin_instances = []
         for key in plugin_group.keys():
             plugin = {}
             try:
@@ -204,7 +206,8 @@ class PluginList(object):
 
     def _set_datasets_list(self, plugin):
         in_pData, out_pData = plugin.get_plugin_datasets()
-        max_frames = plugin.get_max_frames()
+        max_frames = plugin.auto_frames if plugin.auto_frames else \
+            plugin.get_max_frames()
         in_data_list = self._populate_datasets_list(in_pData, max_frames)
         out_data_list = self._populate_datasets_list(out_pData, max_frames)
         self.datasets_list.append({'in_datasets': in_data_list,
@@ -219,6 +222,20 @@ class PluginList(object):
             data_list.append({'name': name, 'pattern': pattern})
         return data_list
 
+    def _get_plugin_instance(self, plugin_dict):
+        """ Get the plugin instance previously created for an entry in the
+        plugin list, so it is only imported and created once per run.
+
+        :returns: the plugin instance or None
+        """
+        for pdict, plugin in self.plugin_instances:
+            if pdict is plugin_dict:
+                return plugin
+        return None
+
+    def _set_plugin_instance(self, plugin_dict, plugin):
+        self.plugin_instances.append((plugin_dict, plugin))
+
     def _get_datasets_list(self):
         return self.datasets_list
 
@@ -0,0 +1,233 @@
+# Copyright 2016 Diamond Light Source Ltd.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+.. module:: shared_memory
+   :platform: Unix
+   :synopsis: Compute values needed by every process once and share \
+       large, read-only arrays (e.g. dark and flat fields) between the \
+       processes on a node using MPI-3 shared memory windows.
+
+.. moduleauthor:: Nicola Wadeson <scientificsoftware@diamond.ac.uk>
+
+"""
+
+import logging
+import traceback
+import numpy as np
+from mpi4py import MPI
+
+__comms = {}
+__shared = {}
+__windows = []
+
+
+def _using_mpi(exp):
+    try:
+        return bool(exp.meta_data.get_meta_data('mpi'))
+    except KeyError:
+        return False
+
+
+def _get_node_comm(exp):
+    """ Get a communicator for the processes on this node.
+
+    :returns: the node communicator, or None if the run is not using MPI or
+        the MPI library does not support shared memory windows.
+    """
+    if not _using_mpi(exp):
+        return None
+
+    if 'node' not in __comms:
+        comm = None
+        if hasattr(MPI, 'COMM_TYPE_SHARED') and \
+                hasattr(MPI.Win, 'Allocate_shared'):
+            try:
+                comm = MPI.COMM_WORLD.Split_type(MPI.COMM_TYPE_SHARED)
+            except (NotImplementedError, MPI.Exception) as e:
+                logging.warn("Shared memory is not available: %s", e)
+        __comms['node'] = comm
+    return __comms['node']
+
+
+def _get_leader_comm(node_comm):
+    """ Get a communicator for the first process on each node.
+
+    :returns: the communicator, or None on the other processes
+    """
+    if 'leaders' not in __comms:
+        colour = 0 if node_comm.rank == 0 else MPI.UNDEFINED
+        comm = MPI.COMM_WORLD.Split(colour, MPI.COMM_WORLD.rank)
+        __comms['leaders'] = None if comm == MPI.COMM_NULL else comm
+    return __comms['leaders']
+
+
+class _Error(object):
+    """ Marks a value that could not be evaluated on the first process, so
+    the error can be broadcast and raised on every process. """
+
+    def __init__(self, error=None, message=None):
+        self.error = error
+        self.message = message if message else \
+            '%s: %s' % (type(error).__name__, error)
+
+    def raise_error(self):
+        if self.error is not None:
+            raise self.error
+        raise Exception("The value could not be evaluated on the first "
+                        "process: %s" % self.message)
+
+
+def _evaluate(value):
+    return value() if callable(value) else value
+
+
+def _evaluate_first(comm, value):
+    """ Evaluate a value on the first process in a communicator only.
+
+    :returns: the value, an :class:`_Error` if the evaluation failed, or
+        None on the other processes
+    """
+    if comm.rank != 0:
+        return None
+    try:
+        return _evaluate(value)
+    except Exception as e:
+        logging.error(traceback.format_exc())
+        return _Error(e)
+
+
+def _get_info(value):
+    """ Describe a value to be broadcast. """
+    if isinstance(value, _Error):
+        return ('error', value.message)
+    if isinstance(value, np.ndarray):
+        return ('array', value.shape, value.dtype.str)
+    return ('object', value)
+
+
+def _check(info, value):
+    """ Raise the error described by a broadcast ``info``, if any, on every
+    process. """
+    if info[0] == 'error':
+        if not isinstance(value, _Error):
+            value = _Error(message=info[1])
+        value.raise_error()
+
+
+def _bcast(comm, value):
+    """ Broadcast a value from the first process in a communicator, sending
+    numpy arrays as buffers rather than pickling them.  An :class:`_Error`
+    is broadcast as it is, so the caller can raise it on every process. """
+    info = _get_info(value) if comm.rank == 0 else None
+    info = comm.bcast(info, root=0)
+    if info[0] == 'error':
+        return value if comm.rank == 0 else _Error(message=info[1])
+    if info[0] == 'object':
+        return info[1]
+    array = np.ascontiguousarray(value) if comm.rank == 0 else \
+        np.empty(info[1], dtype=np.dtype(info[2]))
+    comm.Bcast(array, root=0)
+    return array
+
+
+def compute_once(exp, value):
+    """ Evaluate a value on the first process only and broadcast the result
+    to all processes, e.g. to read and average data that every process
+    needs.
+
+    This is a collective operation: every process must call it, in the same
+    order.  If the evaluation raises an exception, it is raised on every
+    process.
+
+    :param Experiment exp: The current experiment.
+    :param value: A function that returns the value.
+    :returns: the value
+    """
+    if not _using_mpi(exp):
+        return _evaluate(value)
+    comm = MPI.COMM_WORLD
+    result = _bcast(comm, _evaluate_first(comm, value))
+    _check(_get_info(result), result)
+    return result
+
+
+def share_array(exp, value, key=None):
+    """ Place an array in memory that is shared, read-only, by all the
+    processes on a node.
+
+    This is a collective operation: every process must call it, in the same
+    order.  Only the first process evaluates ``value``, so it can be a
+    function that reads or calculates the array, and the result (or any
+    exception it raises) is broadcast to the other nodes.  If shared memory is unavailable, the
+    result is broadcast to every process (see :func:`compute_once`).  The
+    array is read-only in either case, and is only valid until
+    :func:`free_shared` is called at the end of the run.
+
+    :param Experiment exp: The current experiment.
+    :param value: A numpy array, or a function that returns one. Values
+        that are not numpy arrays are broadcast to every process instead.
+    :keyword key: A (hashable) key, identical on every process, that
+        identifies the array.  An array that has already been shared with
+        the same key is returned without evaluating ``value`` again.
+    :returns: the shared array (or value)
+    """
+    comm = _get_node_comm(exp)
+    if comm is None:
+        array = compute_once(exp, value)
+        if isinstance(array, np.ndarray):
+            array.setflags(write=False)
+        return array
+    if key is not None and key in __shared:
+        return __shared[key]
+
+    array = None
+    info = None
+    if comm.rank == 0:
+        leaders = _get_leader_comm(comm)
+        array = _bcast(leaders, _evaluate_first(leaders, value))
+        info = _get_info(array)
+    else:
+        _get_leader_comm(comm)
+    info = comm.bcast(info, root=0)
+    _check(info, array)
+    if info[0] == 'object':
+        return info[1]
+
+    shape, dtype = info[1], np.dtype(info[2])
+    nbytes = int(np.prod(shape))*dtype.itemsize if comm.rank == 0 else 0
+    win = MPI.Win.Allocate_shared(nbytes, dtype.itemsize, comm=comm)
+    buf, itemsize = win.Shared_query(0)
+    shared = np.ndarray(buffer=buf, dtype=dtype, shape=shape)
+    if comm.rank == 0:
+        shared[...] = array
+    comm.Barrier()
+    shared.setflags(write=False)
+
+    __windows.append(win)
+    if key is not None:
+        __shared[key] = shared
+    return shared
+
+
+def free_shared():
+    """ Free the shared memory windows created by :func:`share_array`, in
+    the order they were created.
+
+    This is a collective operation, called at the end of a run.  The shared
+    arrays must not be used afterwards.
+    """
+    while __windows:
+        __windows.pop(0).Free()
+    __shared.clear()
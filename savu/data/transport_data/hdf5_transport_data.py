@@ -95,13 +95,17 @@ class Hdf5TransportData(object):
             expInfo.set_meta_data(["group_name", key], group_name)
 
     def __add_data_links(self, linkType):
+        group_name = self.data_info.get_meta_data('group_name')
+        self.__output_metadata(self.backing_file[group_name])
+        self._add_nxs_link(linkType)
+
+    def _add_nxs_link(self, linkType):
+        """ Link the data into the experiment nxs file. """
         nxs_filename = self.exp.meta_data.get_meta_data('nxs_filename')
         logging.info("Adding link to file %s", nxs_filename)
 
         nxs_file = self.exp.nxs_file
         entry = nxs_file['entry']
-        group_name = self.data_info.get_meta_data('group_name')
-        self.__output_metadata(self.backing_file[group_name])
         filename = self.backing_file.filename.split('/')[-1]
 
         if linkType is 'final_result':
@@ -36,6 +36,9 @@ class DarkFlatFieldCorrection(BaseCorrection, CpuPlugin):
     A Plugin to apply a simple dark and flat field correction to data.
     :param pattern: Data processing pattern is 'SINOGRAM' or \
         'PROJECTION'. Default: 'SINOGRAM'.
+    :param log: Take the log of the corrected data, as the log parameter of \
+        the reconstruction plugins does (which should then be \
+        False). Default: False.
     """
 
     def __init__(self):
@@ -50,42 +53,49 @@ class DarkFlatFieldCorrection(BaseCorrection, CpuPlugin):
 
     def pre_process(self):
         inData = self.get_in_datasets()[0]
-        self.dark = inData.meta_data.get_meta_data('dark')
-        self.flat = inData.meta_data.get_meta_data('flat')
+        self.dark = inData.meta_data.get_meta_data('dark').astype(np.float32)
+        self.flat = inData.meta_data.get_meta_data('flat').astype(np.float32)
         self.flat_minus_dark = self.flat - self.dark
-        det_dims = [inData.find_axis_label_dimension('detector_y'),
-                    inData.find_axis_label_dimension('detector_x')]
-
-        data_shape = self.get_plugin_in_datasets()[0].get_shape()
-        tile = [1]*len(data_shape)
-        if self.parameters['pattern'] == 'PROJECTION':
-            tile[0] = data_shape[0]
-        self.convert_size = \
-            lambda x, sl: np.tile(x[[sl[d] for d in det_dims]], tile)
+        self.det_dims = [inData.find_axis_label_dimension('detector_y'),
+                         inData.find_axis_label_dimension('detector_x')]
+        # 1/0 is set to 0, so dead pixels are set to the low crop level
+        self.recip = np.zeros(self.flat_minus_dark.shape, dtype=np.float32)
+        np.divide(1.0, self.flat_minus_dark, out=self.recip,
+                  where=self.flat_minus_dark != 0)
+
+    def __get_roi(self, sl):
+        """ Get the dark and the reciprocal of flat - dark for the detector
+        region of a slice list, which broadcast against the data. """
+        sl = tuple(sl[d] for d in self.det_dims)
+        return self.dark[sl], self.recip[sl]
 
     def correct(self, data):
-        dark = self.convert_size(self.dark, self.slice_list)
-        flat_minus_dark = \
-            self.convert_size(self.flat_minus_dark, self.slice_list)
-        data = np.nan_to_num((data-dark)/flat_minus_dark)
+        dark, recip = self.__get_roi(self.slice_list)
+        float_data = data.dtype.kind == 'f'
+        data = np.subtract(data, dark, dtype=np.float32)
+        data *= recip
+        if float_data:
+            data[np.isnan(data)] = 0
         self.__data_check(data)
+        if self.parameters['log']:
+            data += 1
+            np.log(data, out=data)
+            np.negative(data, out=data)
         return data
 
     def __data_check(self, data):
-        # make high and low crop masks
-        low_crop = data < self.LOW_CROP_LEVEL
-        high_crop = data > self.HIGH_CROP_LEVEL
-
-        # flag if those masks include a large proportion of pixels, as this
-        # may indicate a failure
-        if ((float(low_crop.sum()) / low_crop.size) > self.WARN_PROPORTION):
+        # flag if a large proportion of pixels are cropped, as this may
+        # indicate a failure
+        max_cropped = self.WARN_PROPORTION*data.size
+        if not self.flag_low_warning and \
+                np.count_nonzero(data < self.LOW_CROP_LEVEL) > max_cropped:
             self.flag_low_warning = True
-        if ((float(high_crop.sum()) / high_crop.size) > self.WARN_PROPORTION):
+        if not self.flag_high_warning and \
+                np.count_nonzero(data > self.HIGH_CROP_LEVEL) > max_cropped:
             self.flag_high_warning = True
 
         # Set all cropped values to the crop level
-        data[low_crop] = self.LOW_CROP_LEVEL
-        data[high_crop] = self.HIGH_CROP_LEVEL
+        np.clip(data, self.LOW_CROP_LEVEL, self.HIGH_CROP_LEVEL, out=data)
 
     def executive_summary(self):
         summary = []
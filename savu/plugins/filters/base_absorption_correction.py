@@ -25,7 +25,9 @@ import numpy as np
 from savu.plugins.base_filter import BaseFilter
 from savu.plugins.driver.cpu_plugin import CpuPlugin
 from scipy.interpolate import interp1d
-import _xraylib as xl
+from savu.plugins.utils import lazy_import
+
+xl = lazy_import('_xraylib')
 
 
 class BaseAbsorptionCorrection(BaseFilter, CpuPlugin):
@@ -25,12 +25,14 @@ import logging
 
 import math
 
-import pyFAI
-
 import numpy as np
+import savu.data.shared_memory as shm
 from savu.plugins.base_filter import BaseFilter
 from savu.plugins.driver.cpu_plugin import CpuPlugin
 from scipy.interpolate import interp1d
+from savu.plugins.utils import lazy_import
+
+pyFAI = lazy_import('pyFAI')
 
 
 class BaseAzimuthalIntegrator(BaseFilter, CpuPlugin):
@@ -81,7 +83,9 @@ class BaseAzimuthalIntegrator(BaseFilter, CpuPlugin):
         if (self.parameters["use_mask"]):
             mask = mData.get_meta_data("mask")
         else:
-            mask = np.zeros((sh[-2], sh[-1]))
+            mask = shm.share_array(
+                self.exp, lambda: np.zeros((sh[-2], sh[-1])),
+                key=('zero_mask', sh[-2], sh[-1]))
         # now integrate in radius (1D)print "hello"
         self.npts = self.get_parameters('num_bins')
         self.params = [mask, self.npts, mData, ai]
@@ -23,8 +23,10 @@
 import logging
 from savu.plugins.base_filter import BaseFilter
 import numpy as np
-import peakutils as pe
 from savu.plugins.driver.cpu_plugin import CpuPlugin
+from savu.plugins.utils import lazy_import
+
+pe = lazy_import('peakutils')
 
 
 class BaseFitter(BaseFilter, CpuPlugin):
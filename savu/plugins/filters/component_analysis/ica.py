@@ -21,11 +21,12 @@
 
 """
 import logging
-from savu.plugins.utils import register_plugin
+from savu.plugins.utils import register_plugin, lazy_import
 from savu.plugins.filters.base_component_analysis import BaseComponentAnalysis
-from sklearn.decomposition import FastICA
 import numpy as np
 
+FastICA = lazy_import('sklearn.decomposition', 'FastICA')
+
 
 @register_plugin
 class Ica(BaseComponentAnalysis):
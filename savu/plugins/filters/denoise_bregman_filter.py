@@ -23,12 +23,13 @@
 import logging
 import numpy as np
 
-from skimage.restoration import denoise_tv_bregman
-
 from savu.plugins.base_filter import BaseFilter
 from savu.plugins.driver.cpu_plugin import CpuPlugin
 
-from savu.plugins.utils import register_plugin
+from savu.plugins.utils import register_plugin, lazy_import
+
+denoise_tv_bregman = lazy_import('skimage.restoration',
+                                 'denoise_tv_bregman')
 
 
 @register_plugin
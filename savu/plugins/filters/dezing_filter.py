@@ -26,6 +26,13 @@
 import numpy as np
 import dezing
 
+if not hasattr(dezing, 'Dezing'):
+    raise ImportError("The dezing extension %s is out of date (it has no "
+                      "Dezing class): rebuild the dezing extension in "
+                      "cython/dezing" % dezing.__file__)
+
+import savu.data.loader_cache as lc
+import savu.data.shared_memory as shm
 from savu.plugins.base_filter import BaseFilter
 from savu.plugins.driver.cpu_plugin import CpuPlugin
 from savu.plugins.utils import register_plugin
@@ -39,44 +46,62 @@ class DezingFilter(BaseFilter, CpuPlugin):
     :param outlier_mu: Threshold for detecting outliers, greater is less \
     sensitive. Default: 10.0.
     :param kernel_size: Number of frames included in average. Default: 5.
+    :param number_of_threads: Number of threads used to dezing each group \
+    of frames, 0 uses all the available processors. Default: 0.
     """
 
     def __init__(self):
         super(DezingFilter, self).__init__("DezingFilter")
         self.warnflag = 0
         self.errflag = 0
+        self.dezing = None
 
     def pre_process(self):
-        # Apply dezing to dark and flat images (data with image key only)
+        # Apply dezing to dark and flat images (data with image key only),
+        # on one process only
         inData = self.get_in_datasets()[0]
-        dark = inData.data.dark()
-        flat = inData.data.flat()
-        (retval, self.warnflag, self.errflag) = dezing.setup_size(
-            dark.shape, self.parameters['outlier_mu'], self.pad)
-        pad_list = ((self.pad, self.pad), (0, 0), (0, 0))
-        dark = self._dezing(np.pad(dark, pad_list, mode='edge'))
-        flat = self._dezing(np.pad(flat, pad_list, mode='edge'))
-        inData.meta_data.set_meta_data(
-            'dark', dark[self.pad:-self.pad].mean(0))
-        inData.meta_data.set_meta_data(
-            'flat', flat[self.pad:-self.pad].mean(0))
-        (retval, self.warnflag, self.errflag) = dezing.cleanup()
+        fname = self.exp.meta_data.get_meta_data('data_file')
+        params = (inData.data.data.name, self.parameters['outlier_mu'],
+                  self.pad)
+        for name, frames in [('dark', inData.data.dark),
+                             ('flat', inData.data.flat)]:
+            func = lambda frames=frames: self.__dezing_mean(frames())
+            inData.meta_data.set_meta_data(name, shm.share_array(
+                self.exp, lambda name=name, func=func: lc.load_or_compute(
+                    self.exp, fname, 'dezinged_' + name, func, params)))
 
         # setup dezing for data
-        (retval, self.warnflag, self.errflag) = \
-            dezing.setup_size(self.data_size, self.parameters['outlier_mu'],
-                              self.pad)
+        self.dezing = self.__get_dezing(self.data_size)
 
-    def _dezing(self, data):
+    def __get_dezing(self, shape):
+        return dezing.Dezing(shape, self.parameters['outlier_mu'], self.pad,
+                             nthreads=self.parameters['number_of_threads'])
+
+    def __dezing_mean(self, frames):
+        """ Dezing a stack of dark or flat frames and average them. """
+        pad_list = ((self.pad, self.pad), (0, 0), (0, 0))
+        frames = self._dezing(np.pad(frames, pad_list, mode='edge'),
+                              self.__get_dezing(frames.shape))
+        return frames[self.pad:-self.pad].mean(0)
+
+    def _dezing(self, data, context=None):
+        """ Dezing uint16 or float32 data in place of a copy, and any other
+        type as float32. """
+        if data.dtype not in (np.uint16, np.float32):
+            data = data.astype(np.float32)
+        data = np.ascontiguousarray(data)
         result = np.empty_like(data)
-        (retval, self.warnflag, self.errflag) = dezing.run(data, result)
+        context = context if context else self.dezing
+        (retval, warnflag, errflag) = context.run(data, result)
+        self.warnflag |= warnflag
+        self.errflag |= errflag
         return result
 
     def filter_frames(self, data):
         return self._dezing(data[0])
 
     def post_process(self):
-        (retval, self.warnflag, self.errflag) = dezing.cleanup()
+        self.dezing = None
 
     def get_max_frames(self):
         """
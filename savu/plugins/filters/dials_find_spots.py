@@ -25,12 +25,13 @@ import logging
 import numpy as np
 from savu.plugins.base_filter import BaseFilter
 from savu.plugins.driver.cpu_plugin import CpuPlugin
-from savu.plugins.utils import register_plugin
+from savu.plugins.utils import register_plugin, lazy_import
 from scipy.ndimage import gaussian_filter
 import os
 
-from dials.array_family import flex
-from dials.algorithms.image.threshold import DispersionThreshold
+flex = lazy_import('dials.array_family', 'flex')
+DispersionThreshold = lazy_import('dials.algorithms.image.threshold',
+                                  'DispersionThreshold')
 
 
 @register_plugin
@@ -22,12 +22,18 @@
 """
 
 import numpy as np
+from multiprocessing.pool import ThreadPool
 
+import savu.data.loader_cache as lc
+import savu.data.shared_memory as shm
 from savu.plugins.base_filter import BaseFilter
 from savu.plugins.driver.cpu_plugin import CpuPlugin
 from savu.plugins.utils import register_plugin
 
-import unwarp
+try:
+    import unwarp
+except ImportError:
+    unwarp = None
 
 
 @register_plugin
@@ -42,10 +48,17 @@ class DistortionCorrection(BaseFilter, CpuPlugin):
     :param centre: Centre of distortion. Default: (995.24, 1283.25)
     :param crop_edges: Crop the edges to remove zeros if data is already \
         cropped. Default: 0
+    :param mode: Remap mode: 'table' remaps each frame with a precomputed \
+        (and cacheable) table of pixel offsets and interpolation weights, \
+        'unwarp' uses the unwarp library. Default: 'table'.
+    :param number_of_threads: Number of threads used to remap the frames in \
+        'table' mode. Default: 4.
     """
 
     def __init__(self):
         super(DistortionCorrection, self).__init__("DistortionCorrection")
+        self.table = None
+        self.pool = None
 
     def pre_process(self):
         centre = np.array(self.parameters['centre'])
@@ -55,12 +68,15 @@ class DistortionCorrection(BaseFilter, CpuPlugin):
         # flipping the values
         centre = centre[::-1]
 
-        #pass two empty arrays of frame chunk size
-        unwarp.setcoeff(*self.parameters['polynomial_coeffs'])
-        unwarp.setctr(*centre)
         plugin_data_shape = self.get_plugin_in_datasets()[0].get_shape()
-        temp_array = np.empty(plugin_data_shape, dtype=np.float32)
-        unwarp.setup(temp_array, temp_array)
+        if self.parameters['mode'] == 'table':
+            self.__setup_table(centre, tuple(plugin_data_shape[-2:]))
+        else:
+            #pass two empty arrays of frame chunk size
+            unwarp.setcoeff(*self.parameters['polynomial_coeffs'])
+            unwarp.setctr(*centre)
+            temp_array = np.empty(plugin_data_shape, dtype=np.float32)
+            unwarp.setup(temp_array, temp_array)
 
         self.slice_list = [slice(None)]*3
         orig_shape = self.get_in_datasets()[0].get_shape()
@@ -68,13 +84,66 @@ class DistortionCorrection(BaseFilter, CpuPlugin):
             self.slice_list[ddir] = \
                 slice(self.crop, orig_shape[ddir]-self.crop)
 
+    def __setup_table(self, centre, frame_shape):
+        """ Get the remap table from the cache, or calculate it, and share it
+        between the processes on a node. """
+        coeffs = tuple(self.parameters['polynomial_coeffs'])
+        params = (coeffs, tuple(centre), frame_shape)
+        tables = {}
+
+        def get_table(i):
+            if not tables:
+                tables.update(enumerate(
+                    _get_remap_table(coeffs, centre, frame_shape)))
+            return tables[i]
+
+        self.table = [shm.share_array(self.exp, lambda i=i, name=name:
+                                      lc.load_or_compute(
+                                          self.exp, None, name,
+                                          lambda: get_table(i), params),
+                                      key=(name, params))
+                      for i, name in enumerate(['distortion_offsets',
+                                                'distortion_weights'])]
+        self.pool = ThreadPool(self.parameters['number_of_threads'])
+
     def filter_frames(self, data):
-        result = np.empty_like(data[0])
-        unwarp.run(data[0], result)
+        if self.parameters['mode'] == 'table':
+            result = self.__remap(data[0].astype(np.float32, copy=False))
+        else:
+            result = np.empty_like(data[0])
+            unwarp.run(data[0], result)
         return result[self.slice_list]
 
+    def __remap(self, data):
+        """ Remap frames, in parallel, with the remap table. """
+        offsets, weights = self.table
+        result = np.empty(data.shape, dtype=np.float32)
+        frames = data.reshape((-1,) + data.shape[-2:])
+        results = result.reshape(frames.shape)
+        # the offsets of the neighbouring pixels in a flattened frame
+        shifts = (0, 1, frames.shape[-1], frames.shape[-1] + 1)
+
+        def remap(i):
+            flat = np.ascontiguousarray(frames[i]).ravel()
+            out = results[i].ravel()
+            temp = np.empty_like(out)
+            np.take(flat, offsets, out=out, mode='clip')
+            out *= weights[0]
+            for shift, weight in zip(shifts[1:], weights[1:]):
+                np.take(flat[shift:], offsets, out=temp, mode='clip')
+                temp *= weight
+                out += temp
+
+        self.pool.map(remap, range(len(frames)))
+        return result
+
     def post_process(self):
-        unwarp.cleanup()
+        if self.parameters['mode'] == 'table':
+            self.pool.close()
+            self.pool = None
+            self.table = None
+        else:
+            unwarp.cleanup()
 
     def setup(self):
         # set up the output dataset that is created by the plugin
@@ -96,3 +165,41 @@ class DistortionCorrection(BaseFilter, CpuPlugin):
 
     def get_max_frames(self):
         return 100
+
+
+def _get_remap_table(coeffs, centre, frame_shape):
+    """ Calculate the bilinear interpolation table that maps each pixel of a
+    corrected frame to the distorted frame, as the unwarp library does.
+
+    :param tuple coeffs: the coefficients of the radial distortion function.
+    :param centre: the centre of distortion (x, y).
+    :param tuple frame_shape: the frame shape (height, width).
+    :returns: the offset of the bottom left neighbour of each pixel in the
+        flattened distorted frame (int32) and the weights (float32) of its
+        bottom left, bottom right, top left and top right neighbours,
+        with shape (4, npixels).  Pixels that map outside the frame have
+        zero weights.
+    :rtype: tuple(np.ndarray)
+    """
+    ht, wd = frame_shape
+    a, b, c, d, e = [np.float32(coeff) for coeff in coeffs]
+    cx, cy = np.float32(centre[0]), np.float32(centre[1])
+    y, x = np.mgrid[0:ht, 0:wd].astype(np.float32)
+    dx = x - cx
+    dy = y - cy
+    dist = np.sqrt(dx*dx + dy*dy)
+    ratio = a + b*dist + c*dist*dist + d*dist*dist*dist + \
+        e*dist*dist*dist*dist
+    xp = (cx + dx*ratio).ravel()
+    yp = (cy + dy*ratio).ravel()
+
+    down = np.floor(yp)
+    left = np.floor(xp)
+    inside = (down >= 0) & (down + 1 < ht) & (left >= 0) & (left + 1 < wd)
+    xf = xp - left
+    yf = yp - down
+    weights = np.array([(1 - xf)*(1 - yf), xf*(1 - yf), (1 - xf)*yf,
+                        xf*yf], dtype=np.float32)
+    weights[:, ~inside] = 0
+    offsets = np.where(inside, down*wd + left, 0).astype(np.int32)
+    return offsets, weights
@@ -22,13 +22,14 @@
 """
 from savu.plugins.driver.cpu_plugin import CpuPlugin
 import logging
-from savu.plugins.utils import register_plugin
+from savu.plugins.utils import register_plugin, lazy_import
 from savu.plugins.base_filter import BaseFilter
-import peakutils as pe
 import numpy as np
 from scipy.signal import savgol_filter
 from itertools import chain
 
+pe = lazy_import('peakutils')
+
 
 @register_plugin
 class FindPeaks(BaseFilter, CpuPlugin):
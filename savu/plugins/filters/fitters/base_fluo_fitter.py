@@ -24,12 +24,12 @@
 import logging
 from savu.plugins.filters.base_fitter import BaseFitter
 import numpy as np
-import _xraylib as xl
-from flupy.algorithms.xrf_calculations.transitions_and_shells import \
-    shells, transitions
-from flupy.algorithms.xrf_calculations.escape import *
-from flupy.xrf_data_handling import XRFDataset
-from copy import deepcopy
+from savu.plugins.utils import lazy_import
+
+xl = lazy_import('_xraylib')
+tas = lazy_import('flupy.algorithms.xrf_calculations.transitions_and_shells')
+escape = lazy_import('flupy.algorithms.xrf_calculations.escape')
+XRFDataset = lazy_import('flupy.xrf_data_handling', 'XRFDataset')
 
 
 class BaseFluoFitter(BaseFitter):
@@ -113,7 +113,7 @@ class BaseFluoFitter(BaseFitter):
         
         for i in range(len(out_datasets)):
             out_meta_data = out_datasets[i].meta_data
-            out_meta_data.dict = deepcopy(in_meta_data.get_dictionary())
+            out_meta_data._set_dictionary(in_meta_data._copy_dictionary())
             out_meta_data.set_meta_data("PeakEnergy",self.axis[self.idx])
             out_meta_data.set_meta_data('PeakIndex',self.idx)
 
@@ -147,10 +147,12 @@ class BaseFluoFitter(BaseFitter):
         
         return self.idx
 
-    def findLines(self, paramdict=XRFDataset().paramdict):
+    def findLines(self, paramdict=None):
         """
         Calculates the line energies to fit
         """
+        if paramdict is None:
+            paramdict = XRFDataset().paramdict
         # Incident Energy  used in the experiment
         # Energy range to use for fitting
         pileup_cut_off = paramdict["FitParams"]["pileup_cutoff_keV"]
@@ -165,11 +167,11 @@ class BaseFluoFitter(BaseFitter):
         escape_peaks = []
         for _j, el in enumerate(fitelements):
             z = xl.SymbolToAtomicNumber(str(el))
-            for i, shell in enumerate(shells):
+            for i, shell in enumerate(tas.shells):
                 if(xl.EdgeEnergy(z, shell) < energy - 0.5):
                     linepos = 0.0
                     count = 0.0
-                    for line in transitions[i]:
+                    for line in tas.transitions[i]:
                         en = xl.LineEnergy(z, line)
                         if(en > 0.0):
                             linepos += en
@@ -190,7 +192,8 @@ class BaseFluoFitter(BaseFitter):
         peaks.extend(peakpos)
         if(include_escape):
             for i in range(len(peakpos)):
-                escape_energy = calc_escape_energy(peakpos[i], detectortype)[0]
+                escape_energy = escape.calc_escape_energy(peakpos[i],
+                                                          detectortype)[0]
                 if (escape_energy > fitting_range[0]):
                     if (escape_energy < fitting_range[1]):
                         escape_peaks.extend([escape_energy])
@@ -22,9 +22,10 @@
 
 import logging
 from savu.plugins.filters.fitters.base_fluo_fitter import BaseFluoFitter
-from flupy.xrf_data_handling import XRFDataset
 import numpy as np
-from savu.plugins.utils import register_plugin
+from savu.plugins.utils import register_plugin, lazy_import
+
+XRFDataset = lazy_import('flupy.xrf_data_handling', 'XRFDataset')
 
 
 @register_plugin
@@ -21,13 +21,14 @@
 
 """
 import logging
-from savu.plugins.utils import register_plugin
+from savu.plugins.utils import register_plugin, lazy_import
 from savu.plugins.filters.base_fitter import BaseFitter
 import numpy as np
 from scipy.optimize import leastsq
 import time
 import math
-import ral_nlls
+
+ral_nlls = lazy_import('ral_nlls')
 
 @register_plugin
 class RalFit(BaseFitter):
@@ -21,14 +21,20 @@
 
 """
 import logging
+import itertools
+import numpy as np
+from multiprocessing.pool import ThreadPool
 
 from savu.plugins.base_filter import BaseFilter
 from savu.plugins.driver.cpu_plugin import CpuPlugin
 
-import scipy.signal.signaltools as sig
+import scipy.ndimage as ndi
 
 from savu.plugins.utils import register_plugin
 
+# the number of rows of a frame filtered at a time by the 3x3 and 5x5 paths
+BLOCK_ROWS = 16
+
 
 @register_plugin
 class MedianFilter(BaseFilter, CpuPlugin):
@@ -36,16 +42,53 @@ class MedianFilter(BaseFilter, CpuPlugin):
     A plugin to filter each frame with a 3x3 median filter
 
     :param kernel_size: Kernel size for the filter. Default: (1, 3, 3).
+    :param number_of_threads: Number of threads used to filter each group \
+        of frames. Default: 4.
     """
 
     def __init__(self):
         logging.debug("Starting Median Filter")
         super(MedianFilter, self).__init__("MedianFilter")
+        self.pool = None
+        self.network = None
+
+    def pre_process(self):
+        kernel = tuple(self.parameters['kernel_size'])
+        # the dimension the frames are split along and the filtered dimensions
+        self.frame_dim = kernel.index(1) if 1 in kernel else None
+        self.dims = [d for d in range(len(kernel)) if d != self.frame_dim]
+        sizes = [kernel[d] for d in self.dims]
+        self.network = _get_network(sizes[0]) if len(sizes) == 2 and \
+            sizes[0] == sizes[1] and sizes[0] in (3, 5) else None
+        self.pool = ThreadPool(self.parameters['number_of_threads'])
 
     def filter_frames(self, data):
-        result = sig.medfilt(data[0], self.parameters['kernel_size'])
+        # the borders are padded with zeros, as in scipy.signal.medfilt
+        kernel = self.parameters['kernel_size']
+        if self.frame_dim is None:
+            return ndi.median_filter(data[0], size=kernel, mode='constant')
+
+        order = [self.frame_dim] + self.dims
+        result = np.empty_like(data[0])
+        frames = data[0].transpose(order)
+        results = result.transpose(order)
+        size = [kernel[d] for d in self.dims]
+        network = self.network if _has_keys(result.dtype) else None
+
+        def median(i):
+            if network:
+                results[i] = _median(frames[i], network)
+            else:
+                results[i] = ndi.median_filter(frames[i], size=size,
+                                               mode='constant')
+
+        self.pool.map(median, range(len(frames)))
         return result
 
+    def post_process(self):
+        self.pool.close()
+        self.pool = None
+
     def set_filter_padding(self, in_data, out_data):
         padding = (self.parameters['kernel_size'][0]-1)/2
         in_data[0].padding = {'pad_multi_frames': padding}
@@ -59,3 +102,140 @@ class MedianFilter(BaseFilter, CpuPlugin):
 
     def get_max_frames(self):
         return 8
+
+
+def _median(frame, network):
+    """ Median filter a 2D frame with a square kernel selection network,
+    padding the frame with zeros, BLOCK_ROWS rows at a time. """
+    size, column_ops, window_ops, median_wire = network
+    r = size//2
+    keys = np.pad(_get_keys(frame), r, mode='constant')
+    width = keys.shape[1]
+    result = np.empty(frame.shape, dtype=keys.dtype)
+    for start in range(0, frame.shape[0], BLOCK_ROWS):
+        stop = min(start + BLOCK_ROWS, frame.shape[0])
+        # each window is a run of a flattened block, so the rows of the
+        # kernel are offset by the width and the columns by one
+        block = keys[start:stop + 2*r].ravel()
+        length = (stop - start)*width
+        columns = _apply_network(column_ops, [
+            block[i*width:i*width + length] for i in range(size)])
+        windows = _apply_network(window_ops, [
+            columns[i][j:j + length - 2*r] for i in range(size) for j in
+            range(size)])
+        rows = np.empty(length, dtype=keys.dtype)
+        rows[:length - 2*r] = windows[median_wire]
+        result[start:stop] = rows.reshape(stop - start, width)[:, :-2*r]
+    if frame.dtype.kind == 'f':
+        return _flip_negative(result).view(frame.dtype)
+    return result
+
+
+def _get_keys(frame):
+    """ Get integers in the same order as the frame values, as the element-
+    wise minimum and maximum of unaligned runs of floats are not
+    vectorised. """
+    if frame.dtype.kind != 'f':
+        return frame
+    return _flip_negative(frame.view('i%i' % frame.dtype.itemsize))
+
+
+def _flip_negative(keys):
+    """ Invert the bits of negative integers, other than the sign, which
+    maps the bits of floats to integers in the same order and back. """
+    return keys ^ ((keys >> 8*keys.itemsize - 1) & np.iinfo(keys.dtype).max)
+
+
+def _has_keys(dtype):
+    return dtype.kind in 'iu' or (dtype.kind == 'f' and dtype.itemsize <= 8)
+
+
+def _apply_network(ops, wires):
+    """ Apply compare-exchange operations (wire a, wire b, keep the
+    minimum in a, keep the maximum in b) to a list of arrays. """
+    wires = list(wires)
+    for a, b, lower, upper in ops:
+        x, y = wires[a], wires[b]
+        if lower:
+            wires[a] = np.minimum(x, y)
+        if upper:
+            wires[b] = np.maximum(x, y)
+    return wires
+
+
+def _get_network(size):
+    """ Get a selection network for the median of a size x size window.
+
+    The columns of the padded frame are sorted once, by a sorting network
+    over the rows of the kernel, and are shared by neighbouring windows.
+    In each window the rows are then sorted, after which only the values
+    that can be the median remain as candidates, and a sorting network
+    over these selects the median. Compare-exchanges that never swap a
+    window with sorted columns, found by the 0-1 principle, and those that
+    do not reach the median are removed.
+
+    :returns: the size, the column and window operations (see
+        _apply_network), and the median wire of the window (wire i*size + j
+        is rank i of column j)
+    """
+    n = size*size
+    half = n//2 + 1
+    ranks = [(i, j) for i in range(size) for j in range(size)]
+    candidates = [i*size + j for i, j in ranks if (i + 1)*(j + 1) <= half
+                  and (size - i)*(size - j) <= half]
+    below = len([1 for i, j in ranks if (size - i)*(size - j) > half])
+    median_wire = candidates[n//2 - below]
+
+    pairs = [(i*size + a, i*size + b) for i in range(size) for a, b in
+             _get_sorting_pairs(size)]
+    pairs += [(candidates[a], candidates[b]) for a, b in
+              _get_sorting_pairs(len(candidates))]
+
+    # every 0-1 window with sorted columns
+    columns = np.arange(size)[:, None] >= np.arange(size + 1)
+    windows = np.array([columns[:, list(c)].ravel() for c in
+                        itertools.product(range(size + 1), repeat=size)])
+    swaps = []
+    for a, b in pairs:
+        if (windows[:, a] > windows[:, b]).any():
+            swaps.append((a, b))
+            windows[:, a], windows[:, b] = \
+                windows[:, a] & windows[:, b], windows[:, a] | windows[:, b]
+
+    column_ops = _prune(_get_sorting_pairs(size), range(size))
+    return size, column_ops, _prune(swaps, [median_wire]), median_wire
+
+
+def _prune(pairs, outputs):
+    """ Keep the minimum and maximum of compare-exchanges only where they
+    reach the output wires. """
+    needed = set(outputs)
+    ops = []
+    for a, b in reversed(pairs):
+        lower, upper = a in needed, b in needed
+        if lower or upper:
+            ops.append((a, b, lower, upper))
+            needed.update((a, b))
+    return ops[::-1]
+
+
+def _get_sorting_pairs(n):
+    """ The compare-exchange pairs of Batcher's odd-even merge sort of n
+    values (the network for the next power of two, without the pairs that
+    compare with the missing values). """
+    length = 1
+    while length < n:
+        length *= 2
+    pairs = []
+    p = 1
+    while p < length:
+        k = p
+        while k >= 1:
+            for j in range(k % p, length - k, 2*k):
+                for i in range(min(k, length - j - k)):
+                    if (i + j)//(2*p) == (i + j + k)//(2*p) and \
+                            i + j + k < n:
+                        pairs.append((i + j, i + j + k))
+            k //= 2
+        p *= 2
+    return pairs
@@ -23,8 +23,8 @@
 import math
 import logging
 import numpy as np
-import pyfftw.interfaces.scipy_fftpack as fft
 
+import savu.data.fft_plans as fftp
 from savu.plugins.base_filter import BaseFilter
 from savu.plugins.driver.cpu_plugin import CpuPlugin
 from savu.plugins.utils import register_plugin
@@ -42,6 +42,8 @@ class PaganinFilter(BaseFilter, CpuPlugin):
     :param Padtopbottom: Pad to the top and bottom of projection. Default: 10.
     :param Padleftright: Pad to the left and right of projection. Default: 10.
     :param Padmethod: Method of padding. Default: 'edge'.
+    :param number_of_threads: Number of threads used by the FFTs, or None \
+        for the FFT thread budget of the process. Default: None.
     """
 
     def __init__(self):
@@ -49,19 +51,19 @@ class PaganinFilter(BaseFilter, CpuPlugin):
         logging.debug("Calling super to make sure that all superclases are " +
                       " initialised")
         super(PaganinFilter, self).__init__("PaganinFilter")
-        self.filtercomplex = None
-        self.count = 0
+        self.filter = None
 
     def pre_process(self):
         pData = self.get_plugin_in_datasets()[0]
         self.slice_dir = pData.get_slice_dimension()
-        nDims = len(pData.get_shape())
-        self.sslice = [slice(None)]*nDims
         core_shape = list(pData.get_shape())
         del core_shape[self.slice_dir]
         self._setup_paganin(*core_shape)
+        self.__get_plans(self.get_max_frames())
 
     def _setup_paganin(self, height, width):
+        """ Create the real Paganin filter for the half spectrum of a real
+        FFT, in the unshifted (FFT) order. """
         micron = 10**(-6)
         keV = 1000.0
         distance = self.parameters['Distance']
@@ -69,49 +71,65 @@ class PaganinFilter(BaseFilter, CpuPlugin):
         resolution = self.parameters['Resolution']*micron
         wavelength = (1240.0/energy)*10.0**(-9)
         ratio = self.parameters['Ratio']
-        padtopbottom = self.parameters['Padtopbottom']
-        padleftright = self.parameters['Padleftright']
-        height1 = height + 2*padtopbottom
-        width1 = width + 2*padleftright
-        centery = np.ceil(height1/2.0)-1.0
-        centerx = np.ceil(width1/2.0)-1.0
+        self.pad = (self.parameters['Padtopbottom'],
+                    self.parameters['Padleftright'])
+        self.padded_shape = (height + 2*self.pad[0], width + 2*self.pad[1])
+        height1, width1 = self.padded_shape
         # Define the paganin filter
-        dpx = 1.0/(width1*resolution)
-        dpy = 1.0/(height1*resolution)
-        pxlist = (np.arange(width1)-centerx)*dpx
-        pylist = (np.arange(height1)-centery)*dpy
-        pxx = np.zeros((height1, width1), dtype=np.float32)
-        pxx[:, 0:width1] = pxlist
-        pyy = np.zeros((height1, width1), dtype=np.float32)
-        pyy[0:height1, :] = np.reshape(pylist, (height1, 1))
-        pd = (pxx*pxx+pyy*pyy)*wavelength*distance*math.pi
+        pxlist = np.fft.rfftfreq(width1, d=resolution)
+        pylist = np.fft.fftfreq(height1, d=resolution)
+        pd = (pxlist[np.newaxis, :]**2 + pylist[:, np.newaxis]**2) * \
+            wavelength*distance*math.pi
         filter1 = 1.0+ratio*pd
-        self.filtercomplex = filter1+filter1*1j
+        # the inverse FFT normalisation, and the 1/sqrt(2) of the original
+        # complex filter (1+1j)*filter1, are included in the filter
+        self.filter = (1.0/(filter1*math.sqrt(2)*height1*width1)).astype(
+            np.float32)
 
-    def _paganin(self, data, axes):
-        pci1 = fft.fft2(np.float32(data))
-        pci2 = fft.fftshift(pci1)/self.filtercomplex
-        fpci = np.abs(fft.ifft2(pci2))
-        result = -0.5*self.parameters['Ratio']*np.log(fpci+1.0)
-        return result
+    def __get_plans(self, nFrames):
+        """ Get the forward and inverse FFT plans for a number of frames.
+        """
+        shape = (nFrames,) + self.padded_shape
+        threads = self.parameters['number_of_threads']
+        fft = fftp.get_plan(shape, np.float32, (1, 2), threads=threads)
+        ifft = fftp.get_plan(shape, np.float32, (1, 2), threads=threads,
+                             direction='FFTW_BACKWARD')
+        return fft, ifft
+
+    def __pad(self, frames, padded):
+        """ Copy frames into the centre of the padded buffer and pad them.
+        """
+        pt, pl = self.pad
+        height, width = frames.shape[1:]
+        centre = padded[:, pt:pt+height, pl:pl+width]
+        centre[...] = frames
+        centre[np.isnan(centre) | (centre == 0)] = 1.0
+        padmethod = str(self.parameters['Padmethod'])
+        if padmethod != 'edge':
+            padded[...] = np.lib.pad(centre, ((0, 0), (pt, pt), (pl, pl)),
+                                     padmethod)
+            return
+        padded[:, :pt, pl:pl+width] = centre[:, :1]
+        padded[:, pt+height:, pl:pl+width] = centre[:, -1:]
+        padded[:, :, :pl] = padded[:, :, pl:pl+1]
+        padded[:, :, pl+width:] = padded[:, :, pl+width-1:pl+width]
 
     def filter_frames(self, data):
-        output = np.empty_like(data[0])
-        nSlices = data[0].shape[self.slice_dir]
-        for i in range(nSlices):
-            self.sslice[self.slice_dir] = i
-            proj = data[0][tuple(self.sslice)]
-            height, width = proj.shape
-            proj = np.nan_to_num(proj)  # Noted performance
-            proj[proj == 0] = 1.0
-            padtopbottom = self.parameters['Padtopbottom']
-            padleftright = self.parameters['Padleftright']
-            padmethod = str(self.parameters['Padmethod'])
-            proj = np.lib.pad(proj, (tuple([padtopbottom]*2),
-                                     tuple([padleftright]*2)), padmethod)
-            result = np.abs(np.apply_over_axes(self._paganin, proj, 0))
-            output[self.sslice] = result[padtopbottom:-padtopbottom,
-                                         padleftright:-padleftright]
+        output = np.empty(data[0].shape, dtype=np.float32)
+        frames = np.rollaxis(data[0], self.slice_dir)
+        fft, ifft = self.__get_plans(frames.shape[0])
+        self.__pad(frames, fft.input_array)
+        fft.execute()
+        np.multiply(fft.output_array, self.filter, out=ifft.input_array)
+        ifft.execute()
+
+        pt, pl = self.pad
+        height, width = frames.shape[1:]
+        result = np.rollaxis(output, self.slice_dir)
+        np.abs(ifft.output_array[:, pt:pt+height, pl:pl+width], out=result)
+        result += 1.0
+        np.log(result, out=result)
+        result *= abs(0.5*self.parameters['Ratio'])
         return output
 
     def get_max_frames(self):
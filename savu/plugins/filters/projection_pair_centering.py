@@ -0,0 +1,165 @@
+# Copyright 2016 Diamond Light Source Ltd.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+.. module:: projection_pair_centering
+   :platform: Unix
+   :synopsis: A plugin to find the centre of rotation from the phase \
+       correlation of two opposing projections
+
+.. moduleauthor:: Nicola Wadeson <scientificsoftware@diamond.ac.uk>
+
+"""
+import logging
+import numpy as np
+
+import savu.data.fft_plans as fftp
+from savu.plugins.base_filter import BaseFilter
+from savu.plugins.driver.cpu_plugin import CpuPlugin
+from savu.plugins.utils import register_plugin
+
+
+@register_plugin
+class ProjectionPairCentering(BaseFilter, CpuPlugin):
+    """
+    A plugin to calculate the centre of rotation from the first projection
+    and the mirrored projection at 180 degrees to it, by phase correlation.
+
+    :param row_bands: The number of bands of detector rows to correlate \
+        separately, to find the tilt of the rotation axis. Default: 1.
+    :param datasets_to_populate: A list of datasets which require this \
+        information. Default: [].
+    :param out_datasets: The default names. Default: ['cor_pair'].
+    """
+
+    def __init__(self):
+        super(ProjectionPairCentering, self).__init__(
+            "ProjectionPairCentering")
+
+    def _get_projection_pair(self, angles):
+        """ Get the indices of the first projection and the projection
+        closest to 180 degrees from it. """
+        angles = np.asarray(angles, dtype=np.float64)
+        diff = np.abs(angles - (angles[0] + 180.0))
+        opposite = int(np.argmin(diff))
+        step = np.max(np.abs(np.diff(angles))) if len(angles) > 1 else 0
+        if opposite == 0 or diff[opposite] > step:
+            raise Exception("%s: there is no projection at 180 degrees to the "
+                            "first projection" % self.name)
+        if diff[opposite]:
+            logging.warn("%s: the opposing projection is %f degrees from 180",
+                         self.name, diff[opposite])
+        return 0, opposite
+
+    def _get_shift(self, proj, proj2):
+        """ Get the horizontal shift of proj relative to proj2 from the peak
+        of their phase correlation, to sub-pixel accuracy. """
+        (nRows, nCols) = proj.shape
+        fft = fftp.get_plan((2, nRows, nCols), np.float32, (1, 2),
+                            effort='FFTW_ESTIMATE')
+        ifft = fftp.get_plan((nRows, nCols), np.float32, (0, 1),
+                             direction='FFTW_BACKWARD',
+                             effort='FFTW_ESTIMATE')
+        window = np.hanning(nCols)
+        fft.input_array[0] = (proj - proj.mean())*window
+        fft.input_array[1] = (proj2 - proj2.mean())*window
+        fft.execute()
+
+        cross = fft.output_array[0]*np.conj(fft.output_array[1])
+        cross /= np.abs(cross) + np.finfo(np.float32).tiny
+        corr = ifft(cross)
+        row, col = np.unravel_index(np.argmax(corr), corr.shape)
+        # fit a parabola through the peak and its neighbours
+        left, peak, right = \
+            corr[row, col-1], corr[row, col], corr[row, (col+1) % nCols]
+        denom = left - 2*peak + right
+        shift = col + (0.5*(left - right)/denom if denom else 0.0)
+        return shift - nCols if shift > nCols/2.0 else shift
+
+    def filter_frames(self, data):
+        frames = data[0].transpose(self.order)
+        proj, proj2 = frames[0], frames[1][:, ::-1]
+        nCols = proj.shape[1]
+        cors = []
+        for band, band2 in zip(np.array_split(proj, self.n_bands),
+                               np.array_split(proj2, self.n_bands)):
+            # the mirrored projection is shifted by nCols - 1 - 2*centre
+            shift = self._get_shift(band, band2)
+            cors.append((nCols - 1.0 + shift)/2.0)
+        logging.debug("%s: centre of rotation %s", self.name, cors)
+        return np.array(cors)
+
+    def post_process(self):
+        in_datasets, out_datasets = self.get_datasets()
+        cor_raw = out_datasets[0].data[0]
+
+        # fit a line through the band centres and evaluate it for each row
+        bands = np.array_split(np.arange(self.n_rows), self.n_bands)
+        rows = [np.mean(band) for band in bands]
+        degree = min(1, len(cor_raw) - 1)
+        fit = np.polyfit(rows, cor_raw, degree)
+        cor_fit = np.polyval(fit, np.arange(self.n_rows))
+        if degree:
+            tilt = np.degrees(np.arctan(fit[0]))
+            logging.info("%s: rotation axis tilt %f degrees", self.name, tilt)
+            self.populate_meta_data('cor_tilt', tilt)
+
+        self.populate_meta_data('cor_raw', cor_raw)
+        self.populate_meta_data('centre_of_rotation', cor_fit)
+
+    def populate_meta_data(self, key, value):
+        datasets = self.parameters['datasets_to_populate']
+        in_meta_data = self.get_in_meta_data()[0]
+        in_meta_data.set_meta_data(key, value)
+        for name in datasets:
+            self.exp.index['in_data'][name].meta_data.set_meta_data(key, value)
+
+    def setup(self):
+        in_dataset, out_dataset = self.get_datasets()
+        self.orig_full_shape = in_dataset[0].get_shape()
+
+        # only read the two opposing projections
+        angles = in_dataset[0].meta_data.get_meta_data('rotation_angle')
+        first, opposite = self._get_projection_pair(angles)
+        rot_dim = in_dataset[0].find_axis_label_dimension('rotation_angle')
+        preview = ['0:end:1:1']*len(self.orig_full_shape)
+        preview[rot_dim] = '%i:%i:%i:1' % (first, opposite + 1,
+                                           opposite - first)
+        in_dataset[0].get_preview().set_preview(preview,
+                                                revert=self.orig_full_shape)
+
+        in_pData, out_pData = self.get_plugin_datasets()
+        in_pData[0].plugin_data_setup('PROJECTION', self.get_max_frames())
+        y_dim = in_dataset[0].find_axis_label_dimension('detector_y')
+        x_dim = in_dataset[0].find_axis_label_dimension('detector_x')
+        self.order = (in_pData[0].get_slice_dimension(), y_dim, x_dim)
+        self.n_rows = self.orig_full_shape[y_dim]
+        self.n_bands = max(1, min(self.parameters['row_bands'], self.n_rows))
+
+        out_dataset[0].create_dataset(shape=(1, self.n_bands),
+                                      axis_labels=['x.pixels', 'y.pixels'],
+                                      remove=True)
+        out_dataset[0].add_pattern("METADATA", core_dir=(1,), slice_dir=(0,))
+        out_pData[0].plugin_data_setup('METADATA', 1)
+
+    def nOutput_datasets(self):
+        return 1
+
+    def get_max_frames(self):
+        """
+        This filter processes the two opposing projections together
+
+         :returns:  2
+        """
+        return 2
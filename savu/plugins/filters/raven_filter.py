@@ -21,8 +21,8 @@
 """
 import logging
 import numpy as np
-import pyfftw
 
+import savu.data.fft_plans as fftp
 from savu.plugins.base_filter import BaseFilter
 from savu.plugins.driver.cpu_plugin import CpuPlugin
 
@@ -54,45 +54,66 @@ class RavenFilter(BaseFilter, CpuPlugin):
 
     def pre_process(self):
         in_pData = self.get_plugin_in_datasets()[0]
-        sino_shape = in_pData.get_shape()
+        self.slice_dir = in_pData.get_slice_dimension()
+        # the frame dimension is only present if there are several frames
+        self.nFrames = in_pData._get_frame_chunk()
+        sino_shape = in_pData.get_core_shape()
 
         width1 = sino_shape[1] + 2*self.pad
         height1 = sino_shape[0] + 2*self.pad
+        self.padded_shape = (height1, width1)
 
         v0 = np.abs(self.parameters['vvalue'])
         u0 = np.abs(self.parameters['uvalue'])
         n = np.abs(self.parameters['nvalue'])
-        # Create filter
-        centerx = np.ceil(width1/2.0)-1.0
-        centery = np.int16(np.ceil(height1/2.0)-1)
-        self.row1 = centery - v0
-        self.row2 = centery + v0+1
-        listx = np.arange(width1)-centerx
-        filtershape = 1.0/(1.0 + np.power(listx/u0, 2*n))
-        filtershapepad2d = np.zeros((self.row2 - self.row1, filtershape.size))
-        filtershapepad2d[:] = np.float64(filtershape)
-        self.filtercomplex = filtershapepad2d + filtershapepad2d*1j
-
-        a = pyfftw.n_byte_align_empty((height1, width1), 16, 'complex128')
-        self.fft_object = pyfftw.FFTW(a, a, axes=(0, 1))
-        self.ifft_object = pyfftw.FFTW(a, a, axes=(0, 1),
-                                       direction='FFTW_BACKWARD')
+        # Create filter, for the half spectrum of a real FFT along the rows
+        listx = np.arange(width1//2 + 1)
+        filtershape = 1.0/(1.0 + np.power(listx/float(u0), 2*n))
+        # only the filtered angular frequencies are transformed, and they
+        # are multiplied by filtershape - 1 and added to the spectrum
+        self.filter = (filtershape - 1.0).astype(np.float32)
+        rows = np.unique(np.arange(-v0, v0 + 1) % height1)
+        angles = np.arange(height1)
+        self.dft = np.exp(-2j*np.pi*np.outer(rows, angles)/height1).astype(
+            np.complex64)
+        self.idft = (np.conj(self.dft).T/height1).astype(np.complex64)
+        self.__get_plans(self.nFrames)
+
+    def __get_plans(self, nFrames):
+        """ Get the forward and inverse FFT plans, along the rows, for a
+        number of frames. """
+        shape = (nFrames,) + self.padded_shape
+        fft = fftp.get_plan(shape, np.float32, (2,))
+        ifft = fftp.get_plan(shape, np.float32, (2,),
+                             direction='FFTW_BACKWARD')
+        return fft, ifft
 
     def filter_frames(self, data):
         if(self.count%25==0):
            logging.debug( "raven...%i"%self.count)
-        data2d = data[0]
-        sino2 = np.fft.fftshift(self.fft_object(data2d))
-        sino2[self.row1:self.row2] = \
-            sino2[self.row1:self.row2] * self.filtercomplex
-        sino3 = np.fft.ifftshift(sino2)
-        sino4 = self.ifft_object(sino3).real
-        sino4 = sino4[:, np.newaxis, :]
-        self.count+=1
-        return sino4
+        output = np.empty(data[0].shape, dtype=np.float32)
+        if self.nFrames > 1:
+            sinos = np.rollaxis(data[0], self.slice_dir)
+            out = np.rollaxis(output, self.slice_dir)
+        else:
+            sinos = data[0][np.newaxis]
+            out = output[np.newaxis]
+        fft, ifft = self.__get_plans(sinos.shape[0])
+        fft.input_array[...] = sinos
+        fft.execute()
+        spectrum = fft.output_array
+        rows = np.tensordot(self.dft, spectrum, axes=(1, 1))
+        rows *= self.filter
+        ifft.input_array[...] = spectrum
+        ifft.input_array += np.tensordot(
+            self.idft, rows, axes=(1, 0)).transpose(1, 0, 2)
+        ifft.execute()
+        np.multiply(ifft.output_array, 1.0/self.padded_shape[1], out=out)
+        self.count += sinos.shape[0]
+        return output
 
     def get_plugin_pattern(self):
         return 'SINOGRAM'
 
     def get_max_frames(self):
-        return 1
+        return 8
@@ -26,7 +26,6 @@ from savu.plugins.base_filter import BaseFilter
 from savu.plugins.driver.cpu_plugin import CpuPlugin
 import time
 from savu.plugins.utils import register_plugin
-from copy import deepcopy
 
 
 @register_plugin
@@ -92,11 +91,11 @@ class StripBackground(BaseFilter, CpuPlugin):
         print in_dictionary
         stripped = out_datasets[0]
         stripped.create_dataset(in_dataset[0])
-        stripped.meta_data.dict = deepcopy(in_dictionary)
+        stripped.meta_data._set_dictionary(in_meta._copy_dictionary())
         print stripped.meta_data.dict
         background = out_datasets[1]
         background.create_dataset(in_dataset[0])
-        background.meta_data.dict = deepcopy(in_dictionary)
+        background.meta_data._set_dictionary(in_meta._copy_dictionary())
         
         
         in_pData, out_pData = self.get_plugin_datasets()
@@ -21,17 +21,21 @@
 """
 from savu.plugins.driver.cpu_plugin import CpuPlugin
 
-import scipy.ndimage as ndi
 import math
 import logging
 import numpy as np
-import pyfftw.interfaces.scipy_fftpack as fft
+import scipy.ndimage as ndi
 import scipy.ndimage.filters as filter
 
+import savu.data.fft_plans as fftp
 from savu.plugins.utils import register_plugin
 from savu.plugins.base_filter import BaseFilter
 from savu.data.plugin_list import CitationInformation
 
+# the number of values of the stacked sinograms transformed at a time by the
+# shift searches
+BATCH_SIZE = 1 << 22
+
 
 @register_plugin
 class VoCentering(BaseFilter, CpuPlugin):
@@ -44,8 +48,12 @@ class VoCentering(BaseFilter, CpuPlugin):
         mask. Default: 20.
     :param search_radius: Use for fine searching. Default: 3.
     :param step: Step of fine searching. Default: 0.2.
-    :param downsample: The step length over the rotation axis. Default: 1.
+    :param downsample: The step length over the rotation axis, if there is \
+        no preview. Default: 1.
     :param preview: A slice list of required frames. Default: [].
+    :param n_sinograms: If there is no preview, the number of sinograms, \
+        spread evenly over the data, used to find the centre of rotation \
+        (0 for every sinogram). Default: 20.
     :param no_clean: Do not clean up potential outliers. Default: True.
     :param datasets_to_populate: A list of datasets which require this \
         information. Default: [].
@@ -60,19 +68,22 @@ class VoCentering(BaseFilter, CpuPlugin):
 
     def __init__(self):
         super(VoCentering, self).__init__("VoCentering")
+        self.weights = {}
+        self.positions = []
+        self.frames = 8
 
     def _create_mask(self, Nrow, Ncol, obj_radius):
         du = 1.0/Ncol
         dv = (Nrow-1.0)/(Nrow*2.0*math.pi)
-        cen_row = np.ceil(Nrow/2)-1
-        cen_col = np.ceil(Ncol/2)-1
+        cen_row = int(np.ceil(Nrow/2)-1)
+        cen_col = int(np.ceil(Ncol/2)-1)
         drop = self.parameters['row_drop']
         mask = np.zeros((Nrow, Ncol), dtype=np.float32)
         for i in range(Nrow):
             num1 = \
                 np.round(((i-cen_row)*dv/obj_radius)/du)
-            (p1, p2) = \
-                np.clip(np.sort((-num1+cen_col, num1+cen_col)), 0, Ncol-1)
+            (p1, p2) = np.int_(
+                np.clip(np.sort((-num1+cen_col, num1+cen_col)), 0, Ncol-1))
             mask[i, p1:p2+1] = np.ones(p2-p1+1, dtype=np.float32)
         if drop < cen_row:
             mask[cen_row-drop:cen_row+drop+1, :] = \
@@ -91,6 +102,55 @@ class VoCentering(BaseFilter, CpuPlugin):
                 shift = 0
         return int(shift)
 
+    def _get_weights(self, Nrow, Ncol, obj_radius):
+        """ Get the non-zero values of the mask as weights of the half
+        spectrum of a real FFT, in the unshifted (FFT) order.
+
+        :returns: rows, columns and weights
+        """
+        key = (Nrow, Ncol, obj_radius)
+        if key not in self.weights:
+            mask = np.fft.ifftshift(self._create_mask(Nrow, Ncol, obj_radius))
+            # |F(-u, -v)| = |F(u, v)| for real data, so the mask of the
+            # missing half of the spectrum is added to its mirror image
+            mirror = mask[-np.arange(Nrow)][:, -np.arange(Ncol)]
+            weights = mask[:, :Ncol//2 + 1].copy()
+            cols = np.arange(1, (Ncol + 1)//2)
+            weights[:, cols] += mirror[:, cols]
+            rows, cols = np.nonzero(weights)
+            self.weights[key] = (rows, cols, weights[rows, cols])
+        return self.weights[key]
+
+    def _get_metrics(self, sino, get_sino2, shifts, obj_radius,
+                     effort='FFTW_MEASURE'):
+        """ Get the metric of the sinogram stacked on the shifted sino2, for
+        each shift.
+
+        The stacked sinograms are transformed in batches with a shared real
+        FFT plan, and the metric is evaluated on the masked part of the half
+        spectrum only.
+
+        :param function get_sino2: Returns sino2 with a shift applied.
+        """
+        (Nrow, Ncol) = sino.shape
+        size = (2*Nrow-1)*Ncol
+        batch = int(min(len(shifts), max(1, BATCH_SIZE//size)))
+        fft2 = fftp.get_plan((batch, 2*Nrow-1, Ncol), np.float32, (1, 2),
+                             effort=effort)
+        rows, cols, weights = self._get_weights(2*Nrow-1, Ncol, obj_radius)
+        stack = fft2.input_array
+        metric = np.zeros(len(shifts), dtype=np.float32)
+        for i in range(0, len(shifts), batch):
+            n = min(batch, len(shifts) - i)
+            stack[...] = 0
+            stack[:, :Nrow] = sino
+            for j in range(n):
+                stack[j, Nrow:] = get_sino2(shifts[i + j])
+            fft2.execute()
+            metric[i:i+n] = \
+                np.abs(fft2.output_array[:n][:, rows, cols]).dot(weights)
+        return metric
+
     def _coarse_search(self, sino):
         # search minsearch to maxsearch in 1 pixel steps
         smin, smax = self.parameters['search_area']
@@ -103,26 +163,22 @@ class VoCentering(BaseFilter, CpuPlugin):
         sino2 = np.fliplr(sino[1:])
         # This image is used for compensating the shift of sino2
         compensateimage = np.zeros((Nrow-1, Ncol), dtype=np.float32)
-        # Start coarse search in which the shift step is 1
         compensateimage[:] = sino[-1]
-        start_shift = self._get_start_shift(centre_fliplr)*2
-        list_shift = np.arange(smin, smax + 1)*2 - start_shift
-        logging.debug("%s", list_shift)
-        list_metric = np.zeros(len(list_shift), dtype=np.float32)
-        mask = self._create_mask(2*Nrow-1, Ncol,
-                                 0.5*self.parameters['ratio']*Ncol)
 
-        count = 0
-        for i in list_shift:
-            logging.debug("list shift %d", i)
+        def get_sino2(i):
             sino2a = np.roll(sino2, i, axis=1)
             if i >= 0:
                 sino2a[:, 0:i] = compensateimage[:, 0:i]
             else:
                 sino2a[:, i:] = compensateimage[:, i:]
-            list_metric[count] = np.sum(
-                np.abs(fft.fftshift(fft.fft2(np.vstack((sino, sino2a)))))*mask)
-            count += 1
+            return sino2a
+
+        # Start coarse search in which the shift step is 1
+        start_shift = self._get_start_shift(centre_fliplr)*2
+        list_shift = np.arange(smin, smax + 1)*2 - start_shift
+        logging.debug("%s", list_shift)
+        list_metric = self._get_metrics(sino, get_sino2, list_shift,
+                                        0.5*self.parameters['ratio']*Ncol)
         minpos = np.argmin(list_metric)
         rot_centre = centre_fliplr + list_shift[minpos]/2.0
         return rot_centre, list_metric
@@ -142,35 +198,40 @@ class VoCentering(BaseFilter, CpuPlugin):
         else:
             lefttake = np.ceil(raw_cor-(Ncol-1-raw_cor)+search_rad+1)
             righttake = np.floor(Ncol-1-search_rad-1)
-        Ncol1 = righttake-lefttake + 1
-        mask = self._create_mask(2*Nrow-1, Ncol1,
-                                 0.5*self.parameters['ratio']*Ncol)
+        take = slice(int(lefttake), int(righttake) + 1)
+
+        def get_sino2(i):
+            return ndi.interpolation.shift(sino2, (0, i),
+                                           prefilter=False)[:, take]
+
         numshift = np.int16((2*search_rad+1.0)/self.parameters['step'])
         listshift = np.linspace(-search_rad, search_rad, num=numshift)
-        listmetric = np.zeros(len(listshift), dtype=np.float32)
-        num1 = 0
-        for i in listshift:
-            logging.debug("list shift %d", i)
-            sino2a = ndi.interpolation.shift(sino2, (0, i), prefilter=False)
-            sinojoin = np.vstack((sino, sino2a))
-            listmetric[num1] = np.sum(np.abs(fft.fftshift(
-                fft.fft2(sinojoin[:, lefttake:righttake + 1])))*mask)
-            num1 = num1 + 1
+        # the width depends on the coarse result, so the plan is not measured
+        listmetric = self._get_metrics(
+            sino[:, take], get_sino2, listshift,
+            0.5*self.parameters['ratio']*Ncol, effort='FFTW_ESTIMATE')
         minpos = np.argmin(listmetric)
         rotcenter = raw_cor + listshift[minpos]/2.0
         return rotcenter, listmetric
 
+    def pre_process(self):
+        self.slice_dir = self.get_plugin_in_datasets()[0].get_slice_dimension()
+        self.weights = {}
+
     def filter_frames(self, data):
-        # if data is greater than a certain size
-        # data = data[0][::self.parameters['step']]
         # Reducing noise by smooth filtering, it's important
-        sino = filter.gaussian_filter(data[0], sigma=(3, 1))
-        logging.debug("performing coarse search")
-        (raw_cor, raw_metric) = self._coarse_search(sino)
-        logging.debug("performing fine search")
-        (cor, listmetric) = self._fine_search(sino, raw_cor)
-        logging.debug("%d %d", raw_cor, cor)
-        return [np.array([cor]), np.array([cor])]
+        sinos = data[0] if self.get_max_frames() > 1 else \
+            np.expand_dims(data[0], self.slice_dir)
+        sinos = filter.gaussian_filter(np.rollaxis(sinos, self.slice_dir),
+                                       sigma=(0, 3, 1))
+        cors = np.zeros((sinos.shape[0], 1))
+        for i, sino in enumerate(sinos):
+            logging.debug("performing coarse search")
+            (raw_cor, raw_metric) = self._coarse_search(sino)
+            logging.debug("performing fine search")
+            (cors[i], listmetric) = self._fine_search(sino, raw_cor)
+            logging.debug("%d %d", raw_cor, cors[i])
+        return [cors, cors]
 
     def post_process(self):
         # do some curve fitting here
@@ -185,10 +246,16 @@ class VoCentering(BaseFilter, CpuPlugin):
             self.populate_meta_data('centre_of_rotation', cor_raw)
             return
 
-        cor_fit = np.squeeze(out_datasets[1].data[...])
-        fit = np.zeros(cor_fit.shape)
-        fit[:] = np.mean(cor_fit)
-        cor_fit = fit
+        # fit a polynomial to the sampled sinograms and evaluate it for
+        # every sinogram
+        sinos = np.arange(self.orig_shape[0])
+        if len(self.positions) == len(cor_raw):
+            degree = min(self.parameters['poly_degree'], len(cor_raw) - 1)
+            cor_fit = np.polyval(
+                np.polyfit(self.positions, cor_raw, degree), sinos)
+        else:
+            cor_fit = np.zeros(sinos.shape)
+            cor_fit[:] = np.mean(cor_raw)
 
         self.populate_meta_data('cor_raw', cor_raw)
         self.populate_meta_data('centre_of_rotation', cor_fit)
@@ -209,15 +276,22 @@ class VoCentering(BaseFilter, CpuPlugin):
 
         self.orig_full_shape = in_dataset[0].get_shape()
 
-        # if preview parameters exist then use these
-        # else get the size of the data
-        # get n processes and take 4 different sets of 5 from the data if this is feasible based on the data size.
-        # calculate the slice list here and determine if it is feasible, else apply to max(n_processes, data_size)
-
-        # reduce the data as per data_subset parameter
-        in_dataset[0].get_preview().set_preview(self.parameters['preview'],
+        # if preview parameters exist then use these, else sample the data
+        preview = list(self.parameters['preview'])
+        if not preview and self.parameters['n_sinograms']:
+            preview = self.__get_sample_preview(in_dataset[0])
+        in_dataset[0].get_preview().set_preview(preview,
                                                 revert=self.orig_full_shape)
 
+        # spread the sinograms over the processes
+        dim = in_dataset[0].get_data_patterns()['SINOGRAM']['slice_dir'][0]
+        starts, stops, steps, chunks = \
+            in_dataset[0].get_preview().get_starts_stops_steps()
+        self.positions = np.arange(starts[dim], stops[dim], steps[dim])
+        nProcs = len(self.exp.meta_data.get_meta_data('processes'))
+        self.frames = self.__get_frames(in_dataset[0].get_shape()[dim],
+                                        nProcs)
+
         in_pData, out_pData = self.get_plugin_datasets()
         in_pData[0].plugin_data_setup('SINOGRAM', self.get_max_frames())
         # copy all required information from in_dataset[0]
@@ -243,16 +317,55 @@ class VoCentering(BaseFilter, CpuPlugin):
 
         self.exp.log(self.name + " End")
 
+    def __get_frames(self, n_sinos, nProcs):
+        """ Get the largest number of frames, up to the limit and the number
+        of sinograms per process, that divides the sinograms into equal
+        groups (the cor_fit dataset is longer than the sampled sinograms, so
+        a short final group cannot be written to it).
+        """
+        frames = int(min(self.get_max_frames_limit(),
+                         max(1, np.ceil(n_sinos/float(nProcs)))))
+        while n_sinos % frames:
+            frames -= 1
+        return frames
+
+    def __get_sample_preview(self, data):
+        """ Get a preview of ``n_sinograms`` sinograms, spread evenly over
+        the sinogram slice dimension, with the rotation angles reduced by the
+        ``downsample`` step.
+        """
+        shape = data.get_shape()
+        preview = ['0:end:1:1']*len(shape)
+        dim = data.get_data_patterns()['SINOGRAM']['slice_dir'][0]
+        n_sinos = min(self.parameters['n_sinograms'], shape[dim])
+        step = shape[dim]//n_sinos
+        first = (shape[dim] - 1 - step*(n_sinos - 1))//2
+        preview[dim] = '%i:%i:%i:1' % (first, first + step*(n_sinos - 1) + 1,
+                                       step)
+        angle_dim = data.find_axis_label_dimension('rotation_angle')
+        if angle_dim is not None and self.parameters['downsample'] > 1:
+            preview[angle_dim] = '0:end:%i:1' % self.parameters['downsample']
+        return preview
+
     def nOutput_datasets(self):
         return 2
 
     def get_max_frames(self):
         """
-        This filter processes 1 frame at a time
+        This filter processes up to 8 frames at a time, or fewer if there
+        are only a few frames per process
 
-         :returns:  1
+         :returns:  the number of frames
         """
-        return 1
+        return self.frames
+
+    def get_max_frames_limit(self):
+        return 8
+
+    def _set_auto_max_frames(self, nFrames=None):
+        # the number of frames is chosen in setup to divide the sampled
+        # sinograms evenly, so it is not tuned to the working set
+        return None
 
     def get_citation_information(self):
         cite_info = CitationInformation()
@@ -25,6 +25,8 @@ import h5py
 import logging
 import numpy as np
 
+import savu.data.loader_cache as lc
+import savu.data.shared_memory as shm
 from savu.plugins.base_loader import BaseLoader
 from savu.plugins.utils import register_plugin
 
@@ -138,15 +140,15 @@ class NxtomoLoader(BaseLoader):
             data_obj.set_shape(data_obj.data.get_shape())
         except KeyError:
             logging.warn("An image key was not found.")
-            try:
-                mData = data_obj.meta_data
-                entry = 'entry1/tomo_entry/instrument/detector/flatfield'
-                mData.set_meta_data('flat', data_obj.backing_file[entry][...])
-                entry = 'entry1/tomo_entry/instrument/detector/darkfield'
-                mData.set_meta_data('dark', data_obj.backing_file[entry][...])
-            except KeyError:
-                logging.warn("Dark and flat data was not found in input "
-                             "file.")
+            for name in ['flat', 'dark']:
+                entry = 'entry1/tomo_entry/instrument/detector/%sfield' % name
+                if entry not in data_obj.backing_file:
+                    logging.warn("Dark and flat data was not found in input "
+                                 "file.")
+                    break
+                data_obj.meta_data.set_meta_data(name, shm.share_array(
+                    self.exp, lambda entry=entry:
+                    data_obj.backing_file[entry][...]))
 
     def __get_image(self, name, key, data_obj):
         import os
@@ -157,15 +159,22 @@ class NxtomoLoader(BaseLoader):
             fpath = \
                 os.path.abspath(__file__).split('savu')[0] + 'savu/' + fpath
 
-        h5file = h5py.File(fpath, 'r')
-        try:
-            image_key = \
-                h5file['entry1/tomo_entry/instrument/detector/image_key']
-            data = h5file[self.parameters['data_path']][
-                image_key == key, ...].mean(0)*int(scale)
-        except KeyError:
-            data = h5file[fentry][...].mean(0)*int(scale)
-        data_obj.meta_data.set_meta_data(name, data)
+        def get_image():
+            h5file = h5py.File(fpath, 'r')
+            try:
+                image_key = \
+                    h5file['entry1/tomo_entry/instrument/detector/image_key']
+                return h5file[self.parameters['data_path']][
+                    image_key == key, ...].mean(0)*int(scale)
+            except KeyError:
+                return h5file[fentry][...].mean(0)*int(scale)
+
+        params = (fentry, scale, self.parameters['data_path'], key)
+        share_key = (name, fpath, params, os.path.getmtime(fpath))
+        data_obj.meta_data.set_meta_data(name, shm.share_array(
+            self.exp, lambda: lc.load_or_compute(
+                self.exp, fpath, name, get_image, params=params),
+            key=share_key))
 
     def __set_rotation_angles(self, data_obj):
         angles = self.parameters['angles']
@@ -22,10 +22,11 @@
 """
 
 import logging
+import copy
 import inspect
 import numpy as np
 
-from savu.plugins import utils as pu
+from savu.plugins import plugin_catalogue as pc
 from savu.plugins.plugin_datasets import PluginDatasets
 
 
@@ -41,6 +42,17 @@ class Plugin(PluginDatasets):
         self.parameters_types = {}
         self.parameters_desc = {}
         self.chunk = False
+        self.auto_frames = None
+        self.__defaults = None
+
+    def _reset(self):
+        """ Return the plugin to its newly created state, so the same
+        instance can be set up again for a new set of Data objects.  The
+        parameter defaults are not parsed again.
+        """
+        defaults = self.__defaults
+        self.__init__()
+        self.__defaults = defaults
 
     def _main_setup(self, exp, params):
         """ Performs all the required plugin setup.
@@ -61,6 +73,94 @@ class Plugin(PluginDatasets):
         for data in in_datasets + out_datasets:
             data._finalise_patterns()
 
+    def get_max_frames_limit(self):
+        """ The largest number of frames this plugin can process at a time
+        when the number of frames is chosen automatically (see
+        :meth:`_set_auto_max_frames`).  Override to allow larger groups.
+
+        :returns: maximum number of frames or None for the number of frames
+            declared by :meth:`get_max_frames`
+        :rtype: int
+        """
+        return None
+
+    def _set_auto_max_frames(self, nFrames=None):
+        """ Choose the number of frames to process at a time from the target
+        working set size, ``working_set`` (in MB), in the experiment meta
+        data.
+
+        The group size is the largest that keeps all padded input and output
+        frames of a group within the working set, bounded by
+        :meth:`get_max_frames_limit` (the declared group size by default)
+        and the number of frames per process, and aligned with the hdf5
+        chunks of the first input dataset.  It is never smaller than 2, so
+        the frame dimension is not squeezed out of the data the plugin
+        receives.  Plugins that process a single frame at a time are
+        unchanged.
+
+        :keyword int nFrames: Use this (previously chosen) value instead.
+        :returns: the number of frames chosen, or None if unchanged
+        :rtype: int
+        """
+        try:
+            working_set = self.exp.meta_data.get_meta_data('working_set')
+        except KeyError:
+            return None
+        if not working_set or not hasattr(self, 'get_max_frames'):
+            return None
+
+        in_pData, out_pData = self.get_plugin_datasets()
+        pData_list = in_pData + out_pData
+        frames = set([p.meta_data.get_meta_data('nFrames') for p in
+                      pData_list])
+        if not in_pData or len(frames) != 1 or 1 in frames:
+            return None
+
+        if not nFrames:
+            nFrames = self.__get_auto_max_frames(
+                working_set*1e6, pData_list, frames.pop())
+        for pData in pData_list:
+            pData._reset_frame_chunk(nFrames)
+        self.auto_frames = nFrames
+        logging.info("%s: processing %i frames at a time (working set %s MB)",
+                     self.name, nFrames, working_set)
+        return nFrames
+
+    def __get_auto_max_frames(self, working_set, pData_list, declared):
+        """ Calculate the number of frames in a group, no larger than the
+        limit (or the declared group size) and no smaller than 2. """
+        def group_bytes(n):
+            return sum([p._get_group_size(n)*self.__get_itemsize(p) for p in
+                        pData_list])
+
+        fixed = group_bytes(0)
+        per_frame = group_bytes(1) - fixed
+        nFrames = max(1, int((working_set - fixed)/per_frame))
+
+        pData = pData_list[0]
+        slice_dir = pData.get_slice_directions()[0]
+        nProcs = len(self.exp.meta_data.get_meta_data('processes'))
+        total = pData.data_obj.get_shape()[slice_dir]
+        nFrames = min(nFrames, int(np.ceil(total/float(nProcs))))
+        nFrames = min(nFrames, self.get_max_frames_limit() or declared)
+
+        chunks = getattr(getattr(pData.data_obj, 'data', None), 'chunks',
+                         None)
+        chunk = chunks[slice_dir] if chunks else 1
+        if chunk > 1 and nFrames >= chunk:
+            nFrames -= nFrames % chunk
+        elif chunk > 1:
+            nFrames = max([d for d in range(1, nFrames+1) if not chunk % d])
+        return max(nFrames, 2)
+
+    def __get_itemsize(self, pData):
+        """ The item size of a dataset, assuming float32 if the backing data
+        does not exist yet. """
+        try:
+            return np.dtype(pData.data_obj.data.dtype).itemsize
+        except AttributeError:
+            return np.dtype(np.float32).itemsize
+
     def _set_parameters_this_instance(self, indices):
         """ Determines the parameters for this instance of the plugin, in the
         case of parameter tuning.
@@ -108,16 +208,20 @@ class Plugin(PluginDatasets):
         """
         for clazz in inspect.getmro(self.__class__)[::-1]:
             if clazz != object:
-                full_description = pu.find_args(clazz, self)
+                full_description = pc.find_args(clazz, self)
                 for item in full_description:
                     self.parameters[item['name']] = item['default']
                     self.parameters_types[item['name']] = item['dtype']
                     self.parameters_desc[item['name']] = item['desc']
 
     def initialise_parameters(self):
-        self.parameters = {}
-        self.parameters_types = {}
-        self._populate_default_parameters()
+        if self.__defaults is None:
+            self.parameters = {}
+            self.parameters_types = {}
+            self._populate_default_parameters()
+            self.__defaults = (self.parameters, self.parameters_types)
+        self.parameters, self.parameters_types = \
+            copy.deepcopy(self.__defaults)
         self.multi_params_dict = {}
         self.extra_dims = []
 
@@ -0,0 +1,248 @@
+# Copyright 2016 Diamond Light Source Ltd.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+.. module:: plugin_catalogue
+   :platform: Unix
+   :synopsis: An on-disk catalogue of plugin classes and their parsed \
+       parameters, so plugin docstrings are only parsed when they change.
+
+.. moduleauthor:: Nicola Wadeson <scientificsoftware@diamond.ac.uk>
+
+"""
+
+import os
+import sys
+import copy
+import json
+import inspect
+import logging
+import importlib
+
+import savu
+import savu.plugins.utils as pu
+
+CATALOGUE_VERSION = 1
+
+__catalogue = {}
+__checked = set()
+__scanned = []
+__evaluated = {}
+
+
+def get_catalogue_path():
+    """ The catalogue file, which can be set with the SAVU_PLUGIN_CATALOGUE
+    environment variable. """
+    path = os.getenv('SAVU_PLUGIN_CATALOGUE')
+    if path:
+        return path
+    return os.path.join(os.path.expanduser("~"), '.savu',
+                        'plugin_catalogue.json')
+
+
+def __byteify(value):
+    """ Convert the unicode strings read by json to str. """
+    if isinstance(value, dict):
+        return {__byteify(k): __byteify(v) for k, v in value.iteritems()}
+    elif isinstance(value, list):
+        return [__byteify(v) for v in value]
+    elif isinstance(value, unicode):
+        return value.encode('utf-8')
+    return value
+
+
+def _get_catalogue():
+    """ Get the catalogue, reading it from disk the first time. """
+    if not __catalogue:
+        __catalogue.update({'version': CATALOGUE_VERSION, 'classes': {},
+                            'plugins': {}, 'files': {}, 'modified': False})
+        try:
+            with open(get_catalogue_path(), 'r') as cfile:
+                catalogue = __byteify(json.load(cfile))
+            if catalogue.get('version') == CATALOGUE_VERSION:
+                __catalogue.update(catalogue)
+                __catalogue['modified'] = False
+        except (IOError, ValueError):
+            pass
+    return __catalogue
+
+
+def save():
+    """ Write the catalogue to disk, if it has changed. """
+    catalogue = _get_catalogue()
+    if not catalogue['modified']:
+        return
+    path = get_catalogue_path()
+    tmp_path = '%s.%i' % (path, os.getpid())
+    try:
+        if not os.path.exists(os.path.dirname(path)):
+            os.makedirs(os.path.dirname(path))
+        with open(tmp_path, 'w') as cfile:
+            json.dump(dict((k, v) for k, v in catalogue.iteritems() if k !=
+                           'modified'), cfile)
+        os.rename(tmp_path, path)
+        catalogue['modified'] = False
+    except (IOError, OSError) as e:
+        logging.warn("Unable to save the plugin catalogue %s: %s", path, e)
+
+
+def _get_module_file(clazz):
+    """ Get the source file of the module a class is defined in. """
+    try:
+        fname = sys.modules[clazz.__module__].__file__
+    except (KeyError, AttributeError):
+        return None
+    if fname.endswith(('.pyc', '.pyo')) and os.path.exists(fname[:-1]):
+        fname = fname[:-1]
+    return os.path.abspath(fname)
+
+
+def _get_mtime(fname):
+    try:
+        return os.path.getmtime(fname)
+    except (OSError, TypeError):
+        return None
+
+
+def _class_path(clazz):
+    return clazz.__module__ + '.' + clazz.__name__
+
+
+def find_arg_strings(dclass, inst=None):
+    """ Get the unevaluated parameters of a class from the catalogue,
+    parsing the class docstring if its module has changed since it was
+    catalogued.
+
+    :returns: [name, description, default value string] for each parameter
+    :rtype: list(list(str))
+    """
+    if not dclass.__doc__:
+        # the docstring is created by the instance, so it cannot be cached
+        docstring = pu.get_docstring(dclass, inst)
+        return pu.find_arg_strings(docstring) if docstring else []
+
+    classes = _get_catalogue()['classes']
+    key = _class_path(dclass)
+    if key in __checked:
+        return classes[key]['args']
+
+    fname = _get_module_file(dclass)
+    mtime = _get_mtime(fname)
+    entry = classes.get(key)
+    if not entry or entry['file'] != fname or entry['mtime'] != mtime:
+        entry = {'file': fname, 'mtime': mtime,
+                 'args': pu.find_arg_strings(dclass.__doc__)}
+        classes[key] = entry
+        _get_catalogue()['modified'] = mtime is not None
+    __checked.add(key)
+    return entry['args']
+
+
+def find_args(dclass, inst=None):
+    """ A cached equivalent of :func:`savu.plugins.utils.find_args`.  The
+    evaluated defaults are kept in memory and a copy is returned, so the
+    caller may change them.
+    """
+    args = find_arg_strings(dclass, inst)
+    if not dclass.__doc__:
+        return pu.eval_args(args)
+    key = _class_path(dclass)
+    if key not in __evaluated or __evaluated[key][0] is not args:
+        __evaluated[key] = (args, pu.eval_args(args))
+    return copy.deepcopy(__evaluated[key][1])
+
+
+def _scan_plugin_files():
+    """ Get the modification time of every python file on the plugin paths.
+    """
+    savu_path = os.path.abspath(os.path.join(savu.__path__[0], os.pardir))
+    files = {}
+    for ppath in pu.get_plugins_paths():
+        ppath = os.path.abspath(ppath)
+        if ppath == savu_path:
+            ppath = os.path.join(savu.__path__[0], 'plugins')
+        for root, dirs, fnames in os.walk(ppath):
+            for fname in fnames:
+                if fname.endswith('.py'):
+                    fname = os.path.join(root, fname)
+                    files[fname] = _get_mtime(fname)
+    return files
+
+
+def _catalogue_plugin(clazz):
+    """ Create the catalogue entry for a registered plugin class. """
+    try:
+        inst = clazz()
+        nIn, nOut = inst.nInput_datasets(), inst.nOutput_datasets()
+    except Exception:
+        inst, nIn, nOut = None, None, None
+
+    params = {}
+    order = []
+    for base in inspect.getmro(clazz)[::-1]:
+        if base != object:
+            for name, desc, default in find_arg_strings(base, inst):
+                if name not in params:
+                    order.append(name)
+                params[name] = [name, desc, default]
+    return {'id': clazz.__module__, 'class': _class_path(clazz),
+            'file': _get_module_file(clazz), 'nInput': nIn, 'nOutput': nOut,
+            'parameters': [params[name] for name in order]}
+
+
+def get_plugins(rebuild=False):
+    """ Get the catalogue of registered plugins.
+
+    The plugin modules are only imported if a python file on the plugin
+    paths has been added, removed or modified since the catalogue was
+    created.
+
+    :keyword bool rebuild: Recreate the catalogue regardless.
+    :returns: plugin name against a dictionary with keys 'id' (module),
+        'class', 'file', 'nInput', 'nOutput' and 'parameters' (a list of
+        [name, description, default value string]).
+    :rtype: dict
+    """
+    catalogue = _get_catalogue()
+    if __scanned and not rebuild:
+        return catalogue['plugins']
+
+    files = _scan_plugin_files()
+    if rebuild or files != catalogue['files'] or not catalogue['plugins']:
+        pu.populate_plugins()
+        catalogue['plugins'] = {}
+        for name, clazz in pu.plugins.iteritems():
+            catalogue['plugins'][name] = _catalogue_plugin(clazz)
+        catalogue['files'] = files
+        catalogue['modified'] = True
+        save()
+    __scanned.append(True)
+    return catalogue['plugins']
+
+
+def get_parameters(name):
+    """ Get the default parameters of a catalogued plugin.
+
+    :returns: parameter name against default value
+    :rtype: dict
+    """
+    args = get_plugins()[name]['parameters']
+    return dict((a['name'], a['default']) for a in pu.eval_args(args))
+
+
+def load_plugin_class(name):
+    """ Import and return a catalogued plugin class. """
+    class_path = get_plugins()[name]['class']
+    module, clazz = class_path.rsplit('.', 1)
+    return getattr(importlib.import_module(module), clazz)
@@ -19,13 +19,14 @@
 .. moduleauthor:: Mark Basham <scientificsoftware@diamond.ac.uk>
 
 """
-import astra
 import numpy as np
 
 from savu.plugins.reconstructions.base_astra_recon import BaseAstraRecon
 from savu.plugins.driver.gpu_plugin import GpuPlugin
 from savu.data.plugin_list import CitationInformation
-from savu.plugins.utils import register_plugin
+from savu.plugins.utils import register_plugin, lazy_import
+
+astra = lazy_import('astra')
 
 
 @register_plugin
@@ -21,12 +21,14 @@
 .. moduleauthor:: Mark Basham <scientificsoftware@diamond.ac.uk>
 """
 import logging
-import astra
 import numpy as np
 import math
 import copy
 
 from savu.plugins.base_recon import BaseRecon
+from savu.plugins.utils import lazy_import
+
+astra = lazy_import('astra')
 
 
 class BaseAstraRecon(BaseRecon):
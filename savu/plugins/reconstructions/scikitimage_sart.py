@@ -24,11 +24,12 @@ from savu.plugins.base_recon import BaseRecon
 from savu.data.plugin_list import CitationInformation
 from savu.plugins.driver.cpu_plugin import CpuPlugin
 
-import skimage.transform as transform
 import numpy as np
 from scipy import ndimage
 
-from savu.plugins.utils import register_plugin
+from savu.plugins.utils import register_plugin, lazy_import
+
+transform = lazy_import('skimage.transform')
 
 
 @register_plugin
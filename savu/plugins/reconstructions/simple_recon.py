@@ -27,6 +27,7 @@ from savu.plugins.driver.cpu_plugin import CpuPlugin
 
 import numpy as np
 
+import savu.data.fft_plans as fftp
 from savu.plugins.utils import register_plugin
 
 
@@ -43,9 +44,10 @@ class SimpleRecon(BaseRecon, CpuPlugin):
         ff = np.arange(sinogram.shape[0])
         ff -= sinogram.shape[0]/2
         ff = np.abs(ff)
-        fs = np.fft.fft(sinogram)
+        fs = fftp.get_plan(sinogram.shape, np.complex128, (0,))(sinogram)
         ffs = fs*ff
-        return np.fft.ifft(ffs).real
+        return fftp.get_plan(sinogram.shape, np.complex128, (0,),
+                             direction='FFTW_BACKWARD')(ffs).real
 
     def _back_project(self, mapping, sino_element, centre):
         mapping_array = mapping+centre
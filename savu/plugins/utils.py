@@ -25,6 +25,8 @@ import os
 import sys
 import re
 import logging
+import pkgutil
+import importlib
 import numpy as np
 import savu
 import copy
@@ -34,6 +36,48 @@ plugins_path = {}
 count = 0
 
 
+class LazyImport(object):
+    """ A stand-in for a module, or an attribute of a module, that is only
+    imported when it is first used.
+
+    Plugin modules are imported on every process just to register, list and
+    check plugins, so heavy third-party dependencies should be imported with
+    :func:`lazy_import` and will then only be loaded by the plugins that run.
+    """
+
+    def __init__(self, module, attr=None):
+        self._lazy_module = module
+        self._lazy_attr = attr
+        self._lazy_obj = None
+
+    def _load(self):
+        """ Import the module (if not already imported). """
+        if self._lazy_obj is None:
+            obj = importlib.import_module(self._lazy_module)
+            self._lazy_obj = getattr(obj, self._lazy_attr) if \
+                self._lazy_attr else obj
+        return self._lazy_obj
+
+    def __getattr__(self, name):
+        if name.startswith('_lazy_'):
+            raise AttributeError(name)
+        return getattr(self._load(), name)
+
+    def __call__(self, *args, **kwargs):
+        return self._load()(*args, **kwargs)
+
+
+def lazy_import(module, attr=None):
+    """ Import a module, or an attribute of a module, at first use.
+
+    :param str module: module name, e.g. 'pyfftw.interfaces.scipy_fftpack'
+    :keyword str attr: an attribute of the module, e.g. 'FastICA'
+    :returns: a stand-in for the module or attribute
+    :rtype: LazyImport
+    """
+    return LazyImport(module, attr)
+
+
 def register_plugin(clazz):
     """decorator to add plugins to a central register"""
     plugins[clazz.__name__] = clazz
@@ -93,12 +137,18 @@ def module2class(module_name):
 def plugin_loader(exp, plugin_dict, **kwargs):
     logging.debug("Running plugin loader")
 
-    try:
-        plugin = load_plugin(plugin_dict['id'])
-    except Exception as e:
-        logging.error("failed to load the plugin")
-        logging.error(e)
-        raise e        
+    plugin_obj = exp.meta_data.plugin_list
+    plugin = plugin_obj._get_plugin_instance(plugin_dict)
+    if plugin:
+        plugin._reset()
+    else:
+        try:
+            plugin = load_plugin(plugin_dict['id'])
+        except Exception as e:
+            logging.error("failed to load the plugin")
+            logging.error(e)
+            raise e
+        plugin_obj._set_plugin_instance(plugin_dict, plugin)
 
     check_flag = kwargs.get('check', False)
     if check_flag:
@@ -106,9 +156,12 @@ def plugin_loader(exp, plugin_dict, **kwargs):
 
     logging.debug("Running plugin main setup")
     plugin._main_setup(exp, plugin_dict['data'])
+    auto_frames = plugin._set_auto_max_frames(plugin_dict.get('auto_frames'))
+    if auto_frames:
+        plugin_dict['auto_frames'] = auto_frames
 
     if check_flag is True:
-        exp.meta_data.plugin_list._set_datasets_list(plugin)
+        plugin_obj._set_datasets_list(plugin)
 
     logging.info("finished plugin loader")
     return plugin
@@ -117,14 +170,16 @@ def plugin_loader(exp, plugin_dict, **kwargs):
 def run_plugins(exp, plugin_list, **kwargs):
     n_loaders = exp.meta_data.plugin_list._get_n_loaders()
 
+    check = kwargs.get('check', False)
     for i in range(n_loaders):
         plugin_loader(exp, plugin_list[i])
+    if check:
+        exp._save_loaded_data()
 
     exp._barrier()
     exp._set_nxs_filename()
     exp._barrier()
 
-    check = kwargs.get('check', False)
     for i in range(n_loaders, len(plugin_list)-1):
         exp._barrier()
         plugin_loader(exp, plugin_list[i], check=check)
@@ -192,6 +247,15 @@ def find_args(dclass, inst=None):
     """
     Finds the parameters list from the docstring
     """
+    docstring = get_docstring(dclass, inst)
+    if not docstring:
+        return []
+    return eval_args(find_arg_strings(docstring))
+
+
+def get_docstring(dclass, inst=None):
+    """ Get the class docstring that holds the parameter descriptions.
+    """
     docstring = None
     if not dclass.__doc__:
         if inst:
@@ -199,15 +263,27 @@ def find_args(dclass, inst=None):
             docstring = dclass._override_class_docstring.__doc__
     else:
         docstring = dclass.__doc__
+    return docstring
 
-    if not docstring:
-        return []
 
+def find_arg_strings(docstring):
+    """ Parse the parameters from a docstring, without evaluating the
+    default values.
+
+    :returns: [name, description, default value string] for each parameter
+    :rtype: list(list(str))
+    """
     lines = docstring.split('\n')
     param_regexp = re.compile('^:param (?P<param>\w+):\s?(?P<doc>\w.*[^ ])\s' +
                               '?Default:\s?(?P<default>.*[^ ])$')
     args = [param_regexp.findall(line.strip(' .')) for line in lines]
-    args = [arg[0] for arg in args if len(arg)]
+    return [list(arg[0]) for arg in args if len(arg)]
+
+
+def eval_args(args):
+    """ Evaluate the default values of parameters found by
+    :func:`find_arg_strings`.
+    """
     return [{'dtype': type(value),
              'name': a[0], 'desc': a[1],
              'default': value} for a in args for value in [eval(a[2])]]
@@ -245,3 +321,23 @@ def get_plugins_paths():
     # now add the savu plugin path, which is now the whole path.
     plugins_paths.append(os.path.join(savu.__path__[0], os.pardir))
     return plugins_paths
+
+
+def populate_plugins():
+    """ Import all plugin modules found on the plugin paths, so that every
+    plugin class is registered in ``plugins``.
+    """
+    plugins_path = get_plugins_paths()
+    for loader, module_name, is_pkg in pkgutil.walk_packages(plugins_path):
+        try:
+            # if the module is in savu, but not a plugin, then ignore
+            if "savu" in module_name.split('.'):
+                if "plugins" not in module_name.split('.'):
+                    continue
+            # setup.py is included in this list which should also be ignored
+            if module_name in ["setup", "savu.plugins.utils"]:
+                continue
+            if module_name not in sys.modules:
+                loader.find_module(module_name).load_module(module_name)
+        except Exception:
+            pass
@@ -0,0 +1,251 @@
+# Copyright 2016 Diamond Light Source Ltd.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+.. module:: savu_daemon
+   :platform: Unix
+   :synopsis: A long-running Savu process that runs process lists on \
+       request, over a local socket, and returns the final results.
+
+.. moduleauthor:: Nicola Wadeson <scientificsoftware@diamond.ac.uk>
+
+"""
+
+import os
+import sys
+import h5py
+import socket
+import struct
+import logging
+import optparse
+import tempfile
+import traceback
+import cPickle as pickle
+
+import savu.data.output_cache as oc
+from savu.data.plugin_list import PluginList
+from savu.core.plugin_runner import PluginRunner
+
+HEADER = '!Q'
+
+
+def __option_parser():
+    """ Option parser for command line arguments.
+    """
+    usage = "%prog [options] socket_file"
+    parser = optparse.OptionParser(usage=usage)
+    parser.add_option("-o", "--out", dest="out_path",
+                      help="Folder for the output of each request "
+                      "(default: a temporary folder)", default=None)
+    parser.add_option("-c", "--cache", dest="cache_dir",
+                      help="Loader cache folder (default: out/cache)",
+                      default=None)
+    parser.add_option("-x", "--output_cache", dest="output_cache",
+                      help="Plugin output cache folder (default: "
+                      "out/output_cache)", default=None)
+    parser.add_option("-s", "--output_cache_size", dest="output_cache_size",
+                      type="float", help="Maximum size of the plugin output "
+                      "cache in MB (default: 10000)", default=10000)
+    parser.add_option("-v", "--verbose", action="store_true", dest="verbose",
+                      help="Display all debug log messages", default=False)
+    return parser.parse_args()
+
+
+def _send(sock, obj):
+    """ Send a pickled object, preceded by its length. """
+    msg = pickle.dumps(obj, pickle.HIGHEST_PROTOCOL)
+    sock.sendall(struct.pack(HEADER, len(msg)) + msg)
+
+
+def _recv(sock):
+    """ Receive an object sent by :func:`_send`. """
+    def recv_bytes(n):
+        chunks = []
+        while n:
+            chunk = sock.recv(min(n, 1 << 20))
+            if not chunk:
+                raise IOError("The connection was closed")
+            chunks.append(chunk)
+            n -= len(chunk)
+        return ''.join(chunks)
+
+    size = struct.unpack(HEADER, recv_bytes(struct.calcsize(HEADER)))[0]
+    return pickle.loads(recv_bytes(size))
+
+
+def send_request(socket_file, request):
+    """ Send a request to a running Savu daemon and wait for the reply.
+
+    A request is a dictionary with the keys
+
+        - 'data_file': the input data file
+        - 'process_file': the process list
+        - 'preview' (optional): a preview (slice list) for the first
+          loader.  Entries have the form ``start:stop:step:chunk``, and the
+          short forms ``start:stop`` and ``start:stop:step`` are also
+          accepted.
+        - 'shutdown' (optional): stop the daemon
+
+    :returns: the final results as a dictionary of dataset name against
+        numpy array
+    :rtype: dict
+    """
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    sock.connect(socket_file)
+    try:
+        _send(sock, request)
+        reply = _recv(sock)
+    finally:
+        sock.close()
+    if reply['status'] != 'ok':
+        raise Exception("The Savu daemon failed to run the request:\n%s" %
+                        reply['message'])
+    return reply['results']
+
+
+def _normalise_preview(preview):
+    """ Complete the short form entries of a preview, e.g. '40:42', with the
+    default start, stop, step and chunk values, as the loader expects
+    entries of the form ``start:stop:step:chunk``. """
+    defaults = ['0', 'end', '1', '1']
+    full = []
+    for entry in preview:
+        vals = entry.split(':')
+        if len(vals) > 1:
+            vals += ['']*(len(defaults) - len(vals))
+            vals = [v if v else d for v, d in zip(vals, defaults)]
+        full.append(':'.join(vals))
+    return full
+
+
+class SavuDaemon(object):
+    """
+    The SavuDaemon class runs process lists, in a single process, in
+    response to requests on a unix domain socket.  The plugin modules
+    remain imported between requests, loader products (e.g. dark and flat
+    fields) are kept in memory and plugin outputs are cached on disk, so a
+    request that only changes the parameters of the later plugins in a
+    process list only runs those plugins.  The least recently used plugin
+    outputs are removed once the cache exceeds ``output_cache_size`` MB.
+    """
+
+    def __init__(self, socket_file, out_path=None, cache_dir=None,
+                 output_cache=None, output_cache_size=10000, verbose=False):
+        self.socket_file = socket_file
+        self.out_path = out_path if out_path else tempfile.mkdtemp()
+        self.cache_dir = cache_dir if cache_dir else \
+            os.path.join(self.out_path, 'cache')
+        self.output_cache = output_cache if output_cache else \
+            os.path.join(self.out_path, 'output_cache')
+        self.output_cache_size = output_cache_size
+        self.verbose = verbose
+        self.count = 0
+
+    def _get_options(self, request):
+        """ Create the tomo_recon options for a request. """
+        self.count += 1
+        out_path = os.path.join(self.out_path, 'request_%i' % self.count)
+        os.makedirs(out_path)
+        options = {'transport': 'hdf5', 'process_names': 'CPU0',
+                   'data_file': request['data_file'],
+                   'process_file': request['process_file'],
+                   'out_path': out_path, 'inter_path': out_path,
+                   'log_path': out_path, 'verbose': self.verbose,
+                   'quiet': not self.verbose, 'cache_dir': self.cache_dir,
+                   'output_cache': self.output_cache}
+
+        if request.get('preview') is not None:
+            plugin_list = PluginList()
+            plugin_list._populate_plugin_list(request['process_file'])
+            plugin_list.plugin_list[0]['data']['preview'] = \
+                _normalise_preview(request['preview'])
+            # the plugin list is passed in the options
+            options['run_type'] = 'test'
+            options['plugin_list'] = plugin_list.plugin_list
+        return options
+
+    def _run(self, request):
+        """ Run the process list of a request.
+
+        :returns: the final results
+        :rtype: dict
+        """
+        logger = logging.getLogger()
+        handlers = list(logger.handlers)
+        try:
+            exp = PluginRunner(self._get_options(request))._run_plugin_list()
+        finally:
+            for handler in logger.handlers[:]:
+                if handler not in handlers:
+                    logger.removeHandler(handler)
+                    handler.close()
+            oc.prune(self.output_cache, self.output_cache_size*1e6)
+        return self.__get_results(exp.meta_data.get_meta_data('nxs_filename'))
+
+    def __get_results(self, nxs_filename):
+        results = {}
+        with h5py.File(nxs_filename, 'r') as nxs_file:
+            entry = nxs_file['entry']
+            for name in entry.keys():
+                if name.startswith('final_result_'):
+                    results[name[len('final_result_'):]] = \
+                        entry[name]['data'][...]
+        return results
+
+    def serve(self):
+        """ Accept requests until a shutdown request is received. """
+        if os.path.exists(self.socket_file):
+            os.remove(self.socket_file)
+        server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        server.bind(self.socket_file)
+        server.listen(1)
+        print("Savu daemon listening on %s" % self.socket_file)
+        try:
+            while True:
+                conn = server.accept()[0]
+                try:
+                    request = _recv(conn)
+                    if request.get('shutdown'):
+                        _send(conn, {'status': 'ok', 'results': {}})
+                        break
+                    try:
+                        reply = {'status': 'ok',
+                                 'results': self._run(request)}
+                    except Exception:
+                        reply = {'status': 'error',
+                                 'message': traceback.format_exc()}
+                    _send(conn, reply)
+                except IOError as e:
+                    logging.warn("Savu daemon connection failed: %s", e)
+                finally:
+                    conn.close()
+        finally:
+            server.close()
+            os.remove(self.socket_file)
+
+
+def main():
+    (options, args) = __option_parser()
+    if len(args) is not 1:
+        print("The socket file needs to be specified")
+        sys.exit(1)
+    SavuDaemon(args[0], out_path=options.out_path,
+               cache_dir=options.cache_dir,
+               output_cache=options.output_cache,
+               output_cache_size=options.output_cache_size,
+               verbose=options.verbose).serve()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,50 @@
+# Copyright 2016 Diamond Light Source Ltd.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+.. module:: auto_max_frames_test
+   :platform: Unix
+   :synopsis: unittest test classes for the automatic choice of the number \
+       of frames processed at a time
+
+.. moduleauthor:: Nicola Wadeson <scientificsoftware@diamond.ac.uk>
+
+"""
+
+import unittest
+
+import savu.test.test_utils as tu
+import savu.plugins.utils as pu
+from savu.test.travis.framework_tests.plugin_runner_test import \
+    run_protected_plugin_runner_no_process_list
+
+
+class AutoMaxFramesTest(unittest.TestCase):
+
+    def __get_auto_frames(self, plugin, working_set):
+        options = tu.set_experiment('tomo')
+        options['working_set'] = working_set
+        exp = run_protected_plugin_runner_no_process_list(options, plugin)
+        return exp.meta_data.plugin_list.plugin_list[1]['auto_frames']
+
+    def test_working_set(self):
+        plugin = 'savu.plugins.filters.median_filter'
+        declared = pu.load_plugin(plugin).get_max_frames()
+        small = self.__get_auto_frames(plugin, 0.01)
+        large = self.__get_auto_frames(plugin, 10)
+        self.assertTrue(2 <= small < declared)
+        self.assertEqual(large, declared)
+
+if __name__ == "__main__":
+    unittest.main()
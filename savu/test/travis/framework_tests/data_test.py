@@ -21,9 +21,17 @@
 
 """
 
+import os
+import copy
+import shutil
+import tempfile
 import unittest
+import numpy as np
 
 import savu.test.test_utils as tu
+import savu.data.loader_cache as lc
+import savu.data.shared_memory as shm
+from savu.data.meta_data import MetaData
 from savu.core.plugin_runner import PluginRunner
 
 
@@ -41,5 +49,79 @@ class Test(unittest.TestCase):
         self.assertEqual(exp.index['in_data'][out_data_name].get_shape(),
                          (91, 68, 80))
 
+    def test_meta_data_copy(self):
+        mData = MetaData()
+        mData.set_meta_data(['patterns', 'SINOGRAM'], {'core_dir': (1,)})
+        mData.set_meta_data('dark', np.ones((10, 10)))
+        new = mData._shared_copy()
+        self.assertTrue(new.get_meta_data('dark').base is
+                        mData.get_meta_data('dark'))
+        with self.assertRaises(ValueError):
+            new.get_meta_data('dark')[0] = 0
+        # the original is unchanged and a deep copy copies the values
+        self.assertTrue(mData.get_meta_data('dark').flags.writeable)
+        deep = copy.deepcopy(mData)
+        self.assertFalse(np.may_share_memory(deep.get_meta_data('dark'),
+                                             mData.get_meta_data('dark')))
+        new.set_meta_data(['patterns', 'SINOGRAM', 'core_dir'], (2,))
+        new.set_meta_data('dark', np.zeros((10, 10)))
+        self.assertEqual(
+            mData.get_meta_data(['patterns', 'SINOGRAM', 'core_dir']), (1,))
+        self.assertEqual(mData.get_meta_data('dark').sum(), 100)
+
+    def test_share_array_without_mpi(self):
+        options = tu.set_experiment('tomoRaw')
+        plugin = 'savu.plugins.corrections.dark_flat_field_correction'
+        tu.set_plugin_list(options, plugin)
+        exp = PluginRunner(options)._run_plugin_list()
+        array = np.arange(10)
+        self.assertTrue(shm.share_array(exp, array) is array)
+        self.assertFalse(array.flags.writeable)
+        self.assertTrue(shm.share_array(exp, lambda: array) is array)
+        self.assertTrue(shm.compute_once(exp, lambda: array) is array)
+
+    def test_compute_once_error(self):
+        class DummyExperiment(object):
+            meta_data = MetaData({'mpi': True})
+
+        def fail():
+            raise IOError("unreadable")
+
+        exp = DummyExperiment()
+        self.assertRaises(IOError, shm.compute_once, exp, fail)
+        self.assertRaises(IOError, shm.share_array, exp, fail)
+        self.assertEqual(shm.compute_once(exp, lambda: 3), 3)
+        shm.free_shared()
+
+    def test_loader_cache(self):
+        class DummyExperiment(object):
+            meta_data = MetaData()
+
+        cache_dir = tempfile.mkdtemp()
+        exp = DummyExperiment()
+        exp.meta_data.set_meta_data('cache_dir', cache_dir)
+        fname = tu.get_test_data_path('24888.nxs')
+        calls = []
+
+        def func():
+            calls.append(1)
+            return np.arange(5, dtype=np.float32)
+
+        for i in range(2):
+            value = lc.load_or_compute(exp, fname, 'dark', func, params=(1,))
+            self.assertEqual(list(value), range(5))
+        self.assertEqual(len(calls), 1)
+        lc.load_or_compute(exp, fname, 'dark', func, params=(2,))
+        self.assertEqual(len(calls), 2)
+        self.assertEqual(len(os.listdir(cache_dir)), 2)
+
+        memory = getattr(lc, '__memory')
+        os.environ['SAVU_CACHE_MEMORY'] = str(50e-6)
+        for i in range(3, 6):
+            lc.load_or_compute(exp, fname, 'dark', func, params=(i,))
+        self.assertEqual(len(memory), 2)
+        os.environ.pop('SAVU_CACHE_MEMORY')
+        shutil.rmtree(cache_dir)
+
 if __name__ == "__main__":
     unittest.main()
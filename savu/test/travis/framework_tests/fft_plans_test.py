@@ -0,0 +1,95 @@
+# Copyright 2016 Diamond Light Source Ltd.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+.. module:: fft_plans_test
+   :platform: Unix
+   :synopsis: unittest test class for the shared FFT plans
+
+.. moduleauthor:: Nicola Wadeson <scientificsoftware@diamond.ac.uk>
+
+"""
+
+import os
+import shutil
+import tempfile
+import unittest
+import numpy as np
+
+import savu.data.fft_plans as fftp
+import savu.test.test_utils as tu
+from savu.test.travis.framework_tests.plugin_runner_test import \
+    run_protected_plugin_runner_no_process_list
+
+
+class FftPlansTest(unittest.TestCase):
+
+    def test_real_plans(self):
+        shape = (3, 20, 30)
+        fft = fftp.get_plan(shape, np.float32, (1, 2))
+        ifft = fftp.get_plan(shape, np.float32, (1, 2),
+                             direction='FFTW_BACKWARD')
+        self.assertTrue(fft is fftp.get_plan(shape, np.float32, (1, 2)))
+        self.assertEqual(fft.output_array.shape, (3, 20, 16))
+
+        data = np.random.rand(*shape).astype(np.float32)
+        spectrum = fft(data)
+        self.assertTrue(np.allclose(spectrum, np.fft.rfftn(data, axes=(1, 2)),
+                                    rtol=1e-3, atol=1e-3))
+        self.assertTrue(np.allclose(ifft(spectrum), data, atol=1e-5))
+
+    def test_complex_plans(self):
+        data = np.random.rand(16, 8)
+        fft = fftp.get_plan(data.shape, np.complex128, (0,))
+        ifft = fftp.get_plan(data.shape, np.complex128, (0,),
+                             direction='FFTW_BACKWARD')
+        spectrum = fft(data)
+        self.assertTrue(np.allclose(spectrum, np.fft.fft(data, axis=0)))
+        self.assertTrue(np.allclose(ifft(spectrum).real, data))
+
+    def test_plan_memory(self):
+        shape = (64, 64)
+        nbytes = 64*64*8 + 64*33*16
+        os.environ['SAVU_FFT_MEMORY'] = str(2.5*nbytes/1e6)
+        try:
+            fftp.clear_plans()
+            first = fftp.get_plan(shape, np.float64, (0, 1))
+            second = fftp.get_plan(shape, np.float64, (1,))
+            self.assertTrue(first is fftp.get_plan(shape, np.float64, (0, 1)))
+            # the least recently used plan is discarded
+            fftp.get_plan(shape, np.float64, (0,))
+            self.assertTrue(first is fftp.get_plan(shape, np.float64, (0, 1)))
+            self.assertFalse(second is fftp.get_plan(shape, np.float64, (1,)))
+            fftp.clear_plans()
+            self.assertFalse(first is fftp.get_plan(shape, np.float64, (0, 1)))
+        finally:
+            del os.environ['SAVU_FFT_MEMORY']
+            fftp.clear_plans()
+
+    def test_wisdom(self):
+        if fftp._get_pyfftw() is None:
+            raise unittest.SkipTest('pyfftw is not available')
+        cache_dir = tempfile.mkdtemp()
+        try:
+            options = tu.set_experiment('tomo')
+            options['cache_dir'] = cache_dir
+            plugin = 'savu.plugins.filters.paganin_filter'
+            run_protected_plugin_runner_no_process_list(options, plugin)
+            self.assertTrue([f for f in os.listdir(cache_dir) if
+                             f.startswith('fftw_wisdom')])
+        finally:
+            shutil.rmtree(cache_dir)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,99 @@
+# Copyright 2016 Diamond Light Source Ltd.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+.. module:: output_cache_test
+   :platform: Unix
+   :synopsis: unittest test class for the plugin output cache
+
+.. moduleauthor:: Nicola Wadeson <scientificsoftware@diamond.ac.uk>
+
+"""
+
+import os
+import shutil
+import tempfile
+import unittest
+import numpy as np
+
+import savu.test.test_utils as tu
+import savu.data.output_cache as oc
+from savu.test.travis.framework_tests.plugin_runner_test import \
+    run_protected_plugin_runner_no_process_list
+
+
+class OutputCacheTest(unittest.TestCase):
+
+    def setUp(self):
+        self.cache_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.cache_dir)
+
+    def __run(self):
+        options = tu.set_experiment('tomoRaw')
+        options['output_cache'] = self.cache_dir
+        plugin = 'savu.plugins.corrections.dark_flat_field_correction'
+        exp = run_protected_plugin_runner_no_process_list(options, plugin)
+        data = exp.index['in_data']['tomo']
+        return options['out_path'], data
+
+    def test_output_cache(self):
+        out_path, data = self.__run()
+        self.assertEqual(len(os.listdir(self.cache_dir)), 1)
+        entry = os.path.join(self.cache_dir, os.listdir(self.cache_dir)[0])
+        self.assertTrue('manifest.json' in os.listdir(entry))
+
+        out_path2, data2 = self.__run()
+        self.assertEqual(len(os.listdir(self.cache_dir)), 1)
+        self.assertEqual(data.get_shape(), data2.get_shape())
+        fname = [f for f in os.listdir(entry) if f.endswith('.h5')][0]
+        self.assertTrue(os.path.samefile(os.path.join(entry, fname),
+                                         os.path.join(out_path2, fname)))
+        self.assertTrue(np.allclose(data.meta_data.get_meta_data('dark'),
+                                    data2.meta_data.get_meta_data('dark')))
+
+    def test_keys(self):
+        out_path, data = self.__run()
+        cache = oc.OutputCache(data.exp)
+        plugin_list = data.exp.meta_data.plugin_list.plugin_list
+        load_class = oc.pu.load_class
+        calls = []
+
+        def count_load_class(name):
+            calls.append(name)
+            return load_class(name)
+
+        oc.pu.load_class = count_load_class
+        try:
+            keys = [cache._get_key(pos) for pos in range(len(plugin_list))]
+        finally:
+            oc.pu.load_class = load_class
+        self.assertEqual(len(calls), len(plugin_list))
+        self.assertEqual(len(set(keys)), len(plugin_list))
+
+    def test_prune(self):
+        for i, name in enumerate(['old', 'new']):
+            entry = os.path.join(self.cache_dir, name)
+            os.makedirs(entry)
+            with open(os.path.join(entry, oc.MANIFEST), 'w') as mfile:
+                mfile.write(' '*100)
+            os.utime(entry, (i, i))
+        oc.prune(self.cache_dir, 150)
+        self.assertEqual(os.listdir(self.cache_dir), ['new'])
+        oc.prune(self.cache_dir, 150)
+        self.assertEqual(os.listdir(self.cache_dir), ['new'])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -25,9 +25,15 @@ import unittest
 
 import savu
 import os
+import json
+import tempfile
 
 from savu.plugins import utils as pu
+from savu.plugins import plugin_catalogue as pc
 from savu.plugins import plugin as test_plugin
+import savu.test.test_utils as tu
+from savu.test.travis.framework_tests.plugin_runner_test import \
+    run_protected_plugin_runner_no_process_list
 
 
 class Test(unittest.TestCase):
@@ -73,5 +79,66 @@ class Test(unittest.TestCase):
         self.assertEqual(plugin.name, "ExampleMedianFilter")
         os.environ["SAVU_PLUGINS_PATH"] = ""
 
+    def test_lazy_import(self):
+        missing = pu.lazy_import('a_module_that_does_not_exist')
+        self.assertRaises(ImportError, getattr, missing, 'attribute')
+        join = pu.lazy_import('os.path', 'join')
+        self.assertEqual(join('a', 'b'), os.path.join('a', 'b'))
+
+    def test_catalogue_find_args(self):
+        plugin = pu.load_plugin("savu.plugins.filters.denoise_bregman_filter")
+        params = pc.find_args(plugin.__class__)
+        self.assertEqual(params, pu.find_args(plugin.__class__))
+        self.assertEqual(params, pc.find_args(plugin.__class__))
+        params[0]['default'] = 'changed'
+        self.assertEqual(pc.find_args(plugin.__class__),
+                         pu.find_args(plugin.__class__))
+
+    def test_catalogue_save(self):
+        fname = os.path.join(tempfile.mkdtemp(), 'plugin_catalogue.json')
+        os.environ["SAVU_PLUGIN_CATALOGUE"] = fname
+        pu.load_plugin("savu.plugins.filters.median_filter")
+        pc._get_catalogue()['modified'] = True
+        pc.save()
+        with open(fname, 'r') as cfile:
+            classes = json.load(cfile)['classes']
+        self.assertTrue('savu.plugins.filters.median_filter.MedianFilter' in
+                        classes)
+        os.environ["SAVU_PLUGIN_CATALOGUE"] = ""
+
+    def test_plugin_instance_reused(self):
+        options = tu.set_experiment('tomoRaw')
+        plugin = 'savu.plugins.corrections.dark_flat_field_correction'
+        exp = run_protected_plugin_runner_no_process_list(options, plugin)
+        plugin_list = exp.meta_data.plugin_list
+        instances = [p for d, p in plugin_list.plugin_instances]
+        self.assertEqual(len(instances), len(plugin_list.plugin_list))
+        self.assertEqual(len(set(instances)), len(instances))
+
+    def test_loader_setup_once(self):
+        from savu.plugins.loaders.nxtomo_loader import NxtomoLoader
+        setup = NxtomoLoader.setup
+        calls = []
+
+        def count_setup(loader):
+            calls.append(loader)
+            setup(loader)
+
+        NxtomoLoader.setup = count_setup
+        try:
+            options = tu.set_experiment('tomoRaw')
+            plugin = 'savu.plugins.corrections.dark_flat_field_correction'
+            run_protected_plugin_runner_no_process_list(options, plugin)
+        finally:
+            NxtomoLoader.setup = setup
+        self.assertEqual(len(calls), 1)
+
+    def test_plugin_reset(self):
+        plugin = pu.load_plugin("savu.plugins.filters.median_filter")
+        plugin._set_parameters({'kernel_size': (1, 5, 5)})
+        plugin._reset()
+        plugin.initialise_parameters()
+        self.assertEqual(plugin.parameters['kernel_size'], (1, 3, 3))
+
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,72 @@
+# Copyright 2016 Diamond Light Source Ltd.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+.. module:: quick_look_test
+   :platform: Unix
+   :synopsis: unittest test class for the quick look run
+
+.. moduleauthor:: Nicola Wadeson <scientificsoftware@diamond.ac.uk>
+
+"""
+
+import os
+import h5py
+import unittest
+
+import savu.test.test_utils as tu
+from savu.test.travis.framework_tests.plugin_runner_test import \
+    run_protected_plugin_runner_no_process_list
+
+
+class QuickLookTest(unittest.TestCase):
+
+    def __get_quick_look_shape(self, options):
+        fname = os.path.join(options['out_path'], 'quicklook',
+                             'quicklook_processed.nxs')
+        self.assertTrue(os.path.exists(fname))
+        with h5py.File(fname, 'r') as nxs_file:
+            entry = nxs_file['entry']
+            name = [k for k in entry.keys() if
+                    k.startswith('final_result_')][0]
+            return entry[name]['data'].shape
+
+    def test_quick_look_frames(self):
+        options = tu.set_experiment('tomo')
+        options['quick_look'] = '3'
+        plugin = 'savu.plugins.reconstructions.simple_recon'
+        exp = run_protected_plugin_runner_no_process_list(options, plugin)
+        shape = self.__get_quick_look_shape(options)
+        full_shape = exp.index['in_data']['tomo'].get_shape()
+        self.assertEqual(sorted(shape)[0], 3)
+        self.assertEqual(len(shape), len(full_shape))
+        self.assertTrue(3 not in full_shape)
+
+    def test_quick_look_preview(self):
+        options = tu.set_experiment('tomo')
+        options['quick_look'] = '10:20:5'
+        plugin = 'savu.plugins.reconstructions.simple_recon'
+        run_protected_plugin_runner_no_process_list(options, plugin)
+        self.assertTrue(2 in self.__get_quick_look_shape(options))
+
+    def test_quick_look_invalid_preview(self):
+        options = tu.set_experiment('tomo')
+        options['quick_look'] = '10:2000'
+        plugin = 'savu.plugins.reconstructions.simple_recon'
+        self.assertRaises(Exception,
+                          run_protected_plugin_runner_no_process_list,
+                          options, plugin)
+
+if __name__ == "__main__":
+    unittest.main()
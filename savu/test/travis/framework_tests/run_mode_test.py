@@ -0,0 +1,74 @@
+# Copyright 2016 Diamond Light Source Ltd.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+.. module:: run_mode_test
+   :platform: Unix
+   :synopsis: unittest test classes for the compute-only and io-only \
+       diagnostic run modes
+
+.. moduleauthor:: Nicola Wadeson <scientificsoftware@diamond.ac.uk>
+
+"""
+
+import os
+import h5py
+import unittest
+import numpy as np
+
+import savu.test.test_utils as tu
+from savu.test.travis.framework_tests.plugin_runner_test import \
+    run_protected_plugin_runner_no_process_list
+
+
+class RunModeTest(unittest.TestCase):
+
+    def __run_correction(self, run_mode):
+        options = tu.set_experiment('tomoRaw')
+        options['run_mode'] = run_mode
+        plugin = 'savu.plugins.corrections.dark_flat_field_correction'
+        run_protected_plugin_runner_no_process_list(options, plugin)
+        fname = [f for f in os.listdir(options['out_path']) if
+                 f.endswith('dark_flat_field_correction.h5')][0]
+        return options['data_file'], os.path.join(options['out_path'], fname)
+
+    def __get_output(self, fname):
+        with h5py.File(fname, 'r') as out_file:
+            entry = out_file.values()[0]
+            return entry['data'][...], entry['data'].id.get_storage_size()
+
+    def test_compute_mode(self):
+        in_file, out_file = self.__run_correction('compute')
+        data, storage = self.__get_output(out_file)
+        self.assertEqual(storage, 0)
+        self.assertFalse(data.any())
+
+    def test_io_mode(self):
+        in_file, out_file = self.__run_correction('io')
+        with h5py.File(in_file, 'r') as raw:
+            entry = raw['entry1/tomo_entry']
+            key = entry['instrument/detector/image_key'][...]
+            projections = entry['data/data'][...][key == 0]
+        data, storage = self.__get_output(out_file)
+        self.assertEqual(data.shape, projections.shape)
+        self.assertTrue(np.array_equal(data, projections.astype(data.dtype)))
+
+    def test_io_mode_reduced_output(self):
+        options = tu.set_experiment('tomo')
+        options['run_mode'] = 'io'
+        plugin = 'savu.plugins.reconstructions.simple_recon'
+        run_protected_plugin_runner_no_process_list(options, plugin)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,69 @@
+# Copyright 2016 Diamond Light Source Ltd.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+.. module:: savu_daemon_test
+   :platform: Unix
+   :synopsis: unittest test class for the Savu daemon
+
+.. moduleauthor:: Nicola Wadeson <scientificsoftware@diamond.ac.uk>
+
+"""
+
+import os
+import time
+import shutil
+import tempfile
+import unittest
+import threading
+
+import savu.test.test_utils as tu
+import savu.savu_daemon as sd
+
+
+class SavuDaemonTest(unittest.TestCase):
+
+    def test_daemon(self):
+        out_path = tempfile.mkdtemp()
+        socket_file = os.path.join(out_path, 'savu.sock')
+        daemon = sd.SavuDaemon(socket_file, out_path=out_path)
+        thread = threading.Thread(target=daemon.serve)
+        thread.start()
+        while not os.path.exists(socket_file):
+            time.sleep(0.1)
+
+        request = {
+            'data_file': tu.get_test_data_path('24737.nxs'),
+            'process_file':
+                tu.get_test_process_path('simple_recon_test_process.nxs')}
+        try:
+            results = sd.send_request(socket_file, request)
+            request['preview'] = [':', '40:42', ':']
+            preview = sd.send_request(socket_file, request)
+        finally:
+            sd.send_request(socket_file, {'shutdown': True})
+            thread.join()
+
+        self.assertEqual(results.keys(), preview.keys())
+        self.assertTrue(len(results) > 0)
+        shutil.rmtree(out_path)
+
+    def test_normalise_preview(self):
+        preview = sd._normalise_preview([':', '40:42', '1:mid:2', '3',
+                                         ':10', '0:end:1:4'])
+        self.assertEqual(preview, ['0:end:1:1', '40:42:1:1', '1:mid:2:1',
+                                   '3', '0:10:1:1', '0:end:1:4'])
+
+if __name__ == "__main__":
+    unittest.main()
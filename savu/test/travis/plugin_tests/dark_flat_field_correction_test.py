@@ -0,0 +1,58 @@
+# Copyright 2016 Diamond Light Source Ltd.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+.. module:: dark_flat_field_correction_test
+   :platform: Unix
+   :synopsis: unittest test class for the dark and flat field correction
+
+.. moduleauthor:: Nicola Wadeson <scientificsoftware@diamond.ac.uk>
+
+"""
+
+import h5py
+import unittest
+import numpy as np
+
+import savu.test.test_utils as tu
+from savu.test.travis.framework_tests.plugin_runner_test import \
+    run_protected_plugin_runner_no_process_list
+
+
+class DarkFlatFieldCorrectionTest(unittest.TestCase):
+
+    def __run(self, pattern, log):
+        options = tu.set_experiment('tomoRaw')
+        plugin = 'savu.plugins.corrections.dark_flat_field_correction'
+        data_dict = tu.set_data_dict(['tomo'], ['tomo'])
+        data_dict.update({'pattern': pattern, 'log': log})
+        exp = run_protected_plugin_runner_no_process_list(
+            options, plugin, data=[{}, data_dict, {}])
+        fname = exp.meta_data.get_meta_data('nxs_filename')
+        with h5py.File(fname, 'r') as nxs_file:
+            return nxs_file['entry/final_result_tomo/data'][...]
+
+    def test_correction(self):
+        sino = self.__run('SINOGRAM', False)
+        proj = self.__run('PROJECTION', False)
+        self.assertTrue(np.allclose(sino, proj))
+        self.assertTrue(sino.min() >= 0 and sino.max() <= 2)
+
+    def test_correction_log(self):
+        data = self.__run('PROJECTION', False)
+        log_data = self.__run('PROJECTION', True)
+        self.assertTrue(np.allclose(log_data, -np.log(data + 1), atol=1e-5))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -36,5 +36,13 @@ class DezingFilterTest(unittest.TestCase):
         plugin = 'savu.plugins.filters.dezing_filter'
         run_protected_plugin_runner_no_process_list(options, plugin)
 
+    def test_dezing_filter_threads(self):
+        options = tu.set_experiment('tomoRaw')
+        plugin = 'savu.plugins.filters.dezing_filter'
+        data_dict = tu.set_data_dict(['tomo'], ['tomo'])
+        data_dict['number_of_threads'] = 2
+        run_protected_plugin_runner_no_process_list(
+            options, plugin, data=[{}, data_dict, {}])
+
 if __name__ == "__main__":
     unittest.main()
@@ -21,6 +21,8 @@
 
 """
 import unittest
+import numpy as np
+
 from savu.test import test_utils as tu
 from savu.test.travis.framework_tests.plugin_runner_test import \
     run_protected_plugin_runner
@@ -35,6 +37,24 @@ class PluginRunnerDistortionCorrectionTest(unittest.TestCase):
         run_protected_plugin_runner(tu.set_options(data_file,
                                                    process_file=process_file))
 
+    def test_remap_table(self):
+        try:
+            import savu.plugins.filters.distortion_correction as dc
+        except ImportError as e:
+            raise unittest.SkipTest(e)
+        shape = (20, 30)
+        offsets, weights = \
+            dc._get_remap_table((1, 0, 0, 0, 0), (12.3, 8.7), shape)
+        frame = np.random.rand(*shape).astype(np.float32).ravel()
+        result = sum(np.take(frame[shift:], offsets, mode='clip')*weight
+                     for shift, weight in
+                     zip((0, 1, shape[1], shape[1]+1), weights))
+        result = result.reshape(shape)
+        # the last row and column are outside the interpolation grid
+        self.assertTrue(np.allclose(result[:-1, :-1],
+                                    frame.reshape(shape)[:-1, :-1]))
+        self.assertFalse(result[-1].any() or result[:, -1].any())
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -24,10 +24,13 @@
 """
 
 import unittest
+import numpy as np
+import scipy.ndimage as ndi
 
 import savu.test.test_utils as tu
+import savu.plugins.filters.median_filter as mf
 from savu.test.travis.framework_tests.plugin_runner_test import \
-    run_protected_plugin_runner
+    run_protected_plugin_runner, run_protected_plugin_runner_no_process_list
 
 
 class MedianFilterTest(unittest.TestCase):
@@ -38,5 +41,26 @@ class MedianFilterTest(unittest.TestCase):
         run_protected_plugin_runner(tu.set_options(data_file,
                                                    process_file=process_file))
 
+    def test_median_filter_5x5(self):
+        options = tu.set_experiment('tomo')
+        plugin = 'savu.plugins.filters.median_filter'
+        data_dict = tu.set_data_dict(['tomo'], ['tomo'])
+        data_dict['kernel_size'] = (1, 5, 5)
+        data_dict['number_of_threads'] = 2
+        run_protected_plugin_runner_no_process_list(
+            options, plugin, data=[{}, data_dict, {}])
+
+    def test_median_networks(self):
+        for size in [3, 5]:
+            network = mf._get_network(size)
+            for dtype in [np.float32, np.uint16]:
+                for shape in [(1, 1), (3, 7), (40, 37)]:
+                    frame = (np.random.rand(*shape)*1000).astype(dtype)
+                    if dtype is np.float32:
+                        frame -= 500
+                    self.assertTrue(np.array_equal(
+                        mf._median(frame, network),
+                        ndi.median_filter(frame, size=size, mode='constant')))
+
 if __name__ == "__main__":
     unittest.main()
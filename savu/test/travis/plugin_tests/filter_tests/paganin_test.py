@@ -39,5 +39,14 @@ class PaganinTest(unittest.TestCase):
         plugin = 'savu.plugins.filters.paganin_filter'
         run_protected_plugin_runner_no_process_list(options, plugin)
 
+    def test_paganin_threads(self):
+        options = tu.set_experiment('tomo')
+        plugin = 'savu.plugins.filters.paganin_filter'
+        data_dict = tu.set_data_dict(['tomo'], ['tomo'])
+        data_dict['number_of_threads'] = 2
+        data_dict['Padmethod'] = 'reflect'
+        run_protected_plugin_runner_no_process_list(
+            options, plugin, data=[{}, data_dict, {}])
+
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,58 @@
+# Copyright 2016 Diamond Light Source Ltd.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+.. module:: projection_pair_centering_test
+   :platform: Unix
+   :synopsis: unittest test class for the projection pair centering plugin
+
+.. moduleauthor:: Nicola Wadeson <scientificsoftware@diamond.ac.uk>
+
+"""
+
+import unittest
+import numpy as np
+
+from savu.test import test_utils as tu
+from savu.test.travis.framework_tests.plugin_runner_test import \
+    run_protected_plugin_runner_no_process_list
+from savu.plugins.filters.projection_pair_centering import \
+    ProjectionPairCentering
+
+
+class ProjectionPairCenteringTest(unittest.TestCase):
+
+    def test_projection_pair_centering(self):
+        options = tu.set_experiment('tomo')
+        plugin = 'savu.plugins.filters.projection_pair_centering'
+        run_protected_plugin_runner_no_process_list(options, plugin)
+
+    def test_shift(self):
+        plugin = ProjectionPairCentering()
+        x = np.arange(128)
+        proj = np.exp(-((x - 50.0)/5)**2) + 0.5*np.exp(-((x - 70.0)/3)**2)
+        proj2 = np.exp(-((x - 56.5)/5)**2) + 0.5*np.exp(-((x - 76.5)/3)**2)
+        shift = plugin._get_shift(np.tile(proj, (4, 1)),
+                                  np.tile(proj2, (4, 1)))
+        self.assertAlmostEqual(shift, -6.5, delta=0.2)
+
+    def test_projection_pair(self):
+        plugin = ProjectionPairCentering()
+        self.assertEqual(plugin._get_projection_pair(np.arange(0, 361, 1.5)),
+                         (0, 120))
+        self.assertRaises(Exception, plugin._get_projection_pair,
+                          np.arange(0, 90, 1.0))
+
+if __name__ == "__main__":
+    unittest.main()
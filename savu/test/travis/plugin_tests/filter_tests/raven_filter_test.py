@@ -20,10 +20,15 @@
 .. moduleauthor:: Mark Basham <scientificsoftware@diamond.ac.uk>
 
 """
+import os
 import unittest
+import h5py
+import numpy as np
+
 from savu.test import test_utils as tu
+from savu.plugins.filters.raven_filter import RavenFilter
 from savu.test.travis.framework_tests.plugin_runner_test import \
-    run_protected_plugin_runner
+    run_protected_plugin_runner, run_protected_plugin_runner_no_process_list
 
 
 class RavenFilterTest(unittest.TestCase):
@@ -34,5 +39,35 @@ class RavenFilterTest(unittest.TestCase):
         run_protected_plugin_runner(tu.set_options(data_file,
                                                    process_file=process_file))
 
+    def test_frames(self):
+        # the frame dimension is squeezed out of the data if there is only
+        # one frame at a time
+        results = []
+        ndims = set()
+        get_max_frames = RavenFilter.get_max_frames
+        filter_frames = RavenFilter.filter_frames
+
+        def record_frames(self, data):
+            ndims.add(data[0].ndim)
+            return filter_frames(self, data)
+
+        RavenFilter.filter_frames = record_frames
+        try:
+            for frames in [8, 1]:
+                RavenFilter.get_max_frames = lambda self, n=frames: n
+                options = tu.set_experiment('tomo')
+                run_protected_plugin_runner_no_process_list(
+                    options, 'savu.plugins.filters.raven_filter')
+                fname = [f for f in os.listdir(options['out_path']) if
+                         f.endswith('raven_filter.h5')][0]
+                with h5py.File(os.path.join(options['out_path'], fname),
+                               'r') as h5:
+                    results.append(h5['1-RavenFilter-test0/data'][...])
+        finally:
+            RavenFilter.get_max_frames = get_max_frames
+            RavenFilter.filter_frames = filter_frames
+        self.assertEqual(ndims, set([2, 3]))
+        self.assertTrue(np.allclose(results[0], results[1], atol=1e-5))
+
 if __name__ == "__main__":
     unittest.main()
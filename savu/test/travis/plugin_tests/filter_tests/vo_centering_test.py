@@ -22,7 +22,13 @@
 """
 
 import unittest
+import h5py
+import numpy as np
+import scipy.ndimage as ndi
+import scipy.ndimage.filters as filter
+
 from savu.test import test_utils as tu
+from savu.plugins import utils as pu
 from savu.test.travis.framework_tests.plugin_runner_test import \
     run_protected_plugin_runner
 
@@ -35,6 +41,106 @@ class VoCenterTest(unittest.TestCase):
         run_protected_plugin_runner(tu.set_options(data_file,
                                                    process_file=process_file))
 
+    def test_sample_preview(self):
+        data, pData = tu.get_data_object(tu.load_test_data('tomo'))
+        plugin = pu.load_plugin('savu.plugins.filters.vo_centering')
+        for length, n_sinos, expected in [(135, 20, '10:125:6:1'),
+                                          (135, 1, '67:68:135:1'),
+                                          (20, 5, '1:18:4:1'),
+                                          (20, 20, '0:20:1:1'),
+                                          (7, 20, '0:7:1:1')]:
+            data.set_shape((91, length, 160))
+            plugin.parameters['n_sinograms'] = n_sinos
+            preview = plugin._VoCentering__get_sample_preview(data)
+            self.assertEqual(preview, ['0:end:1:1', expected, '0:end:1:1'])
+            first, stop, step = [int(v) for v in expected.split(':')[:3]]
+            self.assertEqual(len(range(first, stop, step)),
+                             min(n_sinos, length))
+            self.assertTrue(stop <= length)
+
+        plugin.parameters['downsample'] = 4
+        preview = plugin._VoCentering__get_sample_preview(data)
+        self.assertEqual(preview[0], '0:end:4:1')
+
+    def test_fit(self):
+        plugin = pu.load_plugin('savu.plugins.filters.vo_centering')
+        positions = np.arange(10, 125, 6)
+        cor_raw = 80 + 0.1*positions
+        out_data = type('OutData', (object,), {'data': cor_raw[:, None]})
+        plugin.get_datasets = lambda: ([], [out_data])
+        meta_data = {}
+        plugin.populate_meta_data = meta_data.__setitem__
+        plugin.orig_shape = (135, 1)
+
+        plugin.positions = positions
+        plugin.parameters['poly_degree'] = 1
+        plugin.post_process()
+        self.assertTrue(np.allclose(meta_data['cor_raw'], cor_raw))
+        self.assertTrue(np.allclose(meta_data['centre_of_rotation'],
+                                    80 + 0.1*np.arange(135)))
+
+        plugin.parameters['poly_degree'] = 0
+        plugin.post_process()
+        self.assertTrue(np.allclose(meta_data['centre_of_rotation'],
+                                    np.mean(cor_raw)))
+
+        # without the sampled positions the mean is used
+        plugin.positions = positions[1:]
+        plugin.parameters['poly_degree'] = 1
+        plugin.post_process()
+        self.assertEqual(meta_data['centre_of_rotation'].shape, (135,))
+        self.assertTrue(np.allclose(meta_data['centre_of_rotation'],
+                                    np.mean(cor_raw)))
+
+    def test_metrics(self):
+        plugin = pu.load_plugin('savu.plugins.filters.vo_centering')
+        with h5py.File(tu.get_test_data_path('24737.nxs'), 'r') as nxs:
+            entry = nxs['entry1/tomo_entry']
+            keys = entry['instrument/detector/image_key'][...]
+            data = entry['data/data'][:, 67, :].astype(np.float32)
+        dark = data[keys == 2].mean(axis=0)
+        flat = data[keys == 1].mean(axis=0)
+        sino = (data[keys == 0] - dark)/(flat - dark)
+        sino = filter.gaussian_filter(sino, sigma=(3, 1))
+        (Nrow, Ncol) = sino.shape
+        plugin._get_start_shift = lambda centre: 0
+        obj_radius = 0.5*plugin.parameters['ratio']*Ncol
+
+        def get_metric(sino, sino2):
+            mask = plugin._create_mask(2*Nrow-1, sino.shape[1], obj_radius)
+            return np.sum(np.abs(np.fft.fftshift(np.fft.fft2(
+                np.vstack((sino, sino2)))))*mask)
+
+        # the coarse search shifts sino2 by whole pixels and fills the gap
+        # with the last projection
+        raw_cor, metric = plugin._coarse_search(sino)
+        smin, smax = plugin.parameters['search_area']
+        shifts = np.arange(smin, smax + 1)*2
+        expected = []
+        for i in shifts:
+            sino2 = np.roll(np.fliplr(sino[1:]), i, axis=1)
+            fill = slice(0, i) if i >= 0 else slice(i, None)
+            sino2[:, fill] = sino[-1][fill]
+            expected.append(get_metric(sino, sino2))
+        self.assertTrue(np.allclose(metric, expected, rtol=1e-4))
+        self.assertEqual(raw_cor, (Ncol - 1.0)/2.0 +
+                         shifts[np.argmin(expected)]/2.0)
+
+        # the fine search interpolates the shifts with zeros outside
+        cor, metric = plugin._fine_search(sino, raw_cor)
+        sino2 = np.roll(np.fliplr(sino[1:]),
+                        np.int16(2*(raw_cor - (Ncol - 1.0)/2.0)), axis=1)
+        left = int(np.ceil(raw_cor - (Ncol - 1 - raw_cor) + 4)) if \
+            raw_cor > (Ncol - 1.0)/2.0 else 4
+        right = int(np.floor(2*raw_cor - 4)) if \
+            raw_cor <= (Ncol - 1.0)/2.0 else Ncol - 5
+        shifts = np.linspace(-3, 3, num=np.int16(7/0.2))
+        expected = [get_metric(sino[:, left:right + 1], ndi.shift(
+            sino2, (0, i), prefilter=False)[:, left:right + 1])
+            for i in shifts]
+        self.assertTrue(np.allclose(metric, expected, rtol=1e-4))
+        self.assertEqual(cor, raw_cor + shifts[np.argmin(expected)]/2.0)
+
 #    def test_vo_centering(self):
 #        options = tu.set_experiment('tomo')
 #        plugin = 'savu.plugins.filters.vo_centering'
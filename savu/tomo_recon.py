@@ -51,6 +51,35 @@ def __option_parser():
                       help="Location of syslog server", default='cs04r-sc-serv-14')
     parser.add_option("-p", "--syslog_port", dest="syslog_port",
                       help="Port to connect to syslog server on", default=514)
+    parser.add_option("-m", "--mode", dest="mode", type="choice",
+                      choices=['full', 'compute', 'io'],
+                      help="Diagnostic run mode: 'compute' feeds each plugin "
+                      "cached in-memory frames and discards the results, "
+                      "'io' performs all reads and writes but skips "
+                      "processing", default='full')
+    parser.add_option("-w", "--working_set", dest="working_set",
+                      type="float", help="Choose the number of frames "
+                      "processed at a time automatically, from a target "
+                      "working set size in MB", default=None)
+    parser.add_option("-c", "--cache", dest="cache_dir",
+                      help="Cache dark and flat fields, and other arrays "
+                      "derived from the input data, in this directory for "
+                      "reuse in later runs", default=None)
+    parser.add_option("-o", "--output_cache", dest="output_cache",
+                      help="Cache the output of each plugin in this "
+                      "directory and start later runs of the same data and "
+                      "process list from the last cached plugin",
+                      default=None)
+    parser.add_option("-k", "--quick_look", dest="quick_look",
+                      help="Before processing the full data, process a few "
+                      "frames and write the results to a quick look folder: "
+                      "either the number of sinograms, spread around the "
+                      "centre, or a preview entry 'start:stop:step' for the "
+                      "sinogram slice dimension", default=None)
+    parser.add_option("-j", "--fft_threads", dest="fft_threads", type="int",
+                      help="The number of threads available to the FFTs on "
+                      "each node, shared between its processes (default: "
+                      "the number of cores)", default=None)
 
 
     (options, args) = parser.parse_args()
@@ -108,6 +137,12 @@ def _set_options(opt, args):
         options['log_path'] = options["out_path"]
     options['syslog_server'] = opt.syslog
     options['syslog_port'] = opt.syslog_port
+    options['run_mode'] = opt.mode
+    options['working_set'] = opt.working_set
+    options['cache_dir'] = opt.cache_dir
+    options['output_cache'] = opt.output_cache
+    options['quick_look'] = opt.quick_look
+    options['fft_threads'] = opt.fft_threads
     return options
 
 
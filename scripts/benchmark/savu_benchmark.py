@@ -0,0 +1,326 @@
+# Copyright 2016 Diamond Light Source Ltd.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+.. module:: savu_benchmark
+   :platform: Unix
+   :synopsis: Micro-benchmark the process_frames method of registered plugins\
+       on synthetic data.
+
+.. moduleauthor:: Nicola Wadeson <scientificsoftware@diamond.ac.uk>
+
+"""
+from __future__ import print_function
+
+import os
+import sys
+import json
+import time
+import shutil
+import socket
+import inspect
+import logging
+import optparse
+import tempfile
+
+import numpy as np
+
+import savu.plugins.utils as pu
+import synthetic_data as sd
+from savu.data.experiment_collection import Experiment
+
+LOADER = 'savu.plugins.loaders.nxtomo_loader'
+SAVER = 'savu.plugins.savers.hdf5_tomo_saver'
+HISTORY_FILE = os.path.join(os.path.expanduser("~"), '.savu_benchmark.json')
+
+
+def __option_parser():
+    """ Option parser for command line arguments.
+    """
+    usage = "%prog [options]"
+    parser = optparse.OptionParser(usage=usage)
+    parser.add_option("-p", "--plugins", dest="plugins",
+                      help="Comma separated list of plugin names (default: "
+                      "all registered CPU plugins)", default=None)
+    parser.add_option("-s", "--shape", dest="shape",
+                      help="Data shape as angles,detector_y,detector_x",
+                      default="91,135,160")
+    parser.add_option("-t", "--dtype", dest="dtype",
+                      help="Data type of the synthetic data",
+                      default="float32")
+    parser.add_option("-c", "--calls", dest="calls", type="int",
+                      help="Number of timed process_frames calls", default=20)
+    parser.add_option("-w", "--warmup", dest="warmup", type="int",
+                      help="Number of untimed warm-up calls", default=2)
+    parser.add_option("-o", "--history", dest="history",
+                      help="JSON history file", default=HISTORY_FILE)
+    parser.add_option("-r", "--regression", dest="regression", type="float",
+                      help="Fractional slow down, compared with the previous "
+                      "matching run, reported as a regression", default=0.1)
+    parser.add_option("-n", "--no_save", action="store_true", dest="no_save",
+                      help="Do not add the results to the history file",
+                      default=False)
+    return parser.parse_args()
+
+
+def _get_options(data_file, out_path, plugin_id, plugin):
+    """ Populate an options dictionary for a single process run of
+    loader -> plugin -> saver.
+    """
+    nOut = plugin.nOutput_datasets()
+    out_names = ['tomo'] if nOut == 1 else ['out' + str(i) for i in
+                                            range(nOut)]
+    plugin_list = []
+    for pid, data in [(LOADER, {}),
+                      (plugin_id, {'in_datasets': ['tomo'],
+                                   'out_datasets': out_names}),
+                      (SAVER, {})]:
+        plugin_list.append({'name': pu.module2class(pid.split('.')[-1]),
+                            'id': pid, 'data': data})
+
+    options = {'transport': 'hdf5', 'process_names': 'CPU0', 'mpi': False,
+               'process': 0, 'processes': ['CPU0'], 'data_file': data_file,
+               'process_file': '', 'out_path': out_path,
+               'inter_path': out_path, 'log_path': out_path,
+               'run_type': 'test', 'plugin_list': plugin_list}
+    return options
+
+
+def _get_frames(data, expInfo, nGroups):
+    """ Read the first nGroups (padded) frame groups that would be passed to
+    the plugin by the transport layer.
+    """
+    pData = data._get_plugin_data()
+    slice_list = data._get_slice_list_per_process(expInfo)[:nGroups]
+    squeeze_dims = pData.get_slice_directions()
+    if pData._get_frame_chunk() > 1:
+        squeeze_dims = squeeze_dims[1:]
+    frames = []
+    for sl in slice_list:
+        frames.append(np.squeeze(data._get_padded_slice_data(sl),
+                                 axis=squeeze_dims))
+    return frames, slice_list
+
+
+def _get_nFrames(pData, frames):
+    """ The number of frames in a group passed to process_frames. """
+    if pData._get_frame_chunk() > 1:
+        return frames.shape[pData.get_slice_dimension()]
+    return 1
+
+
+def benchmark_plugin(plugin_id, data_file, calls=20, warmup=2):
+    """ Time the process_frames method of a plugin.
+
+    The plugin is set up in the framework as it would be during a run (with
+    the NxtomoLoader), its pre_process method is called and the frame groups
+    it would receive are read into memory, so only process_frames is timed.
+
+    :param str plugin_id: The plugin module path.
+    :param str data_file: An NXtomo file created by
+        synthetic_data.create_nxtomo.
+    :returns: Benchmark statistics
+    :rtype: dict
+    """
+    out_path = tempfile.mkdtemp()
+    try:
+        plugin = pu.load_plugin(plugin_id)
+        options = _get_options(data_file, out_path, plugin_id, plugin)
+        exp = Experiment(options)
+        plugin_list = exp.meta_data.plugin_list.plugin_list
+        pu.plugin_loader(exp, plugin_list[0])
+        plugin = pu.plugin_loader(exp, plugin_list[1], check=True)
+        in_data = plugin.get_in_datasets()
+        in_pData = plugin.get_plugin_in_datasets()
+
+        groups = [_get_frames(d, exp.meta_data, calls + warmup)
+                  for d in in_data]
+        nGroups = min([len(g[0]) for g in groups])
+        if not nGroups:
+            raise Exception("No frames available to process.")
+
+        plugin.base_pre_process()
+        plugin.pre_process()
+
+        latency = []
+        nBytes = 0
+        nFrames = 0
+        for i in range(calls + warmup):
+            idx = i % nGroups
+            section = [g[0][idx].copy() for g in groups]
+            slice_list = [g[1][idx] for g in groups]
+            start = time.time()
+            plugin.process_frames(section, slice_list)
+            elapsed = time.time() - start
+            if i >= warmup:
+                latency.append(elapsed)
+                nBytes += sum([s.nbytes for s in section])
+                nFrames += _get_nFrames(in_pData[0], section[0])
+
+        for d in in_data:
+            d._close_file()
+    finally:
+        shutil.rmtree(out_path, ignore_errors=True)
+
+    total = sum(latency)
+    p50, p90, p99 = np.percentile(latency, [50, 90, 99])
+    return {'frames_per_s': nFrames/total, 'MB_per_s': nBytes/total/1e6,
+            'latency_p50': p50, 'latency_p90': p90, 'latency_p99': p99,
+            'calls': calls, 'frames_per_call': nFrames/float(calls)}
+
+
+def _get_plugin_ids(names=None):
+    """ Get the module paths of the plugins to benchmark.
+
+    If no names are given, all registered CPU plugins with a single input
+    dataset (excluding loaders and savers) are returned.
+    """
+    from savu.plugins.base_loader import BaseLoader
+    from savu.plugins.base_saver import BaseSaver
+    from savu.plugins.driver.gpu_plugin import GpuPlugin
+
+    pu.populate_plugins()
+    if names:
+        return [pu.plugins[n].__module__ for n in names]
+
+    plugin_ids = []
+    for name in sorted(pu.plugins.keys()):
+        clazz = pu.plugins[name]
+        bases = inspect.getmro(clazz)
+        if set([BaseLoader, BaseSaver, GpuPlugin]).intersection(bases):
+            continue
+        try:
+            if clazz().nInput_datasets() != 1:
+                continue
+        except Exception:
+            continue
+        plugin_ids.append(clazz.__module__)
+    return plugin_ids
+
+
+def _savu_version():
+    try:
+        import pkg_resources
+        return pkg_resources.get_distribution('savu').version
+    except Exception:
+        return 'unknown'
+
+
+def _load_history(filename):
+    if not os.path.exists(filename):
+        return []
+    with open(filename, 'r') as hfile:
+        return json.load(hfile)
+
+
+def _save_history(filename, history):
+    with open(filename, 'w') as hfile:
+        json.dump(history, hfile, indent=2, sort_keys=True)
+
+
+def _find_previous(history, run):
+    """ Find the most recent run in the history with the same data shape,
+    dtype and host. """
+    keys = ['shape', 'dtype', 'host']
+    for old_run in history[::-1]:
+        if [old_run[k] for k in keys] == [run[k] for k in keys]:
+            return old_run
+    return None
+
+
+def _compare(previous, run, regression):
+    """ Compare the frames per second of each plugin with a previous run.
+
+    :returns: names of plugins that have slowed down by more than the
+        regression fraction.
+    :rtype: list(str)
+    """
+    slower = []
+    for name, result in run['results'].iteritems():
+        old = previous['results'].get(name, {})
+        if 'frames_per_s' not in result or 'frames_per_s' not in old:
+            continue
+        ratio = result['frames_per_s']/old['frames_per_s']
+        flag = ''
+        if ratio < (1.0 - regression):
+            flag = '  *** REGRESSION ***'
+            slower.append(name)
+        print("%30s : %6.2fx the speed of %s%s" %
+              (name, ratio, previous['date'], flag))
+    return slower
+
+
+def _display(run):
+    print("-----------------------------------------")
+    print("shape %s, dtype %s" % (tuple(run['shape']), run['dtype']))
+    print("%30s %10s %10s %10s %10s %10s" % ('plugin', 'frames/s', 'MB/s',
+                                             'p50 (ms)', 'p90 (ms)',
+                                             'p99 (ms)'))
+    for name in sorted(run['results'].keys()):
+        res = run['results'][name]
+        if 'error' in res:
+            print("%30s  FAILED: %s" % (name, res['error']))
+            continue
+        print("%30s %10.2f %10.2f %10.3f %10.3f %10.3f" %
+              (name, res['frames_per_s'], res['MB_per_s'],
+               res['latency_p50']*1e3, res['latency_p90']*1e3,
+               res['latency_p99']*1e3))
+    print("-----------------------------------------")
+
+
+def main():
+    (options, args) = __option_parser()
+    logging.basicConfig(level=logging.WARN)
+
+    shape = tuple(int(s) for s in options.shape.split(','))
+    names = options.plugins.split(',') if options.plugins else None
+    plugin_ids = _get_plugin_ids(names)
+
+    tmp_dir = tempfile.mkdtemp()
+    data_file = os.path.join(tmp_dir, 'synthetic.nxs')
+    sd.create_nxtomo(data_file, shape, dtype=options.dtype, darks=5,
+                     flats=5)
+
+    run = {'date': time.strftime("%Y-%m-%d %H:%M:%S"),
+           'host': socket.gethostname(), 'savu_version': _savu_version(),
+           'shape': list(shape), 'dtype': options.dtype, 'results': {}}
+    try:
+        for plugin_id in plugin_ids:
+            name = pu.module2class(plugin_id.split('.')[-1])
+            print("Benchmarking %s" % name)
+            try:
+                run['results'][name] = benchmark_plugin(
+                    plugin_id, data_file, calls=options.calls,
+                    warmup=options.warmup)
+            except Exception as e:
+                run['results'][name] = {'error': str(e)}
+    finally:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+
+    _display(run)
+
+    history = _load_history(options.history)
+    previous = _find_previous(history, run)
+    slower = _compare(previous, run, options.regression) if previous else []
+
+    if not options.no_save:
+        history.append(run)
+        _save_history(options.history, history)
+        print("Results added to %s" % options.history)
+
+    sys.exit(1 if slower else 0)
+
+
+if __name__ == '__main__':
+    main()
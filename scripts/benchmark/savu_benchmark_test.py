@@ -0,0 +1,59 @@
+# Copyright 2016 Diamond Light Source Ltd.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+.. module:: savu_benchmark_test
+   :platform: Unix
+   :synopsis: unittest test class for the plugin benchmark harness
+
+.. moduleauthor:: Nicola Wadeson <scientificsoftware@diamond.ac.uk>
+
+"""
+
+import os
+import shutil
+import tempfile
+import unittest
+
+import savu_benchmark as sb
+import synthetic_data as sd
+
+
+class SavuBenchmarkTest(unittest.TestCase):
+
+    def test_benchmark_plugin(self):
+        tmp_dir = tempfile.mkdtemp()
+        data_file = os.path.join(tmp_dir, 'synthetic.nxs')
+        sd.create_nxtomo(data_file, (10, 12, 14), dtype='uint16', darks=5,
+                         flats=5)
+        result = sb.benchmark_plugin(
+            'savu.plugins.corrections.dark_flat_field_correction', data_file,
+            calls=3, warmup=1)
+        shutil.rmtree(tmp_dir)
+        self.assertEqual(result['calls'], 3)
+        self.assertTrue(result['frames_per_s'] > 0)
+        self.assertTrue(result['latency_p50'] <= result['latency_p99'])
+
+    def test_compare(self):
+        old = {'shape': [1, 2, 3], 'dtype': 'float32', 'host': 'a',
+               'date': 'then', 'results': {'A': {'frames_per_s': 10.0},
+                                           'B': {'frames_per_s': 10.0}}}
+        new = {'shape': [1, 2, 3], 'dtype': 'float32', 'host': 'a',
+               'date': 'now', 'results': {'A': {'frames_per_s': 5.0},
+                                          'B': {'frames_per_s': 9.5}}}
+        self.assertEqual(sb._find_previous([old], new), old)
+        self.assertEqual(sb._compare(old, new, 0.1), ['A'])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,220 @@
+# Copyright 2016 Diamond Light Source Ltd.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+.. module:: savu_scaling
+   :platform: Unix
+   :synopsis: Run a process list over a range of MPI process counts on a \
+       single machine and tabulate strong and weak scaling per plugin.
+
+.. moduleauthor:: Nicola Wadeson <scientificsoftware@diamond.ac.uk>
+
+"""
+from __future__ import print_function
+
+import os
+import re
+import sys
+import json
+import time
+import optparse
+import subprocess
+
+import savu
+import synthetic_data as sd
+
+WALL_TIME = re.compile(' - (?P<plugin>\w+) - wall time (?P<time>[\d.]+) s')
+
+
+def __option_parser():
+    """ Option parser for command line arguments.
+    """
+    usage = "%prog [options] process_file output_directory"
+    parser = optparse.OptionParser(usage=usage)
+    parser.add_option("-d", "--data", dest="data_file",
+                      help="Input data file (default: synthetic data)",
+                      default=None)
+    parser.add_option("-s", "--shape", dest="shape",
+                      help="Synthetic data shape as angles,detector_y,"
+                      "detector_x", default="91,135,160")
+    parser.add_option("-t", "--dtype", dest="dtype",
+                      help="Data type of the synthetic data", default="uint16")
+    parser.add_option("-r", "--ranks", dest="ranks",
+                      help="Comma separated list of process counts",
+                      default="1,2,4")
+    parser.add_option("-n", "--names", dest="names", action="append",
+                      help="Process names passed to tomo_recon for each "
+                      "process count, e.g. -n 4:GPU0,CPU1,CPU2,CPU3 "
+                      "(default: CPU0,...,CPUn-1)", default=[])
+    parser.add_option("-w", "--weak", action="store_true", dest="weak",
+                      help="Also run a weak scaling sweep, scaling detector_y "
+                      "of the synthetic data with the process count",
+                      default=False)
+    parser.add_option("-m", "--mpirun", dest="mpirun",
+                      help="mpirun command", default="mpirun")
+    parser.add_option("-p", "--plot", action="store_true", dest="plot",
+                      help="Save scaling plots (requires matplotlib)",
+                      default=False)
+    return parser.parse_args()
+
+
+def _get_names(nRanks, names_list):
+    """ Get the tomo_recon process names for a process count. """
+    for names in names_list:
+        n, value = names.split(':')
+        if int(n) == nRanks:
+            return value
+    return ','.join(['CPU' + str(i) for i in range(nRanks)])
+
+
+def _parse_wall_times(log_file):
+    """ Get the wall time of each plugin from a Savu user log.
+
+    :returns: plugin wall times, in order of execution
+    :rtype: list(tuple(str, float))
+    """
+    times = []
+    with open(log_file, 'r') as lfile:
+        for line in lfile:
+            match = WALL_TIME.search(line)
+            if match:
+                times.append((match.group('plugin'),
+                              float(match.group('time'))))
+    return times
+
+
+def run_savu(data_file, process_file, out_path, nRanks, names,
+             mpirun='mpirun'):
+    """ Run tomo_recon with nRanks processes on the local machine.
+
+    :returns: total wall time and a list of (plugin, wall time) pairs
+    :rtype: float, list(tuple(str, float))
+    """
+    folder = 'scaling_np%i_%s' % (nRanks, time.strftime("%Y%m%d%H%M%S"))
+    tomo_recon = os.path.join(savu.__path__[0], 'tomo_recon.py')
+    cmd = [mpirun, '-np', str(nRanks), sys.executable, tomo_recon,
+           data_file, process_file, out_path, '-n', names, '-f', folder, '-q']
+    print(' '.join(cmd))
+    start = time.time()
+    subprocess.check_call(cmd)
+    total = time.time() - start
+    log_file = os.path.join(out_path, folder, 'user.log')
+    return total, _parse_wall_times(log_file)
+
+
+def _sweep(options, process_file, out_path, ranks, weak=False):
+    """ Run Savu for each process count in ranks. """
+    shape = [int(s) for s in options.shape.split(',')]
+    results = []
+    for nRanks in ranks:
+        data_file = options.data_file
+        if weak or not data_file:
+            run_shape = list(shape)
+            if weak:
+                run_shape[1] *= nRanks
+            data_file = os.path.join(out_path, 'synthetic_%s.nxs' %
+                                     '_'.join(map(str, run_shape)))
+            if not os.path.exists(data_file):
+                sd.create_nxtomo(data_file, tuple(run_shape),
+                                 dtype=options.dtype)
+        names = _get_names(nRanks, options.names)
+        total, times = run_savu(data_file, process_file, out_path, nRanks,
+                                names, mpirun=options.mpirun)
+        results.append({'ranks': nRanks, 'names': names, 'total': total,
+                        'plugins': times})
+    return results
+
+
+def scaling_table(results, weak=False):
+    """ Calculate the speedup (strong scaling) or efficiency of each plugin
+    relative to the smallest process count.
+
+    :returns: table rows of [plugin, ranks, time, speedup, efficiency]
+    :rtype: list(list)
+    """
+    base = results[0]
+    base_times = dict(base['plugins'] + [('total', base['total'])])
+    rows = []
+    for res in results:
+        times = res['plugins'] + [('total', res['total'])]
+        scale = float(res['ranks'])/base['ranks']
+        for name, ptime in times:
+            ratio = base_times.get(name, float('nan'))/ptime if ptime else \
+                float('nan')
+            speedup = 1.0 if weak else ratio
+            efficiency = ratio if weak else ratio/scale
+            rows.append([name, res['ranks'], ptime, speedup, efficiency])
+    return rows
+
+
+def _display(rows, title):
+    print("-----------------------------------------")
+    print(title)
+    print("%30s %6s %12s %10s %10s" % ('plugin', 'ranks', 'time (s)',
+                                       'speedup', 'efficiency'))
+    for row in sorted(rows, key=lambda r: (r[0] == 'total', r[0], r[1])):
+        print("%30s %6i %12.3f %10.2f %10.2f" % tuple(row))
+    print("-----------------------------------------")
+
+
+def _plot(rows, title, filename):
+    """ Plot the efficiency of each plugin against the process count. """
+    import matplotlib
+    matplotlib.use('Agg')
+    import matplotlib.pyplot as plt
+
+    plt.figure()
+    for name in sorted(set([r[0] for r in rows])):
+        prows = [r for r in rows if r[0] == name]
+        plt.plot([r[1] for r in prows], [r[4] for r in prows], 'o-',
+                 label=name)
+    plt.xlabel('MPI processes')
+    plt.ylabel('efficiency')
+    plt.title(title)
+    plt.legend(loc='best', fontsize='small')
+    plt.savefig(filename)
+    plt.close()
+
+
+def main():
+    (options, args) = __option_parser()
+    if len(args) is not 2:
+        print("The process file and output path need to be specified")
+        sys.exit(1)
+
+    process_file, out_path = args
+    ranks = [int(r) for r in options.ranks.split(',')]
+
+    sweeps = [('strong', False)]
+    if options.weak:
+        sweeps.append(('weak', True))
+
+    summary = {}
+    for name, weak in sweeps:
+        results = _sweep(options, process_file, out_path, ranks, weak=weak)
+        rows = scaling_table(results, weak=weak)
+        title = '%s scaling' % name
+        _display(rows, title)
+        summary[name] = {'runs': results, 'table': rows}
+        if options.plot:
+            _plot(rows, title, os.path.join(out_path, name + '_scaling.png'))
+
+    out_file = os.path.join(out_path, 'scaling.json')
+    with open(out_file, 'w') as sfile:
+        json.dump(summary, sfile, indent=2)
+    print("Scaling results saved to %s" % out_file)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,57 @@
+# Copyright 2016 Diamond Light Source Ltd.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+.. module:: savu_scaling_test
+   :platform: Unix
+   :synopsis: unittest test class for the scaling harness
+
+.. moduleauthor:: Nicola Wadeson <scientificsoftware@diamond.ac.uk>
+
+"""
+
+import os
+import tempfile
+import unittest
+
+import savu_scaling as ss
+
+
+class SavuScalingTest(unittest.TestCase):
+
+    def test_parse_wall_times(self):
+        log_file = os.path.join(tempfile.mkdtemp(), 'user.log')
+        with open(log_file, 'w') as lfile:
+            lfile.write("2016-06-01 10:00:00,000 - *Running the "
+                        "savu.plugins.filters.median_filter plugin*\n")
+            lfile.write("2016-06-01 10:00:02,000 - MedianFilter - wall time "
+                        "2.125 s\n")
+        self.assertEqual(ss._parse_wall_times(log_file),
+                         [('MedianFilter', 2.125)])
+
+    def test_scaling_table(self):
+        results = [{'ranks': 1, 'total': 10.0, 'plugins': [('A', 8.0)]},
+                   {'ranks': 4, 'total': 5.0, 'plugins': [('A', 2.0)]}]
+        rows = ss.scaling_table(results)
+        self.assertEqual(rows[2], ['A', 4, 2.0, 4.0, 1.0])
+        self.assertEqual(rows[3], ['total', 4, 5.0, 2.0, 0.5])
+        rows = ss.scaling_table(results, weak=True)
+        self.assertEqual(rows[2], ['A', 4, 2.0, 1.0, 4.0])
+
+    def test_get_names(self):
+        self.assertEqual(ss._get_names(2, []), 'CPU0,CPU1')
+        self.assertEqual(ss._get_names(2, ['2:GPU0,CPU1']), 'GPU0,CPU1')
+
+if __name__ == "__main__":
+    unittest.main()
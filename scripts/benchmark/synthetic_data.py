@@ -0,0 +1,328 @@
+# Copyright 2016 Diamond Light Source Ltd.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+.. module:: synthetic_data
+   :platform: Unix
+   :synopsis: Generate synthetic NXtomo and multi-modal (NXfluo, NXxrd, \
+       NXstxm) files of arbitrary size, written a block at a time.
+
+.. moduleauthor:: Nicola Wadeson <scientificsoftware@diamond.ac.uk>
+
+"""
+from __future__ import print_function
+
+import sys
+import optparse
+
+import h5py
+import numpy as np
+
+NX_CLASS = 'NX_class'
+
+# (centre_x, centre_y, semi_axis_a, semi_axis_b, angle (degrees), density)
+# of a modified Shepp-Logan phantom, in units of the detector half-width.
+ELLIPSES = [(0.0, 0.0, 0.69, 0.92, 0, 1.0),
+            (0.0, -0.0184, 0.6624, 0.874, 0, -0.8),
+            (0.22, 0.0, 0.11, 0.31, -18, -0.2),
+            (-0.22, 0.0, 0.16, 0.41, 18, -0.2),
+            (0.0, 0.35, 0.21, 0.25, 0, 0.1),
+            (0.0, 0.1, 0.046, 0.046, 0, 0.1),
+            (0.0, -0.1, 0.046, 0.046, 0, 0.1),
+            (-0.08, -0.605, 0.046, 0.023, 0, 0.1),
+            (0.0, -0.605, 0.023, 0.023, 0, 0.1),
+            (0.06, -0.605, 0.023, 0.046, 0, 0.1)]
+
+
+def __option_parser():
+    """ Option parser for command line arguments.
+    """
+    usage = "%prog [options] tomo|multimodal output_file"
+    parser = optparse.OptionParser(usage=usage)
+    parser.add_option("-s", "--shape", dest="shape",
+                      help="tomo: angles,detector_y,detector_x[,scans]. "
+                      "multimodal: angles,y,x", default="91,135,160")
+    parser.add_option("-t", "--dtype", dest="dtype",
+                      help="Data type", default="uint16")
+    parser.add_option("-d", "--darks", dest="darks", type="int",
+                      help="Number of dark frames", default=20)
+    parser.add_option("-f", "--flats", dest="flats", type="int",
+                      help="Number of flat frames", default=20)
+    parser.add_option("-c", "--chunks", dest="chunks",
+                      help="Comma separated chunk shape (default: one frame)",
+                      default=None)
+    parser.add_option("-z", "--compression", dest="compression",
+                      help="Compression filter (gzip or lzf)", default=None)
+    parser.add_option("-e", "--energies", dest="energies", type="int",
+                      help="multimodal: fluorescence spectrum length",
+                      default=256)
+    parser.add_option("-x", "--xrd_shape", dest="xrd_shape",
+                      help="multimodal: diffraction detector shape",
+                      default="50,60")
+    return parser.parse_args()
+
+
+def phantom_projection(angles, rows, detX):
+    """ Calculate parallel beam projections of a 3D phantom, analytically.
+
+    Each detector row sees the Shepp-Logan ellipses scaled down towards the
+    top and bottom of the volume, so the phantom is approximately a stack of
+    ellipsoids.
+
+    :param np.ndarray angles: projection angles in degrees
+    :param np.ndarray rows: detector rows, scaled to the range [-1, 1]
+    :param int detX: detector width in pixels
+    :returns: line integrals with shape (angles, rows, detX)
+    :rtype: np.ndarray
+    """
+    theta = np.radians(angles)[:, None, None]
+    scale = np.sqrt(np.clip(1.0 - 0.8*rows**2, 0, 1))[None, :, None]
+    t = np.linspace(-1, 1, detX)[None, None, :]
+    proj = np.zeros((len(angles), len(rows), detX), dtype=np.float32)
+    for x0, y0, a, b, phi, rho in ELLIPSES:
+        a, b, x0, y0 = a*scale, b*scale, x0*scale, y0*scale
+        phi = np.radians(phi)
+        a2 = (a*np.cos(theta - phi))**2 + (b*np.sin(theta - phi))**2
+        s = t - (x0*np.cos(theta) + y0*np.sin(theta))
+        inside = np.clip(a2 - s**2, 0, None)
+        proj += (2.0*rho*a*b*np.sqrt(inside)/np.where(a2 > 0, a2, 1)).astype(
+            np.float32)
+    return proj*(detX/2.0)
+
+
+def _intensity_range(dtype):
+    """ The dark and flat intensity levels for a data type. """
+    if np.issubdtype(dtype, np.integer):
+        high = min(np.iinfo(dtype).max*0.9, 60000)
+        return 0.02*high, high
+    return 0.05, 1.0
+
+
+def _create_dataset(group, name, shape, dtype, chunks, compression):
+    if chunks is None:
+        chunks = (1,) + tuple(shape[1:])
+    return group.create_dataset(name, shape, dtype, chunks=tuple(chunks),
+                                compression=compression)
+
+
+def _set_nx_class(group, nx_class):
+    group.attrs[NX_CLASS] = nx_class
+    return group
+
+
+def create_nxtomo(filename, shape, dtype='uint16', darks=20, flats=20,
+                  chunks=None, compression=None, block=None, noise=0.01):
+    """ Create a synthetic NXtomo file, in the layout expected by the
+    NxtomoLoader, one block of frames at a time.
+
+    :param str filename: output file name
+    :param tuple shape: (angles, detector_y, detector_x) or (angles,
+        detector_y, detector_x, scans)
+    :keyword str dtype: data type of the raw data
+    :keyword int darks: number of dark frames (image_key 2)
+    :keyword int flats: number of flat frames (image_key 1)
+    :keyword tuple chunks: hdf5 chunk shape (default one frame)
+    :keyword str compression: hdf5 compression filter
+    :keyword int block: number of frames written at a time (default: a
+        block of approximately 64MB)
+    :keyword float noise: relative noise level
+    """
+    nAngles, detY, detX = shape[0:3]
+    extra = tuple(shape[3:])
+    nImages = darks + flats + nAngles
+    image_key = np.array([2]*darks + [1]*flats + [0]*nAngles, dtype=np.int8)
+    angles = np.linspace(0, 180, nAngles)
+    all_angles = np.append(np.zeros(darks + flats), angles)
+    dark_level, flat_level = _intensity_range(dtype)
+    rows = np.linspace(-1, 1, detY)
+    mu = 2.0/(detX/2.0)
+
+    frame_bytes = detY*detX*np.dtype(dtype).itemsize*int(np.prod(extra))
+    block = block if block else max(1, int(64e6/frame_bytes))
+
+    with h5py.File(filename, 'w') as h5file:
+        entry = _set_nx_class(h5file.create_group('entry1'), 'NXentry')
+        tomo = _set_nx_class(entry.create_group('tomo_entry'), 'NXsubentry')
+        tomo['definition'] = 'NXtomo'
+        data_group = _set_nx_class(tomo.create_group('data'), 'NXdata')
+        det = tomo.create_group('instrument/detector')
+        _set_nx_class(tomo['instrument'], 'NXinstrument')
+        _set_nx_class(det, 'NXdetector')
+
+        data = _create_dataset(det, 'data', (nImages, detY, detX) + extra,
+                               dtype, chunks, compression)
+        data_group['data'] = data
+        det.create_dataset('image_key', data=image_key)
+        data_group.create_dataset('rotation_angle', data=all_angles)
+        control = tomo.create_group('control')
+        _set_nx_class(control, 'NXmonitor')
+        control.create_dataset('data', data=np.ones(nImages))
+
+        for start in range(0, nImages, block):
+            stop = min(start + block, nImages)
+            key = image_key[start:stop]
+            frames = np.zeros((stop - start, detY, detX), dtype=np.float32)
+            proj = key == 0
+            if proj.any():
+                line = phantom_projection(all_angles[start:stop][proj],
+                                          rows, detX)
+                frames[proj] = np.exp(-mu*line)
+            frames[key == 1] = 1.0
+            frames = dark_level + (flat_level - dark_level)*frames
+            frames *= 1 + noise*np.random.standard_normal(frames.shape)
+            frames[key == 2] = dark_level
+            if extra:
+                frames = np.tile(frames[..., None], (1,)*3 + extra)
+            data[start:stop] = frames.astype(dtype)
+    return filename
+
+
+def _write_axes(nx_data, axes, angles, y, x):
+    """ Write the axes of a multi-modal map in the layout expected by the
+    multi-modal loaders. """
+    nx_data.attrs['axes'] = np.array(axes, dtype='S')
+    nx_data.attrs['signal'] = 'data'
+    theta = nx_data.create_dataset('theta', data=angles.astype(np.float32))
+    theta.attrs['transformation_type'] = 'rotation'
+    theta.attrs['units'] = 'degrees'
+    xx, yy = np.meshgrid(x, y)
+    for name, value in [('x', xx), ('y', yy)]:
+        dset = nx_data.create_dataset(name, data=value)
+        dset.attrs['transformation_type'] = 'translation'
+        dset.attrs['units'] = 'mm'
+
+
+def _mm_entry(parent, name, definition, angles, y, x, mono_energy):
+    entry = _set_nx_class(parent.create_group(name), 'NXsubentry')
+    entry['definition'] = definition
+    _set_nx_class(entry.create_group('instrument'), 'NXinstrument')
+    mono = _set_nx_class(entry.create_group('instrument/monochromator'),
+                         'NXmonochromator')
+    mono['energy'] = mono_energy
+    mono['energy'].attrs['units'] = 'eV'
+    sample = _set_nx_class(entry.create_group('sample'), 'NXsample')
+    sample['theta'] = angles
+    sample['x'] = x
+    sample['y'] = y
+    monitor = _set_nx_class(entry.create_group('monitor'), 'NXmonitor')
+    monitor.create_dataset('data', data=np.ones((len(angles), len(y), len(x)),
+                                                dtype=np.float32))
+    nx_data = _set_nx_class(entry.create_group('data'), 'NXdata')
+    return entry, nx_data
+
+
+def create_multimodal(filename, shape, energies=256, xrd_shape=(50, 60),
+                      dtype='float32', chunks=None, compression=None,
+                      block=None):
+    """ Create a synthetic multi-modal file with NXfluo, NXxrd and NXstxm
+    entries, in the layout expected by the multi-modal loaders, writing one
+    block of scan rows at a time.
+
+    :param str filename: output file name
+    :param tuple shape: (angles, y, x) of the scan
+    :keyword int energies: length of each fluorescence spectrum
+    :keyword tuple xrd_shape: diffraction detector shape
+    :keyword int block: number of scan rows written at a time (default: a
+        block of approximately 64MB of diffraction data)
+    """
+    nAngles, nY, nX = shape
+    angles = np.linspace(0, 180, nAngles)
+    x = np.linspace(-1, 1, nX)
+    y = np.linspace(-1, 1, nY)
+    mono_energy = 18000.0
+    energy = np.arange(energies)*0.01
+    rows = np.linspace(-1, 1, nY)
+    dy, dx = xrd_shape
+    qy, qx = np.meshgrid(np.arange(dy) - dy/2.0, np.arange(dx) - dx/2.0,
+                         indexing='ij')
+    rings = np.exp(-((np.sqrt(qy**2 + qx**2) % 10) - 5)**2)
+    peaks = np.exp(-(np.arange(energies) - energies/3.0)**2/(2*4.0**2))
+
+    row_bytes = nX*max(dy*dx, energies)*np.dtype(dtype).itemsize
+    block = block if block else max(1, int(64e6/row_bytes))
+
+    with h5py.File(filename, 'w') as h5file:
+        entry1 = _set_nx_class(h5file.create_group('entry1'), 'NXentry')
+
+        fluo, fluo_data = _mm_entry(entry1, 'fluo_entry', 'NXfluo', angles,
+                                    y, x, mono_energy)
+        _write_axes(fluo_data, ['theta', 'y', 'x', 'energy'], angles, y, x)
+        fluo_data['energy'] = energy
+        fluo_set = _create_dataset(fluo_data, 'data',
+                                   (nAngles, nY, nX, energies), dtype, chunks,
+                                   compression)
+        det = _set_nx_class(fluo.create_group('instrument/fluorescence'),
+                            'NXdetector')
+        det['data'] = fluo_set
+        det['energy'] = energy
+
+        xrd, xrd_data = _mm_entry(entry1, 'xrd_entry', 'NXxrd', angles, y, x,
+                                  mono_energy)
+        _write_axes(xrd_data, ['theta', 'y', 'x', 'detector_y',
+                               'detector_x'], angles, y, x)
+        xrd_set = _create_dataset(xrd_data, 'data',
+                                  (nAngles, nY, nX, dy, dx), dtype, chunks,
+                                  compression)
+        det = _set_nx_class(xrd.create_group('instrument/detector'),
+                            'NXdetector')
+        det['data'] = xrd_set
+
+        stxm, stxm_data = _mm_entry(entry1, 'stxm_entry', 'NXstxm', angles,
+                                    y, x, mono_energy)
+        _write_axes(stxm_data, ['theta', 'y', 'x'], angles, y, x)
+        stxm_set = _create_dataset(stxm_data, 'data', (nAngles, nY, nX),
+                                   dtype, chunks, compression)
+        det = _set_nx_class(stxm.create_group('instrument/detector'),
+                            'NXdetector')
+        det['data'] = stxm_set
+
+        for i in range(nAngles):
+            for start in range(0, nY, block):
+                stop = min(start + block, nY)
+                line = phantom_projection(angles[i:i+1], rows[start:stop],
+                                          nX)[0]
+                stxm_set[i, start:stop] = \
+                    np.exp(-line/(nX/2.0)).astype(dtype)
+                fluo_set[i, start:stop] = \
+                    (line[..., None]*peaks).astype(dtype)
+                xrd_set[i, start:stop] = \
+                    (line[..., None, None]*rings).astype(dtype)
+    return filename
+
+
+def main():
+    (options, args) = __option_parser()
+    if len(args) != 2 or args[0] not in ['tomo', 'multimodal']:
+        print("The data type (tomo or multimodal) and output file need to "
+              "be specified")
+        sys.exit(1)
+
+    shape = tuple(int(s) for s in options.shape.split(','))
+    chunks = tuple(int(c) for c in options.chunks.split(',')) if \
+        options.chunks else None
+
+    if args[0] == 'tomo':
+        create_nxtomo(args[1], shape, dtype=options.dtype,
+                      darks=options.darks, flats=options.flats,
+                      chunks=chunks, compression=options.compression)
+    else:
+        xrd_shape = tuple(int(s) for s in options.xrd_shape.split(','))
+        create_multimodal(args[1], shape, energies=options.energies,
+                          xrd_shape=xrd_shape, dtype=options.dtype,
+                          chunks=chunks, compression=options.compression)
+    print("Created %s" % args[1])
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,97 @@
+# Copyright 2016 Diamond Light Source Ltd.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+.. module:: synthetic_data_test
+   :platform: Unix
+   :synopsis: unittest test class for the synthetic data generator
+
+.. moduleauthor:: Nicola Wadeson <scientificsoftware@diamond.ac.uk>
+
+"""
+
+import os
+import shutil
+import tempfile
+import unittest
+
+import h5py
+import numpy as np
+
+import synthetic_data as sd
+
+
+class SyntheticDataTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def test_create_nxtomo(self):
+        fname = os.path.join(self.tmp_dir, 'tomo.nxs')
+        sd.create_nxtomo(fname, (10, 12, 14), darks=2, flats=3, block=4,
+                         compression='gzip')
+        with h5py.File(fname, 'r') as h5file:
+            data = h5file['entry1/tomo_entry/data/data']
+            key = h5file['entry1/tomo_entry/instrument/detector/image_key'][...]
+            angles = h5file['entry1/tomo_entry/data/rotation_angle'][...]
+            self.assertEqual(data.shape, (15, 12, 14))
+            self.assertEqual(data.chunks, (1, 12, 14))
+            self.assertEqual(list(key), [2]*2 + [1]*3 + [0]*10)
+            self.assertEqual(len(angles), 15)
+            frames = data[...].astype(np.float32)
+            self.assertTrue(frames[0].mean() < frames[2].mean())
+            self.assertTrue(frames[5:].mean() < frames[2].mean())
+
+    def test_create_nxtomo_4d(self):
+        fname = os.path.join(self.tmp_dir, 'tomo4d.nxs')
+        sd.create_nxtomo(fname, (6, 8, 10, 3), dtype='float32', darks=1,
+                         flats=1, chunks=(1, 8, 10, 1))
+        with h5py.File(fname, 'r') as h5file:
+            data = h5file['entry1/tomo_entry/data/data']
+            self.assertEqual(data.shape, (8, 8, 10, 3))
+            self.assertEqual(data.dtype, np.float32)
+
+    def test_create_multimodal(self):
+        fname = os.path.join(self.tmp_dir, 'mm.nxs')
+        sd.create_multimodal(fname, (4, 5, 6), energies=16, xrd_shape=(7, 8))
+        shapes = {'fluo_entry': (4, 5, 6, 16), 'xrd_entry': (4, 5, 6, 7, 8),
+                  'stxm_entry': (4, 5, 6)}
+        with h5py.File(fname, 'r') as h5file:
+            for entry, shape in shapes.items():
+                group = h5file['entry1'][entry]
+                self.assertEqual(group['data/data'].shape, shape)
+                self.assertEqual(len(group['data'].attrs['axes']),
+                                 len(shape))
+                self.assertEqual(group['data/theta'].attrs[
+                    'transformation_type'], 'rotation')
+            self.assertEqual(h5file['entry1/fluo_entry/instrument/'
+                                    'fluorescence/data'].shape, shapes[
+                                        'fluo_entry'])
+
+    def test_create_multimodal_row_blocks(self):
+        whole = os.path.join(self.tmp_dir, 'mm_whole.nxs')
+        rows = os.path.join(self.tmp_dir, 'mm_rows.nxs')
+        sd.create_multimodal(whole, (3, 5, 6), energies=8, xrd_shape=(4, 5))
+        sd.create_multimodal(rows, (3, 5, 6), energies=8, xrd_shape=(4, 5),
+                             block=2)
+        with h5py.File(whole, 'r') as f1, h5py.File(rows, 'r') as f2:
+            for entry in ['fluo_entry', 'xrd_entry', 'stxm_entry']:
+                path = 'entry1/%s/data/data' % entry
+                self.assertTrue(np.allclose(f1[path][...], f2[path][...]))
+
+if __name__ == "__main__":
+    unittest.main()
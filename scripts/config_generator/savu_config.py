@@ -22,12 +22,10 @@ from __future__ import print_function
 import os
 
 from savu.data.plugin_list import PluginList
-from savu.plugins import utils as pu
-import pkgutil
+from savu.plugins import plugin_catalogue as pc
 import savu
 import readline
 import re
-import sys
 
 RE_SPACE = re.compile('.*\s+$', re.M)
 histfile = os.path.join(os.path.expanduser("~"), ".savuhist")
@@ -87,14 +85,14 @@ class Content(object):
         return value
 
     def add(self, name, str_pos):
-        plugin = pu.plugins[name]()
+        plugin = pc.load_plugin_class(name)()
         plugin._populate_default_parameters()
         pos, str_pos = self.convert_pos(str_pos)
         self.insert(plugin, pos, str_pos)
         self.display()
 
     def replace(self, name, str_pos, keep):
-        plugin = pu.plugins[name]()
+        plugin = pc.load_plugin_class(name)()
         plugin._populate_default_parameters()
         pos = self.find_position(str_pos)
         self.insert(plugin, pos, str_pos, replace=True)
@@ -109,8 +107,8 @@ class Content(object):
         self.remove(old_pos)
         new_pos, new = self.convert_pos(new)
         name = entry['name']
-        if name in pu.plugins.keys():
-            self.insert(pu.plugins[name](), new_pos, new)
+        if name in pc.get_plugins().keys():
+            self.insert(pc.load_plugin_class(name)(), new_pos, new)
         else:
             print("Sorry the plugin %s is not in my list, pick one from list" %
                   (name))
@@ -302,16 +300,15 @@ def _list(content, arg):
                 return content
 
     print("-----------------------------------------")
-    for key, value in pu.plugins.iteritems():
+    for key, value in pc.get_plugins().iteritems():
         if not arg:
             print(key)
-        elif arg[0] in value.__module__:
+        elif arg[0] in value['id']:
             print(key)
             if len(arg) < 2:
-                plugin = pu.plugins[key]()
-                plugin._populate_default_parameters()
-                for p_key in plugin.parameters.keys():
-                    print("    %20s : %s" % (p_key, plugin.parameters[p_key]))
+                parameters = pc.get_parameters(key)
+                for p_key in parameters.keys():
+                    print("    %20s : %s" % (p_key, parameters[p_key]))
     print("-----------------------------------------")
     return content
 
@@ -320,12 +317,11 @@ def _params(content, arg):
     """Displays the parameters of the specified plugin.
     """
     try:
-        plugin = pu.plugins[arg]()
-        plugin._populate_default_parameters()
+        parameters = pc.get_parameters(arg)
         print("-----------------------------------------")
         print(arg)
-        for p_key in plugin.parameters.keys():
-            print("    %20s : %s" % (p_key, plugin.parameters[p_key]))
+        for p_key in parameters.keys():
+            print("    %20s : %s" % (p_key, parameters[p_key]))
         print("-----------------------------------------")
         return content
     except:
@@ -368,7 +364,7 @@ def _add(content, arg):
         elems = content.get_positions()
         final = int(list(elems[-1])[0])+1 if elems else 1
         pos = args[1] if len(args) == 2 else str(final)
-        if name in pu.plugins.keys():
+        if name in pc.get_plugins().keys():
             content.add(name, pos)
         else:
             print("Sorry the plugin %s is not in my list, pick one from list" %
@@ -520,8 +516,8 @@ class Completer(object):
 
     def complete_params(self, args):
         if not args[0]:
-            return pu.plugins.keys()
-        return [x for x in pu.plugins.keys() if x.startswith(args[0])]
+            return pc.get_plugins().keys()
+        return [x for x in pc.get_plugins().keys() if x.startswith(args[0])]
 
     def complete(self, text, state):
         "Generic readline completion entry point."
@@ -555,21 +551,8 @@ def main():
     readline.parse_and_bind("tab: complete")
     readline.set_completer(comp.complete)
 
-    # load all the packages in the plugins directory to register classes
-    plugins_path = pu.get_plugins_paths()
-    for loader, module_name, is_pkg in pkgutil.walk_packages(plugins_path):
-        try:
-            # if the module is in savu, but not a plugin, then ignore
-            if "savu" in module_name.split('.'):
-                if "plugins" not in module_name.split('.'):
-                    continue
-            # setup.py is included in this list which should also be ignored
-            if module_name in ["setup", "savu.plugins.utils"]:
-                continue
-            if module_name not in sys.modules:
-                loader.find_module(module_name).load_module(module_name)
-        except Exception as e:
-            pass
+    # load the plugin catalogue (plugins are only imported if it is stale)
+    pc.get_plugins()
 
     # set up things
     input_string = "startup"
@@ -44,8 +44,9 @@ setup(name='savu',
                 'savu.data.transport_data',
                 'savu.data.data_structures',
                 'scripts',
-                'scripts.config_generator'],
-      entry_points={'console_scripts':['savu_process_generator=scripts.config_generator.savu_config:main','tomo_recon=savu.tomo_recon:main'],},
+                'scripts.config_generator',
+                'scripts.benchmark'],
+      entry_points={'console_scripts':['savu_process_generator=scripts.config_generator.savu_config:main','tomo_recon=savu.tomo_recon:main','savu_daemon=savu.savu_daemon:main','savu_benchmark=scripts.benchmark.savu_benchmark:main','savu_scaling=scripts.benchmark.savu_scaling:main','savu_synthetic_data=scripts.benchmark.synthetic_data:main'],},
       scripts=[facility_path+'/savu_launcher.sh',facility_path+'/savu_mpijob.sh'],
       package_dir={'test_data':'test_data'},
       package_data={'test_data':['data/*.nxs','process_lists/*.nxs','test_process_lists/*.nxs']},